@@ -15,11 +15,18 @@ config = context.config
 target_metadata = Base.metadata
 
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    # Migrations also run mid-process (profile switch, multi-profile scheduler);
+    # keep the application's loggers enabled.
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def _db_url() -> str:
+    # migrations.run_migrations(db_url=...) targets a profile other than the active one.
+    return config.attributes.get("db_url") or get_db_url()
 
 
 def run_migrations_offline() -> None:
-    url = get_db_url()
+    url = _db_url()
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -31,7 +38,7 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online() -> None:
-    url = get_db_url()
+    url = _db_url()
     connectable = create_engine(url, connect_args={"check_same_thread": False})
     with connectable.connect() as connection:
         context.configure(connection=connection, target_metadata=target_metadata)
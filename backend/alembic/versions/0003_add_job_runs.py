@@ -0,0 +1,42 @@
+"""Add job_runs table for scheduler telemetry
+
+Revision ID: 0003
+Revises: c85dd4dd1135
+Create Date: 2026-10-19
+
+Guarded by a table-existence check: on a fresh database revision 0001 already
+creates every table from the current models via create_all().
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "c85dd4dd1135"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("job_runs"):
+        return
+    op.create_table(
+        "job_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_name", sa.String()),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("duration_ms", sa.Float()),
+        sa.Column("status", sa.String()),
+        sa.Column("error", sa.String(), nullable=True),
+    )
+    op.create_index("ix_job_runs_id", "job_runs", ["id"])
+    op.create_index("ix_job_runs_job_name_started_at", "job_runs", ["job_name", "started_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("job_runs")
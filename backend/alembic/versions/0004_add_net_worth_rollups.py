@@ -0,0 +1,57 @@
+"""Add intraday net worth captures and rollup buckets
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Guarded by table-existence checks: on a fresh database revision 0001 already
+creates every table from the current models via create_all().
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if not _table_exists("net_worth_intraday"):
+        op.create_table(
+            "net_worth_intraday",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("captured_at", sa.DateTime()),
+            sa.Column("value", sa.Float()),
+            sa.Column("breakdown", sa.String(), nullable=True),
+        )
+        op.create_index("ix_net_worth_intraday_id", "net_worth_intraday", ["id"])
+        op.create_index("ix_net_worth_intraday_captured_at", "net_worth_intraday", ["captured_at"], unique=True)
+
+    if not _table_exists("net_worth_rollups"):
+        op.create_table(
+            "net_worth_rollups",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("resolution", sa.String()),
+            sa.Column("bucket", sa.String()),
+            sa.Column("value", sa.Float()),
+            sa.Column("low", sa.Float()),
+            sa.Column("high", sa.Float()),
+            sa.Column("breakdown", sa.String(), nullable=True),
+        )
+        op.create_index("ix_net_worth_rollups_id", "net_worth_rollups", ["id"])
+        op.create_index(
+            "ix_net_worth_rollups_resolution_bucket", "net_worth_rollups",
+            ["resolution", "bucket"], unique=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("net_worth_rollups")
+    op.drop_table("net_worth_intraday")
@@ -0,0 +1,45 @@
+"""Add per-asset daily value history
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Guarded by a table-existence check: on a fresh database revision 0001 already
+creates every table from the current models via create_all().
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("asset_value_history"):
+        return
+    op.create_table(
+        "asset_value_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id")),
+        sa.Column("date", sa.String()),
+        sa.Column("quantity", sa.Float()),
+        sa.Column("price", sa.Float()),
+        sa.Column("value_twd", sa.Float()),
+    )
+    op.create_index("ix_asset_value_history_id", "asset_value_history", ["id"])
+    op.create_index(
+        "ix_asset_value_history_asset_id_date", "asset_value_history",
+        ["asset_id", "date"], unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("asset_value_history")
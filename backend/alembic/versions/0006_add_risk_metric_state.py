@@ -0,0 +1,47 @@
+"""Add incremental risk metric state
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+Guarded by a table-existence check: on a fresh database revision 0001 already
+creates every table from the current models via create_all().
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("risk_metric_state"):
+        return
+    op.create_table(
+        "risk_metric_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("first_date", sa.String(), nullable=True),
+        sa.Column("first_value", sa.Float(), nullable=True),
+        sa.Column("prev_date", sa.String(), nullable=True),
+        sa.Column("prev_value", sa.Float(), nullable=True),
+        sa.Column("peak", sa.Float()),
+        sa.Column("max_drawdown", sa.Float()),
+        sa.Column("n_returns", sa.Integer()),
+        sa.Column("mean_return", sa.Float()),
+        sa.Column("m2_return", sa.Float()),
+        sa.Column("last_date", sa.String(), nullable=True),
+        sa.Column("last_value", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("risk_metric_state")
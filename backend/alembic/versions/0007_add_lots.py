@@ -0,0 +1,70 @@
+"""Add lot-based cost basis tables
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+Guarded by table-existence checks: on a fresh database revision 0001 already
+creates every table from the current models via create_all().  Existing
+ledgers are folded into lots lazily on the first read.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if not _table_exists("lots"):
+        op.create_table(
+            "lots",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id")),
+            sa.Column("transaction_id", sa.Integer(), nullable=True),
+            sa.Column("opened_at", sa.DateTime()),
+            sa.Column("quantity", sa.Float()),
+            sa.Column("remaining", sa.Float()),
+            sa.Column("unit_cost", sa.Float()),
+        )
+        op.create_index("ix_lots_id", "lots", ["id"])
+        op.create_index("ix_lots_asset_id", "lots", ["asset_id"])
+
+    if not _table_exists("realized_gains"):
+        op.create_table(
+            "realized_gains",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id")),
+            sa.Column("transaction_id", sa.Integer()),
+            sa.Column("closed_at", sa.DateTime()),
+            sa.Column("quantity", sa.Float()),
+            sa.Column("proceeds", sa.Float()),
+            sa.Column("cost_basis", sa.Float()),
+            sa.Column("gain", sa.Float()),
+        )
+        op.create_index("ix_realized_gains_id", "realized_gains", ["id"])
+        op.create_index("ix_realized_gains_asset_id_closed_at", "realized_gains", ["asset_id", "closed_at"])
+
+    if not _table_exists("lot_checkpoints"):
+        op.create_table(
+            "lot_checkpoints",
+            sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), primary_key=True),
+            sa.Column("method", sa.String()),
+            sa.Column("last_transaction_id", sa.Integer()),
+            sa.Column("last_date", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("lot_checkpoints")
+    op.drop_table("realized_gains")
+    op.drop_table("lots")
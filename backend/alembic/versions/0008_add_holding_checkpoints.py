@@ -0,0 +1,46 @@
+"""Add monthly holding checkpoints
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+Guarded by a table-existence check: on a fresh database revision 0001 already
+creates every table from the current models via create_all().  Checkpoints
+are built lazily on the first as-of query.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("holding_checkpoints"):
+        return
+    op.create_table(
+        "holding_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id")),
+        sa.Column("month", sa.String()),
+        sa.Column("quantity", sa.Float()),
+        sa.Column("cost", sa.Float()),
+        sa.Column("tx_count", sa.Integer()),
+    )
+    op.create_index("ix_holding_checkpoints_id", "holding_checkpoints", ["id"])
+    op.create_index(
+        "ix_holding_checkpoints_asset_id_month", "holding_checkpoints",
+        ["asset_id", "month"], unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("holding_checkpoints")
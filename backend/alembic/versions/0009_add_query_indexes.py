@@ -0,0 +1,40 @@
+"""Add indexes for hot transaction and snapshot queries
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+Each index is guarded by an existence check: on a fresh database revision
+0001 already creates them from the current models via create_all().
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_transactions_asset_id_date_covering", "transactions", ["asset_id", "date", "amount", "buy_price"]),
+    ("ix_transactions_date", "transactions", ["date"]),
+    ("ix_net_worth_history_date_value", "net_worth_history", ["date", "value"]),
+]
+
+
+def _index_exists(table: str, name: str) -> bool:
+    return any(ix["name"] == name for ix in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if not _index_exists(table, name):
+            op.create_index(name, table, columns)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
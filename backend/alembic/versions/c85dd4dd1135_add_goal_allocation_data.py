@@ -18,6 +18,11 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
+    # Fresh databases already have the column: revision 0001 runs create_all()
+    # against the current models.
+    cols = [c["name"] for c in sa.inspect(op.get_bind()).get_columns('goals')]
+    if 'allocation_data' in cols:
+        return
     op.add_column('goals', sa.Column('allocation_data', sa.String(), nullable=True))
 
     # Migrate existing ASSET_ALLOCATION goals: copy description → allocation_data,
@@ -0,0 +1,162 @@
+"""Fixtures for the pytest-benchmark suite.
+
+Benchmarks run against synthetic profiles (devtools/synthetic_data) at
+three scales::
+
+    s   10 assets      ~1k transactions
+    m   100 assets     ~100k transactions
+    l   1000 assets    ~1M transactions
+
+Each dataset is generated once into pytest's cache directory and reused
+until the generator changes.  Pick scales with ``--bench-scales=s,m``
+(default ``s``).  yfinance, ccxt and outbound HTTP are replaced with
+deterministic fakes, so runs never touch the network.
+
+Needs ``pip install pytest-benchmark``; ``scripts/bench.sh`` wraps the
+save / compare workflow.
+"""
+import hashlib
+import inspect
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from backend import market_db
+from backend.database import Base
+from backend.devtools import fakes, synthetic_data
+
+
+@dataclass(frozen=True)
+class BenchScale:
+    name: str
+    assets: int
+    transactions: int
+    years: float
+    rounds: int
+
+
+SCALES = {
+    "s": BenchScale("s", 10, 1_000, 1.0, 20),
+    "m": BenchScale("m", 100, 100_000, 3.0, 5),
+    "l": BenchScale("l", 1000, 1_000_000, 5.0, 3),
+}
+SEED = 42
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-scales", default="s",
+                     help="comma-separated dataset scales to benchmark (s, m, l)")
+
+
+def pytest_generate_tests(metafunc):
+    if "dataset" in metafunc.fixturenames:
+        names = [n.strip() for n in metafunc.config.getoption("--bench-scales").split(",") if n.strip()]
+        unknown = set(names) - set(SCALES)
+        if unknown:
+            raise pytest.UsageError(f"Unknown --bench-scales {sorted(unknown)}; choose from {sorted(SCALES)}")
+        metafunc.parametrize("dataset", [SCALES[n] for n in names], ids=names, indirect=True, scope="session")
+
+
+def _synthetic_scale(scale: BenchScale) -> synthetic_data.Scale:
+    days = int(scale.years * 365)
+    return synthetic_data.Scale(
+        assets=scale.assets, years=scale.years,
+        activity=min(scale.transactions / (scale.assets * days), 1.0),
+        wallets=0, exchange_assets=4,
+    )
+
+
+def _generator_version() -> str:
+    return hashlib.sha1(inspect.getsource(synthetic_data).encode()).hexdigest()[:10]
+
+
+def _engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _):
+        dbapi_conn.execute("PRAGMA journal_mode=WAL")
+        dbapi_conn.execute("PRAGMA synchronous=NORMAL")
+
+    return engine
+
+
+@pytest.fixture(scope="session", autouse=True)
+def market_database(tmp_path_factory):
+    """Shared market database for the session; quotes and closes are cached across rounds."""
+    market_db.configure(f"sqlite:///{tmp_path_factory.mktemp('market') / 'market.db'}")
+    yield
+    market_db.dispose()
+
+
+@pytest.fixture(scope="session")
+def dataset(request):
+    """Engine on the cached synthetic profile for the requested scale.
+
+    Data ends today, so the cache is rebuilt once a day.
+    """
+    scale: BenchScale = request.param
+    cache = request.config.cache.mkdir("bench-data")
+    path = cache / f"{scale.name}-{SEED}-{date.today()}-{_generator_version()}.db"
+    if not path.exists():
+        for stale in cache.glob(f"{scale.name}-*.db*"):
+            stale.unlink()
+        tmp = path.with_suffix(".tmp")
+        engine = _engine(tmp)
+        Base.metadata.create_all(engine)
+        synthetic_data.generate(engine, _synthetic_scale(scale), seed=SEED)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        engine.dispose()
+        tmp.rename(path)
+    engine = _engine(path)
+    engine.bench_scale = scale
+    yield engine
+    engine.dispose()
+
+
+@contextmanager
+def rolled_back(engine):
+    """Session whose commits become savepoints of an outer, rolled-back transaction."""
+    conn = engine.connect()
+    outer = conn.begin()
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        outer.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def run(benchmark, dataset):
+    """``run(fn, rollback=False)`` → benchmark ``fn(session)`` on a fresh session per round.
+
+    A fresh session keeps the identity map from serving later rounds from
+    memory.  ``rollback=True`` discards writes after every round.
+    """
+    scale = dataset.bench_scale
+    benchmark.extra_info["scale"] = scale.name
+
+    def _run(fn, rollback: bool = False):
+        def once():
+            if rollback:
+                with rolled_back(dataset) as db:
+                    return fn(db)
+            with Session(dataset) as db:
+                return fn(db)
+        return benchmark.pedantic(once, rounds=scale.rounds, iterations=1, warmup_rounds=1)
+
+    return _run
+
+
+@pytest.fixture(autouse=True)
+def no_network():
+    with fakes.offline():
+        yield
@@ -0,0 +1,82 @@
+"""Benchmarks for the backend hot paths (see conftest for scales and fakes)."""
+
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from backend import models
+from backend.repositories.asset_repo import AssetRepository
+from backend.services import analytics_service, dashboard_service, forecast_service, risk_service, snapshot_service
+from backend.services.providers import PROVIDERS
+
+
+def test_list_all(run):
+    assets = run(lambda db: AssetRepository(db).list_all())
+    assert assets
+
+
+def test_dashboard_metrics(run):
+    data = run(dashboard_service.calculate_dashboard_metrics)
+    assert data.assets
+
+
+def test_net_worth_history_snapshots(run):
+    """1y of daily NetWorthHistory rows (fast path)."""
+    history = run(lambda db: analytics_service.get_net_worth_history(db, "1y"))
+    assert len(history) >= 300
+
+
+def test_net_worth_history_rebuild(run):
+    """Range wider than the snapshots: replay transactions against Yahoo prices (slow path)."""
+    history = run(lambda db: analytics_service.get_net_worth_history(db, "all"))
+    assert len(history) == (date.today() - date(2020, 1, 1)).days + 1
+
+
+def test_build_asset_history(run, dataset):
+    with dataset.connect() as conn:
+        asset_id = conn.exec_driver_sql(
+            "SELECT asset_id FROM transactions GROUP BY asset_id ORDER BY count(*) DESC LIMIT 1"
+        ).scalar()
+
+    def build(db):
+        asset = db.get(models.Asset, asset_id)
+        return analytics_service.build_asset_history(asset, date.today() - timedelta(days=365))
+
+    assert len(run(build)) == 366
+
+
+def test_compute_risk_metrics(run):
+    """Full-history metrics from the daily series, as the stats fallback computes them."""
+    def compute(db):
+        return analytics_service.compute_risk_metrics(
+            analytics_service.get_net_worth_history(db, "all", resolution="day")
+        )
+
+    assert run(compute)["maxDrawdown"]["value"] >= 0
+
+
+def test_risk_metrics_incremental(run):
+    assert run(risk_service.get_risk_metrics) is not None
+
+
+def test_snapshot_net_worth(run):
+    def snapshot(db):
+        snapshot_service.snapshot_net_worth(db)
+        return db.query(models.NetWorthHistory).filter_by(date=date.today().isoformat()).one()
+
+    run(snapshot, rollback=True)
+
+
+@pytest.mark.parametrize("provider", ["binance", "pionex"])
+def test_provider_reconciliation(run, provider):
+    assert run(PROVIDERS[provider].sync, rollback=True) is True
+
+
+def test_simulate_paths(benchmark):
+    """Goal forecast Monte Carlo at full size; independent of the dataset."""
+    model = {"monthly_return": 0.006, "monthly_return_std": 0.04,
+             "monthly_contribution": 30_000.0, "monthly_contribution_std": 15_000.0}
+    paths = benchmark(forecast_service.simulate_paths, 2e6, model)
+    assert paths.shape == (forecast_service.N_PATHS, forecast_service.HORIZON_MONTHS)
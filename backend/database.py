@@ -1,7 +1,7 @@
 import threading
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from . import profile_manager
 
 # Protects the global engine / SessionLocal swap inside reconnect().
@@ -9,8 +9,8 @@ from . import profile_manager
 _reconnect_lock = threading.Lock()
 
 # Dynamic Database URL
-def get_engine():
-    url = profile_manager.get_db_url()
+def get_engine(url: str | None = None):
+    url = url or profile_manager.get_db_url()
     eng = create_engine(url, connect_args={"check_same_thread": False})
 
     # Enable WAL journal mode and NORMAL sync for better concurrency and
@@ -44,6 +44,34 @@ def reconnect():
         from . import migrations as db_migrations
         db_migrations.run_migrations()
 
+# Session factories for profiles other than the active one, opened lazily by
+# the multi-profile scheduler.  Created under _reconnect_lock because Alembic
+# keeps its migration context in module globals.
+_profile_sessions: dict[str, sessionmaker] = {}
+
+def profile_session(name: str) -> Session:
+    """New session on profile ``name``'s database (the active profile uses SessionLocal)."""
+    if name == profile_manager.get_current_profile():
+        return SessionLocal()
+    factory = _profile_sessions.get(name)
+    if factory is None:
+        with _reconnect_lock:
+            factory = _profile_sessions.get(name)
+            if factory is None:
+                url = profile_manager.get_db_url(name)
+                from . import migrations as db_migrations
+                db_migrations.run_migrations(url)
+                factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine(url))
+                _profile_sessions[name] = factory
+    return factory()
+
+def dispose_profile(name: str) -> None:
+    """Drop the cached engine for ``name`` (e.g. before its DB file is deleted)."""
+    with _reconnect_lock:
+        factory = _profile_sessions.pop(name, None)
+    if factory is not None:
+        factory.kw["bind"].dispose()
+
 # Dependency
 def get_db():
     # Always create a new session from the current SessionLocal
@@ -0,0 +1,90 @@
+"""Deterministic stand-ins for every upstream the backend calls.
+
+``offline()`` patches yfinance, ccxt, the Pionex REST API, the MAX FX rate
+and the live price fetchers so benchmarks and load tests never touch the
+network and see the same prices on every run.
+"""
+import hashlib
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+USD_TWD = 32.0
+EXCHANGE_TICKERS = [f"X{i}" for i in range(8)]
+
+
+def _rng(symbol: str) -> np.random.Generator:
+    return np.random.default_rng(int(hashlib.sha1(symbol.encode()).hexdigest()[:8], 16))
+
+
+def price(symbol: str) -> float:
+    return float(_rng(symbol).uniform(10, 1000))
+
+
+def download(symbols, start=None, end=None, **_):
+    """``yf.download`` stand-in: a seeded random walk per symbol between start and end."""
+    symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+    index = pd.date_range(start, end, freq="D", inclusive="left")
+    closes = {}
+    for sym in symbols:
+        rng = _rng(sym)
+        base = USD_TWD if sym == "USDTWD=X" else rng.uniform(10, 1000)
+        closes[sym] = base * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+    return pd.concat({"Close": pd.DataFrame(closes, index=index)}, axis=1)
+
+
+class Exchange:
+    """``ccxt.binance`` stand-in holding balances that differ from the synthetic ledger."""
+
+    def __init__(self, config=None):
+        self.tickers = EXCHANGE_TICKERS
+
+    def fetch_balance(self):
+        return {"total": {t: 1.0 + i * 0.5 for i, t in enumerate(self.tickers)}}
+
+    def fetch_tickers(self):
+        return {f"{t}/USDT": {"last": 10.0 + i} for i, t in enumerate(self.tickers)}
+
+
+class Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+        self.text = str(payload)
+        self.content = self.text.encode()
+
+    def json(self):
+        return self._payload
+
+
+def pionex_get(url, *args, **kwargs):
+    if url.endswith("/balances"):
+        balances = [{"coin": t, "free": str(2.0 + i), "frozen": "0"} for i, t in enumerate(EXCHANGE_TICKERS)]
+        return Response({"result": True, "data": {"balances": balances}})
+    return Response({"result": True, "data": {"tickers": [
+        {"symbol": f"{t}_USDT", "close": str(5.0 + i)} for i, t in enumerate(EXCHANGE_TICKERS)
+    ]}})
+
+
+@contextmanager
+def offline():
+    from ..services import exchange_rate_service
+
+    exchange_rate_service._rate_cache.update(rate=USD_TWD, timestamp=0)
+    targets = {
+        "backend.services.exchange_rate_service.fetch_rate_from_max": dict(return_value=USD_TWD),
+        "backend.services.analytics_service.yf.download": dict(side_effect=download),
+        "backend.services.providers.binance.ccxt.binance": dict(new=Exchange),
+        "backend.services.providers.pionex.requests.get": dict(side_effect=pionex_get),
+        "backend.services.price_service.fetch_stock_price": dict(side_effect=price),
+        "backend.services.price_service.fetch_crypto_price": dict(side_effect=price),
+        "backend.services.price_service.fetch_crypto_prices":
+            dict(side_effect=lambda tickers: {t: price(t) for t in tickers}),
+    }
+    with ExitStack() as stack:
+        for target, kwargs in targets.items():
+            stack.enter_context(patch(target, **kwargs))
+        yield
@@ -0,0 +1,253 @@
+"""Local HTTP load test with per-route latency percentiles.
+
+Starts the FastAPI ``app`` under uvicorn in a background thread (scheduler
+off, upstreams replaced by ``fakes.offline``) on a synthetic profile, then
+drives a weighted mix of dashboard reads, history ranges, risk metrics,
+settings and transaction writes from ``--concurrency`` async clients::
+
+    python -m backend.devtools.loadtest --preset medium --concurrency 16 --duration 30
+
+Reports throughput, p50/p95/p99 latency and error rate per route, plus the
+number of SQLite "database is locked" errors the engine saw.  Data goes to
+a throwaway ``YANTAGE_DATA_DIR`` unless ``--data-dir`` is given.  With
+``--url`` an already running server is targeted instead (no stubs, no
+busy-error count).
+
+The client shares the server's process (and GIL), so absolute numbers are
+a floor; compare runs on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+WARMUP_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str           # report label, e.g. "GET /api/stats/history?range=1y"
+    weight: int
+    method: str
+    path: str           # may contain {asset_id}
+    body: dict | None = None
+
+
+MIX = [
+    Route("GET /api/dashboard/",                 25, "GET",  "/api/dashboard/"),
+    Route("GET /api/assets/",                    12, "GET",  "/api/assets/"),
+    Route("GET /api/stats/history?range=30d",     8, "GET",  "/api/stats/history?range=30d"),
+    Route("GET /api/stats/history?range=1y",      6, "GET",  "/api/stats/history?range=1y"),
+    Route("GET /api/stats/history?range=all",     3, "GET",  "/api/stats/history?range=all&max_points=500"),
+    Route("GET /api/stats/asset/{id}/history",    5, "GET",  "/api/stats/asset/{asset_id}/history?range=1y"),
+    Route("GET /api/stats/risk_metrics",          8, "GET",  "/api/stats/risk_metrics"),
+    Route("GET /api/transactions/",               5, "GET",  "/api/transactions/?limit=50"),
+    Route("POST /api/assets/{id}/transactions/", 12, "POST", "/api/assets/{asset_id}/transactions/",
+          {"amount": 1.0, "buy_price": 100.0}),
+    Route("GET /api/settings/",                   5, "GET",  "/api/settings/"),
+    Route("PUT /api/settings/chart_theme",        2, "PUT",  "/api/settings/chart_theme",
+          {"key": "chart_theme", "value": "Morandi"}),
+]
+
+
+# ── SQLite busy counter ───────────────────────────────────────────────────────
+
+_busy = {"count": 0}
+
+
+def _count_busy(context) -> None:
+    orig = getattr(context.original_exception, "args", None)
+    if isinstance(context.original_exception, sqlite3.OperationalError) and orig and (
+        "locked" in str(orig[0]) or "busy" in str(orig[0])
+    ):
+        _busy["count"] += 1
+
+
+# ── Server ────────────────────────────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(app, port: int | None = None):
+    """Start ``app`` under uvicorn in a daemon thread; returns (server, base_url)."""
+    import uvicorn
+
+    port = port or _free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off",
+                            log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+# ── Load ──────────────────────────────────────────────────────────────────────
+
+async def run_load(base_url: str, asset_ids: list[int], concurrency: int = 8, duration: float = 20.0,
+                   mix: list[Route] = MIX, seed: int = 0, warmup: float = WARMUP_SECONDS) -> dict:
+    """Drive ``mix`` for ``warmup + duration`` seconds; returns raw samples per route.
+
+    Samples taken during warm-up are discarded.
+    """
+    import httpx
+
+    rng = random.Random(seed)
+    weights = [r.weight for r in mix]
+    samples: dict[str, list[tuple[float, bool]]] = defaultdict(list)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def worker(client):
+        while (now := time.monotonic()) < stop_at:
+            route = rng.choices(mix, weights)[0]
+            path = route.path.format(asset_id=rng.choice(asset_ids)) if asset_ids else route.path
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(route.method, path, json=route.body)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if now >= measure_from:
+                samples[route.name].append((time.perf_counter() - t0, ok))
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return {"duration": duration, "concurrency": concurrency, "samples": samples}
+
+
+def summarize(result: dict, busy_errors: int | None = None) -> dict:
+    from ..utils.math import percentile
+
+    duration = result["duration"]
+    routes = {}
+    every = []
+    for name, samples in sorted(result["samples"].items()):
+        ms = [s[0] * 1000 for s in samples]
+        errors = sum(1 for s in samples if not s[1])
+        every.extend(samples)
+        routes[name] = {
+            "requests": len(samples),
+            "rps":      round(len(samples) / duration, 2),
+            "p50_ms":   round(percentile(ms, 50), 1),
+            "p95_ms":   round(percentile(ms, 95), 1),
+            "p99_ms":   round(percentile(ms, 99), 1),
+            "error_pct": round(100.0 * errors / len(samples), 2) if samples else 0.0,
+        }
+    all_ms = [s[0] * 1000 for s in every]
+    return {
+        "concurrency": result["concurrency"],
+        "duration_s":  duration,
+        "total": {
+            "requests":  len(every),
+            "rps":       round(len(every) / duration, 2),
+            "p50_ms":    round(percentile(all_ms, 50), 1),
+            "p95_ms":    round(percentile(all_ms, 95), 1),
+            "p99_ms":    round(percentile(all_ms, 99), 1),
+            "error_pct": round(100.0 * sum(1 for s in every if not s[1]) / len(every), 2) if every else 0.0,
+        },
+        "sqlite_busy_errors": busy_errors,
+        "routes": routes,
+    }
+
+
+def format_report(summary: dict) -> str:
+    header = f"{'route':<40} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}"
+    lines = [f"concurrency={summary['concurrency']}  duration={summary['duration_s']}s", header, "-" * len(header)]
+    for name, r in list(summary["routes"].items()) + [("TOTAL", summary["total"])]:
+        lines.append(f"{name:<40} {r['requests']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} "
+                     f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['error_pct']:>6.2f}")
+    if summary["sqlite_busy_errors"] is not None:
+        lines.append(f"SQLite busy/locked errors: {summary['sqlite_busy_errors']}")
+    return "\n".join(lines)
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _prepare_local(args) -> tuple[object, list[int]]:
+    """Migrate + populate the target profile; returns (app, asset_ids).  Imports the app lazily
+    so ``YANTAGE_DATA_DIR`` is honoured."""
+    from sqlalchemy import event, select
+    from sqlalchemy.engine import Engine
+
+    from .. import database, migrations, models, profile_manager
+    from ..main import app
+    from . import synthetic_data
+
+    if profile_manager.get_current_profile() != args.profile:
+        profile_manager.create_profile(args.profile)
+        profile_manager.switch_profile(args.profile)
+        database.reconnect()
+    migrations.run_migrations()
+    with database.engine.connect() as conn:
+        populated = conn.execute(select(models.Asset.id).limit(1)).first() is not None
+    if not populated or args.reset:
+        synthetic_data.generate(database.engine, synthetic_data.PRESETS[args.preset],
+                                seed=args.seed, clear=args.reset)
+    with database.engine.connect() as conn:
+        asset_ids = list(conn.execute(
+            select(models.Asset.id).where(models.Asset.category.in_(["Fluid", "Stock", "Crypto"]))
+        ).scalars())
+    event.listen(Engine, "handle_error", _count_busy)
+    return app, asset_ids
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the API with a realistic request mix.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds (after warm-up)")
+    parser.add_argument("--warmup", type=float, default=WARMUP_SECONDS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--data-dir", help="YANTAGE_DATA_DIR for the in-process server (default: temp dir)")
+    parser.add_argument("--profile", default="loadtest")
+    parser.add_argument("--preset", default="medium", help="synthetic_data preset for an empty profile")
+    parser.add_argument("--reset", action="store_true", help="regenerate the profile's data")
+    parser.add_argument("--json", help="also write the summary as JSON to this path")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        base_url, asset_ids, busy = args.url.rstrip("/"), [], None
+        mix = [r for r in MIX if "{asset_id}" not in r.path]
+        result = asyncio.run(run_load(base_url, asset_ids, args.concurrency, args.duration, mix,
+                                      args.seed, args.warmup))
+    else:
+        os.environ["YANTAGE_DATA_DIR"] = args.data_dir or tempfile.mkdtemp(prefix="yantage-load-")
+        from .fakes import offline
+
+        with offline():
+            app, asset_ids = _prepare_local(args)
+            server, base_url = serve_in_thread(app)
+            try:
+                result = asyncio.run(run_load(base_url, asset_ids, args.concurrency, args.duration,
+                                              MIX, args.seed, args.warmup))
+            finally:
+                server.should_exit = True
+        busy = _busy["count"]
+
+    summary = summarize(result, busy)
+    print(format_report(summary))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""Deterministic synthetic datasets for benchmarks and load tests.
+
+``generate`` writes a complete profile — assets across every category,
+years of daily transactions, synced-wallet balance diffs, exchange
+connections, daily net worth and per-asset value snapshots, goals and
+budget categories — straight into a database with chunked ``executemany``
+inserts.  The same ``seed`` and ``end`` date always produce the same rows.
+
+Named presets (``PRESETS``) give stable scales to compare runs against::
+
+    python -m backend.devtools.synthetic_data --profile bench --preset large --reset
+
+writes into the ``bench`` profile (created if missing).  Unlike
+``/api/system/seed`` this needs no ``SEED_ALLOWED`` and never touches the
+active profile unless asked to.
+"""
+import argparse
+import json
+import logging
+import time
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import create_engine, delete, event, func, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .. import models, profile_manager
+from ..database import Base
+from ..services import risk_service, snapshot_service
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 10_000
+USD_TWD = 32.0
+NETWORKS = ("Ethereum", "Scroll", "BSC", "Arbitrum")
+EXCHANGES = ("binance", "pionex")
+
+
+@dataclass(frozen=True)
+class Scale:
+    assets: int = 50                # manual assets (wallet / exchange assets come on top)
+    years: float = 3.0
+    activity: float = 0.25          # chance a manual asset has a transaction on a given day
+    wallets: int = 2                # synced wallet connections
+    wallet_tokens: int = 4          # tokens tracked per wallet
+    syncs_per_day: int = 6          # wallet balance syncs (diff transactions) per day
+    exchange_assets: int = 6        # assets per exchange connection
+    goals: int = 6
+    asset_history: bool = True      # per-asset daily AssetValueHistory rows
+
+
+PRESETS = {
+    "small":  Scale(assets=15, years=1.0, wallets=1, wallet_tokens=2, syncs_per_day=2),
+    "medium": Scale(),
+    "large":  Scale(assets=200, years=5.0, wallets=4, wallet_tokens=6),
+    "xlarge": Scale(assets=500, years=10.0, activity=0.3, wallets=8, wallet_tokens=8),
+}
+
+# (category, sub_category, share of manual assets, usd-quoted, price, daily volatility)
+_KINDS = [
+    ("Fluid",       "Cash",        0.20, False, 1.0,      0.0),
+    ("Stock",       "Stock",       0.35, False, 600.0,    0.015),   # TW, 4-digit tickers
+    ("Stock",       "Stock",       0.20, True,  150.0,    0.018),   # US
+    ("Crypto",      "Crypto",      0.10, True,  2000.0,   0.04),
+    ("Fixed",       "Real Estate", 0.04, False, 8_000_000, 0.0005),
+    ("Receivables", "Loan",        0.03, False, 1.0,      0.0),
+    ("Liabilities", "Credit Card", 0.05, False, 1.0,      0.0),
+    ("Liabilities", "Loan",        0.03, False, 1.0,      0.0),
+]
+
+_ASSET_DEFAULTS = {
+    "is_favorite": False, "payment_due_day": None, "network": None,
+    "contract_address": None, "decimals": 18, "connection_id": None,
+}
+
+
+# ── Assets ────────────────────────────────────────────────────────────────────
+
+def _manual_assets(rng: np.random.Generator, n: int) -> list[dict]:
+    shares = np.array([k[2] for k in _KINDS])
+    kinds = rng.choice(len(_KINDS), size=n, p=shares / shares.sum())
+    assets = []
+    for i, k in enumerate(kinds):
+        category, sub, _, usd, price, vol = _KINDS[k]
+        if category == "Stock":
+            ticker = f"SYN{i:04d}" if usd else f"{9000 + i % 1000:04d}"
+        elif category == "Crypto":
+            ticker = f"SYN{i}"
+        else:
+            ticker = None
+        assets.append({
+            "name": f"{sub} {i:04d}", "ticker": ticker, "category": category, "sub_category": sub,
+            "current_price": price, "source": "manual", "include_in_net_worth": True,
+            "is_favorite": bool(rng.random() < 0.1),
+            "payment_due_day": int(rng.integers(1, 29)) if sub == "Credit Card" else None,
+            "_usd": usd, "_vol": vol,
+        })
+    return assets
+
+
+def _synced_assets(rng: np.random.Generator, scale: Scale) -> tuple[list[dict], list[dict]]:
+    """(connections, assets) for wallet and exchange integrations."""
+    connections, assets = [], []
+    for w in range(scale.wallets):
+        conn_id = len(connections) + 1
+        connections.append({"id": conn_id, "name": f"Wallet {w}", "provider": "wallet",
+                            "api_key": None, "api_secret": None,
+                            "address": "0x" + f"{w:040x}", "is_active": True})
+        for t in range(scale.wallet_tokens):
+            network = NETWORKS[t % len(NETWORKS)]
+            assets.append({
+                "name": f"TKN{t} (Wallet {w})", "ticker": f"TKN{t}", "category": "Crypto",
+                "sub_category": "Crypto", "current_price": float(rng.uniform(0.5, 3000)),
+                "source": "web3_wallet", "include_in_net_worth": True, "network": network,
+                "contract_address": "0x" + f"{w * 100 + t:040x}" if t else None,
+                "decimals": 18, "connection_id": conn_id, "_usd": True, "_vol": 0.05, "_wallet": True,
+            })
+    for exchange in EXCHANGES:
+        conn_id = len(connections) + 1
+        connections.append({"id": conn_id, "name": f"{exchange.title()} Main", "provider": exchange,
+                            "api_key": "synthetic", "api_secret": "synthetic", "address": None,
+                            "is_active": True})
+        for t in range(scale.exchange_assets):
+            assets.append({
+                "name": f"X{t} ({exchange.title()})", "ticker": f"X{t}", "category": "Crypto",
+                "sub_category": "Crypto", "current_price": float(rng.uniform(0.1, 50_000)),
+                "source": exchange, "include_in_net_worth": True, "connection_id": conn_id,
+                "_usd": True, "_vol": 0.04,
+            })
+    return connections, assets
+
+
+# ── Transactions ──────────────────────────────────────────────────────────────
+
+def _price_paths(rng: np.random.Generator, assets: list[dict], days: int) -> np.ndarray:
+    """(assets, days) geometric random-walk prices ending at each asset's current price."""
+    vol = np.array([a["_vol"] for a in assets])[:, None]
+    steps = rng.standard_normal((len(assets), days)) * vol
+    log_path = np.cumsum(steps, axis=1)
+    log_path -= log_path[:, -1:]
+    return np.array([a["current_price"] for a in assets])[:, None] * np.exp(log_path)
+
+
+def _asset_flows(rng: np.random.Generator, asset: dict, prices: np.ndarray, days: int,
+                 activity: float, syncs_per_day: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, bool]:
+    """(day index, seconds into day, amount, is_transfer) arrays for one asset."""
+    category, sub = asset["category"], asset["sub_category"]
+    if asset.get("_wallet"):
+        # Balance syncs write the diff since the last sync at zero price.
+        n = days * syncs_per_day
+        idx = np.repeat(np.arange(days), syncs_per_day)
+        secs = np.tile(np.arange(syncs_per_day) * (86_400 // syncs_per_day), days)
+        start_units = rng.uniform(500, 5_000) / asset["current_price"]
+        balance = start_units * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+        amount = np.diff(balance, prepend=0.0)
+        return idx, secs, amount, False
+    if category == "Fixed":
+        return np.array([0]), np.array([36_000]), np.array([1.0]), False
+    if sub == "Loan" and category == "Liabilities":
+        months = np.arange(0, days, 30)
+        amount = np.full(len(months), -25_000.0)
+        amount[0] = 5_000_000.0
+        return months, np.full(len(months), 36_000), amount, False
+
+    idx = np.flatnonzero(rng.random(days) < activity)
+    secs = rng.integers(0, 86_400, len(idx))
+    if category in ("Fluid", "Receivables"):
+        amount = rng.normal(-1_500, 2_000, len(idx)).round(0)
+        amount[::15] = 60_000.0                       # salary-like inflows
+        if len(idx):
+            amount[0] = 200_000.0
+        return idx, secs, amount, True
+    if sub == "Credit Card":
+        amount = rng.uniform(100, 5_000, len(idx)).round(0)
+        amount[::20] = -40_000.0                      # statement payoff
+        return idx, secs, amount, False
+    # Stock / crypto: mostly buys; one in five trades sells part of the position.
+    notional = rng.uniform(5_000, 50_000, len(idx)) / (USD_TWD if asset["_usd"] else 1.0)
+    amount = notional / prices[idx]
+    sells = rng.random(len(idx)) < 0.2
+    fractions = rng.uniform(0.1, 0.5, len(idx))
+    held = 0.0
+    for j in range(len(idx)):
+        if sells[j]:
+            amount[j] = -held * fractions[j]
+        held += amount[j]
+    return idx, secs, amount, False
+
+
+def _flows(rng: np.random.Generator, assets: list[dict], prices: np.ndarray, scale: Scale) -> list[tuple]:
+    days = prices.shape[1]
+    return [_asset_flows(rng, asset, prices[a], days, scale.activity, scale.syncs_per_day)
+            for a, asset in enumerate(assets)]
+
+
+def _quantities(flows: list[tuple], days: int) -> np.ndarray:
+    """(assets, days) end-of-day quantity held."""
+    quantities = np.zeros((len(flows), days))
+    for a, (idx, _, amount, _) in enumerate(flows):
+        np.add.at(quantities[a], idx, amount)
+    return np.cumsum(quantities, axis=1)
+
+
+def _transaction_rows(flows: list[tuple], assets: list[dict], ids: list[int], prices: np.ndarray,
+                      start: date) -> Iterator[dict]:
+    start_dt = datetime.combine(start, datetime.min.time())
+    for a, (idx, secs, amount, transfer) in enumerate(flows):
+        wallet = assets[a].get("_wallet", False)
+        for i, s, q, p in zip(idx.tolist(), secs.tolist(), amount.tolist(), prices[a][idx].tolist()):
+            if q == 0.0:
+                continue
+            yield {
+                "asset_id": ids[a], "amount": q, "buy_price": 0.0 if wallet else p,
+                "date": start_dt + timedelta(days=i, seconds=s),
+                "is_transfer": transfer and q < 0 and i % 7 == 0, "note": None,
+            }
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+
+def _insert(conn: Connection, table, rows) -> int:
+    count, chunk = 0, []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_ROWS:
+            conn.execute(table.insert(), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def reset(conn: Connection) -> None:
+    for table in reversed(Base.metadata.sorted_tables):
+        conn.execute(delete(table))
+
+
+def generate(engine: Engine, scale: Scale = Scale(), seed: int = 0,
+             end: date | None = None, clear: bool = False) -> dict[str, int]:
+    """Write a synthetic profile ending at ``end`` (default today); returns row counts per table.
+
+    The schema must exist.  ``clear`` empties every table first.
+    """
+    end = end or date.today()
+    rng = np.random.Generator(np.random.SFC64(seed))
+    days = max(int(round(scale.years * 365)), 2)
+    start = end - timedelta(days=days - 1)
+    day_labels = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+
+    manual = _manual_assets(rng, scale.assets)
+    connections, synced = _synced_assets(rng, scale)
+    assets = manual + synced
+    prices = _price_paths(rng, assets, days)
+    counts: dict[str, int] = {}
+
+    with engine.begin() as conn:
+        if clear:
+            reset(conn)
+        for model in (models.Asset, models.CryptoConnection):
+            if conn.execute(select(func.count()).select_from(model.__table__)).scalar():
+                raise ValueError("Target database is not empty; pass clear=True to replace its data")
+
+        counts["crypto_connections"] = _insert(conn, models.CryptoConnection.__table__, connections)
+        # executemany needs every row to carry the same keys.
+        asset_rows = [
+            {**_ASSET_DEFAULTS, **{k: v for k, v in a.items() if not k.startswith("_")}, "id": i + 1,
+             "last_updated_at": datetime.combine(end, datetime.min.time())}
+            for i, a in enumerate(assets)
+        ]
+        counts["assets"] = _insert(conn, models.Asset.__table__, asset_rows)
+        ids = [r["id"] for r in asset_rows]
+
+        flows = _flows(rng, assets, prices, scale)
+        counts["transactions"] = _insert(
+            conn, models.Transaction.__table__, _transaction_rows(flows, assets, ids, prices, start)
+        )
+        quantities = _quantities(flows, days)
+
+        # Snapshots: value = quantity × price (TWD), liabilities negative.
+        fx = np.array([USD_TWD if a["_usd"] else 1.0 for a in assets])[:, None]
+        values = quantities * prices * fx
+        sign = np.array([-1.0 if a["category"] == "Liabilities" else 1.0 for a in assets])[:, None]
+        categories = sorted({a["category"] for a in assets})
+        by_category = {
+            c: (values * sign)[[i for i, a in enumerate(assets) if a["category"] == c]].sum(axis=0)
+            for c in categories
+        }
+        net = sum(by_category.values())
+        counts["net_worth_history"] = _insert(conn, models.NetWorthHistory.__table__, (
+            {"date": day_labels[d], "value": round(float(net[d]), 0),
+             "breakdown": json.dumps({c: round(float(v[d]), 0) for c, v in by_category.items()}),
+             "created_at": datetime.fromisoformat(day_labels[d]) + timedelta(hours=23)}
+            for d in range(days)
+        ))
+        if scale.asset_history:
+            counts["asset_value_history"] = _insert(conn, models.AssetValueHistory.__table__, (
+                {"asset_id": ids[a], "date": day_labels[d], "quantity": float(quantities[a, d]),
+                 "price": float(prices[a, d] * fx[a, 0]), "value_twd": float(values[a, d])}
+                for a in range(len(assets)) for d in range(days) if quantities[a, d] != 0.0
+            ))
+
+        goal_targets = np.sort(rng.uniform(1.2, 4.0, scale.goals)) * max(float(net[-1]), 1_000_000.0)
+        counts["goals"] = _insert(conn, models.Goal.__table__, (
+            [{"name": f"Net worth goal {i}", "target_amount": round(float(t), -3), "goal_type": "NET_WORTH",
+              "currency": "TWD"} for i, t in enumerate(goal_targets[:-1])]
+            + [{"name": "Monthly spending", "target_amount": 60_000.0, "goal_type": "MONTHLY_SPENDING",
+                "currency": "TWD"}]
+        )) if scale.goals else 0
+        counts["budget_categories"] = _insert(conn, models.BudgetCategory.__table__, [
+            {"name": n, "budget_amount": b, "group_name": g, "is_active": True}
+            for n, b, g in [("Food", 12_000.0, "Living"), ("Transport", 5_000.0, "Living"),
+                            ("Rent", 25_000.0, "Fixed"), ("Fun", 3_000.0, "Growth")]
+        ])
+        counts["system_settings"] = _insert(conn, models.SystemSetting.__table__, [
+            {"key": "budget_start_day", "value": "1"},
+        ])
+
+    # Derived state that the app otherwise maintains incrementally.
+    with Session(bind=engine) as db:
+        snapshot_service.rebuild_weekly_rollups(db)
+        risk_service.rebuild_risk_state(db)
+        db.commit()
+    return counts
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def profile_engine(profile: str) -> Engine:
+    """Engine on ``profile``'s database (created, with schema, if missing)."""
+    if profile != profile_manager.DEFAULT_PROFILE:
+        profile_manager.create_profile(profile)
+    engine = create_engine(profile_manager.get_db_url(profile))
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _):
+        dbapi_conn.execute("PRAGMA journal_mode=WAL")
+        dbapi_conn.execute("PRAGMA synchronous=NORMAL")
+
+    # Every migration is guarded by table/index existence checks, so a
+    # create_all schema upgrades cleanly when the profile is first opened.
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic dataset into a profile database.")
+    parser.add_argument("--profile", required=True, help="target profile (created if missing)")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="medium")
+    parser.add_argument("--assets", type=int, help="override the preset's manual asset count")
+    parser.add_argument("--years", type=float, help="override the preset's history length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end", type=date.fromisoformat, help="last day of history (default today)")
+    parser.add_argument("--reset", action="store_true", help="empty the profile first")
+    args = parser.parse_args(argv)
+
+    scale = PRESETS[args.preset]
+    if args.assets is not None:
+        scale = replace(scale, assets=args.assets)
+    if args.years is not None:
+        scale = replace(scale, years=args.years)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    engine = profile_engine(args.profile)
+    started = time.monotonic()
+    try:
+        counts = generate(engine, scale, seed=args.seed, end=args.end, clear=args.reset)
+    except ValueError as e:
+        parser.error(str(e))
+    logger.info(f"Profile '{args.profile}' written in {time.monotonic() - started:.1f}s")
+    for table, n in counts.items():
+        logger.info(f"  {table:<22} {n:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 import logging
@@ -32,6 +32,18 @@ async def lifespan(app: FastAPI):
     from . import migrations as db_migrations
     db_migrations.run_migrations()
 
+    # Reads don't build lots, holding checkpoints or week buckets: catch up
+    # on whatever was written before this start.
+    from . import database
+    from .services import holdings_service, lot_service, snapshot_service
+    db = database.SessionLocal()
+    try:
+        lot_service.sync_lots(db)
+        holdings_service.ensure_checkpoints(db)
+        snapshot_service.backfill_weekly_rollups(db)
+    finally:
+        db.close()
+
     # Start background scheduler
     from . import scheduler as sched_module
     sched_module.start_scheduler()
@@ -65,6 +77,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Debug only: X-Query-Count header + N+1 warnings in the log.
+if os.getenv("QUERY_DEBUG", "").lower() in ("1", "true", "yes"):
+    from .observability.queries import QueryDebugMiddleware
+    app.add_middleware(QueryDebugMiddleware)
+
+# Opt-in: profiles requests carrying X-Profile-Token (see observability/profiling.py).
+if os.getenv("PROFILING_TOKEN"):
+    from .observability.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so latency covers the whole stack.
+from .observability import metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 from .routers import dashboard, assets, stats, goals, transactions, budgets, settings, system, integrations, income
 
 app.include_router(dashboard.router)
@@ -82,3 +108,9 @@ app.include_router(integrations.router)
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Personal Asset Dash API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
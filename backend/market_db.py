@@ -0,0 +1,114 @@
+"""Shared market-data database (``DATA_DIR/market.db``).
+
+Quotes, daily closes and FX rates are the same for every profile, so they
+live in one SQLite file next to the profile databases instead of being
+stored (and fetched) once per profile.  Profile databases keep holdings;
+``assets.current_price`` remains as each holding's last applied price.
+
+The file is a cache of upstream data: it has its own declarative base and
+engine, is created with ``create_all`` on first use and is not part of the
+profile backups — deleting it only costs a refetch.
+"""
+import threading
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+
+from . import profile_manager
+from .database import get_engine
+
+MARKET_DB_FILE = "market.db"
+
+Base = declarative_base()
+
+
+class Quote(Base):
+    """Last fetched price per (market, ticker); ``market`` is a market_calendar code."""
+    __tablename__ = "quotes"
+
+    market = Column(String, primary_key=True)
+    ticker = Column(String, primary_key=True)
+    price = Column(Float, nullable=False)
+    fetched_at = Column(DateTime, nullable=False, default=datetime.now)
+
+
+class QuoteFailure(Base):
+    """Consecutive failed fetches per (market, ticker) and when to try again."""
+    __tablename__ = "quote_failures"
+
+    market = Column(String, primary_key=True)
+    ticker = Column(String, primary_key=True)
+    failures = Column(Integer, nullable=False, default=1)
+    retry_at = Column(DateTime, nullable=False)
+
+
+class DailyClose(Base):
+    """Yahoo Finance daily close per symbol (FX pairs like USDTWD=X included)."""
+    __tablename__ = "daily_closes"
+
+    symbol = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)     # YYYY-MM-DD
+    close = Column(Float, nullable=False)
+
+
+class HistoryRange(Base):
+    """Window of ``daily_closes`` already fetched for a symbol, and when."""
+    __tablename__ = "history_ranges"
+
+    symbol = Column(String, primary_key=True)
+    first_date = Column(Date, nullable=False)
+    fetched_at = Column(DateTime, nullable=False)
+
+
+class FxRate(Base):
+    """Daily FX series: the latest rate seen each day per pair (e.g. ``USDT/TWD``)."""
+    __tablename__ = "fx_rates"
+
+    pair = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)     # YYYY-MM-DD
+    rate = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+
+_lock = threading.Lock()
+_engine = None
+_SessionLocal: sessionmaker | None = None
+
+
+def get_url() -> str:
+    return f"sqlite:///{profile_manager.DATA_DIR / MARKET_DB_FILE}"
+
+
+def _open(url: str | None) -> None:
+    global _engine, _SessionLocal
+    if _engine is not None:
+        _engine.dispose()
+    _engine = get_engine(url or get_url())
+    Base.metadata.create_all(_engine)
+    _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+
+
+def configure(url: str | None = None) -> None:
+    """(Re)open the market database at ``url`` (default ``DATA_DIR/market.db``)."""
+    with _lock:
+        _open(url)
+
+
+def dispose() -> None:
+    global _engine, _SessionLocal
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine, _SessionLocal = None, None
+
+
+def session() -> Session:
+    """New session on the market database, opening it on first use."""
+    factory = _SessionLocal
+    if factory is None:
+        with _lock:
+            if _SessionLocal is None:
+                _open(None)
+            factory = _SessionLocal
+    return factory()
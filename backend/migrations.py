@@ -1,7 +1,8 @@
 """Programmatic Alembic migration runner.
 
 Call ``run_migrations()`` at startup (and after a profile switch) to apply
-any pending schema migrations against the current profile's database.
+any pending schema migrations against the current profile's database, or
+pass ``db_url`` to upgrade another profile's database.
 """
 import logging
 import os
@@ -14,8 +15,10 @@ logger = logging.getLogger(__name__)
 _ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "alembic.ini")
 
 
-def run_migrations() -> None:
-    """Upgrade the current profile's database to the latest Alembic revision."""
+def run_migrations(db_url: str | None = None) -> None:
+    """Upgrade ``db_url`` (default: the current profile's database) to the latest Alembic revision."""
     cfg = Config(_ALEMBIC_INI)
+    if db_url:
+        cfg.attributes["db_url"] = db_url
     alembic_command.upgrade(cfg, "head")
-    logger.info("Database migrations applied (alembic upgrade head).")
+    logger.info(f"Database migrations applied (alembic upgrade head){f' to {db_url}' if db_url else ''}.")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -47,6 +47,14 @@ class Asset(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Serves every per-asset lookup through its prefixes: joinedload and
+        # lot-sync seeks (asset_id), ledger pages in (date, rowid) order, and
+        # date-ordered replays and quantity/cost sums without touching the table.
+        Index("ix_transactions_asset_id_date_covering", "asset_id", "date", "amount", "buy_price"),
+        # Date-bounded scans across all assets (ledger paging, month tails).
+        Index("ix_transactions_date", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey("assets.id"))
@@ -119,9 +127,159 @@ class SystemSetting(Base):
 class NetWorthHistory(Base):
     """Daily net worth snapshots for fast historical queries."""
     __tablename__ = "net_worth_history"
+    __table_args__ = (
+        # Covers the date-range value scans (risk state rebuild, forecast).
+        Index("ix_net_worth_history_date_value", "date", "value"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(String, unique=True, index=True)  # YYYY-MM-DD
     value = Column(Float)
     breakdown = Column(String, nullable=True)   # JSON: {"Fluid": 100, "Stock": 200, ...}
     created_at = Column(DateTime, default=datetime.now)
+
+
+class Lot(Base):
+    """Open (or fully closed) tax lot produced by lot_service.
+
+    In average-cost mode each asset has a single pooled lot.  Costs are in the
+    asset's native currency, like Transaction.buy_price.
+    """
+    __tablename__ = "lots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"), index=True)
+    transaction_id = Column(Integer, nullable=True)  # opening transaction
+    opened_at = Column(DateTime)
+    quantity = Column(Float)      # quantity acquired
+    remaining = Column(Float)     # quantity still open
+    unit_cost = Column(Float)
+
+
+class RealizedGain(Base):
+    """Realized P&L of one disposal (sell) matched against open lots."""
+    __tablename__ = "realized_gains"
+    __table_args__ = (
+        Index("ix_realized_gains_asset_id_closed_at", "asset_id", "closed_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"))
+    transaction_id = Column(Integer)  # closing transaction
+    closed_at = Column(DateTime)
+    quantity = Column(Float)
+    proceeds = Column(Float)
+    cost_basis = Column(Float)
+    gain = Column(Float)          # native currency
+
+
+class LotCheckpoint(Base):
+    """Last transaction folded into an asset's lots; newer ones are applied incrementally."""
+    __tablename__ = "lot_checkpoints"
+
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    method = Column(String)       # "fifo" | "average"
+    last_transaction_id = Column(Integer)
+    last_date = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.now)
+
+
+class HoldingCheckpoint(Base):
+    """Cumulative quantity/cost per asset at the end of each month with activity.
+
+    Written for completed months only; see holdings_service.
+    """
+    __tablename__ = "holding_checkpoints"
+    __table_args__ = (
+        Index("ix_holding_checkpoints_asset_id_month", "asset_id", "month", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"))
+    month = Column(String)        # YYYY-MM
+    quantity = Column(Float)      # cumulative through the end of ``month``
+    cost = Column(Float)          # cumulative Σ amount × buy_price (native currency)
+    tx_count = Column(Integer)
+
+
+class RiskMetricState(Base):
+    """Running risk statistics over NetWorthHistory (single row, id=1).
+
+    Aggregates (peak, drawdown, Welford mean/M2 of daily returns) cover every
+    snapshot before ``last_date``.  The ``last_date`` value is held separately
+    because today's snapshot is rewritten on every price run.
+    """
+    __tablename__ = "risk_metric_state"
+
+    id = Column(Integer, primary_key=True)
+    first_date = Column(String, nullable=True)   # first positive snapshot
+    first_value = Column(Float, nullable=True)
+    prev_date = Column(String, nullable=True)    # latest positive snapshot before last_date
+    prev_value = Column(Float, nullable=True)
+    peak = Column(Float, default=0.0)
+    max_drawdown = Column(Float, default=0.0)    # fraction, 0–1
+    n_returns = Column(Integer, default=0)
+    mean_return = Column(Float, default=0.0)
+    m2_return = Column(Float, default=0.0)
+    last_date = Column(String, nullable=True)
+    last_value = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=datetime.now)
+
+
+class AssetValueHistory(Base):
+    """Per-asset daily value, written in bulk alongside each NetWorthHistory snapshot."""
+    __tablename__ = "asset_value_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"))
+    date = Column(String)        # YYYY-MM-DD
+    quantity = Column(Float)
+    price = Column(Float)        # TWD per unit
+    value_twd = Column(Float)
+
+    __table_args__ = (
+        Index("ix_asset_value_history_asset_id_date", "asset_id", "date", unique=True),
+    )
+
+
+class NetWorthIntraday(Base):
+    """Raw intraday net worth captures, taken on price runs (hourly by default)."""
+    __tablename__ = "net_worth_intraday"
+
+    id = Column(Integer, primary_key=True, index=True)
+    captured_at = Column(DateTime, unique=True, index=True)
+    value = Column(Float)
+    breakdown = Column(String, nullable=True)   # JSON, same shape as NetWorthHistory
+
+
+class NetWorthRollup(Base):
+    """Downsampled net worth buckets: "hour" (from intraday) and "week" (from daily)."""
+    __tablename__ = "net_worth_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    resolution = Column(String)                 # "hour" | "week"
+    bucket = Column(String)                     # "YYYY-MM-DD HH:00" | week-start "YYYY-MM-DD"
+    value = Column(Float)                       # last value in the bucket
+    low = Column(Float)
+    high = Column(Float)
+    breakdown = Column(String, nullable=True)   # breakdown of the last value
+
+    __table_args__ = (
+        Index("ix_net_worth_rollups_resolution_bucket", "resolution", "bucket", unique=True),
+    )
+
+
+class JobRun(Base):
+    """One execution of a background scheduler job (timing + outcome)."""
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String)                   # e.g. "price_update", "wallet_sync"
+    started_at = Column(DateTime, default=datetime.now)
+    duration_ms = Column(Float)
+    status = Column(String)                     # "success" | "failure" | "skipped"
+    error = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_runs_job_name_started_at", "job_name", "started_at"),
+    )
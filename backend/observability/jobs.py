@@ -0,0 +1,162 @@
+"""Execution telemetry and overlap protection for background jobs.
+
+Every scheduler job (and manually triggered sync) runs through
+``run_tracked``, which:
+
+* holds a per-job non-blocking lock — a run that starts while the previous
+  one is still in progress is skipped and recorded as ``"skipped"`` instead
+  of piling up behind it;
+* times the run and records its outcome in an in-memory ring buffer (used
+  for latency percentiles) and in the ``job_runs`` table (survives restarts);
+* attributes the SQL it executes to the job in ``/metrics``;
+* samples the run once when armed via ``profiling.arm_job``.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from functools import wraps
+
+from sqlalchemy import func
+
+from .. import database, models
+from ..utils.math import percentile
+from . import memory, metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+RING_BUFFER_SIZE = 200
+JOB_RUN_RETENTION_DAYS = 30
+
+_runs: dict[str, deque] = defaultdict(lambda: deque(maxlen=RING_BUFFER_SIZE))
+_locks: dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+memory.register_cache("jobs.recent_runs", lambda: sum(len(d) for d in list(_runs.values())))
+
+
+class JobAlreadyRunning(RuntimeError):
+    """Raised by ``run_tracked(..., raise_on_overlap=True)`` when the job is busy."""
+
+
+def _lock_for(name: str) -> threading.Lock:
+    with _registry_lock:
+        if name not in _locks:
+            _locks[name] = threading.Lock()
+        return _locks[name]
+
+
+def is_running(name: str) -> bool:
+    lock = _locks.get(name)
+    return bool(lock and lock.locked())
+
+
+def _record(name: str, started_at: datetime, duration_ms: float, status: str, error: str | None) -> None:
+    _runs[name].append({
+        "started_at":  started_at,
+        "duration_ms": duration_ms,
+        "status":      status,
+        "error":       error,
+    })
+
+    db = database.SessionLocal()
+    try:
+        db.add(models.JobRun(
+            job_name=name, started_at=started_at,
+            duration_ms=round(duration_ms, 3), status=status, error=error,
+        ))
+        cutoff = datetime.now() - timedelta(days=JOB_RUN_RETENTION_DAYS)
+        db.query(models.JobRun).filter(
+            models.JobRun.job_name == name,
+            models.JobRun.started_at < cutoff,
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to persist job run for {name}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def run_tracked(name: str, fn, *args, raise_on_overlap: bool = False, **kwargs):
+    """Run ``fn`` under the job's lock, recording duration and outcome.
+
+    Exceptions from ``fn`` are recorded and re-raised.  An overlapping run is
+    recorded as skipped and returns None (or raises JobAlreadyRunning).
+    """
+    lock = _lock_for(name)
+    started_at = datetime.now()
+    if not lock.acquire(blocking=False):
+        logger.warning(f"Job {name} skipped: previous run still in progress")
+        _record(name, started_at, 0.0, "skipped", "previous run still in progress")
+        if raise_on_overlap:
+            raise JobAlreadyRunning(name)
+        return None
+
+    t0 = time.perf_counter()
+    try:
+        with metrics.track_job(name), profiling.job_profiler(name):
+            result = fn(*args, **kwargs)
+    except Exception as e:
+        _record(name, started_at, (time.perf_counter() - t0) * 1000, "failure", str(e)[:500])
+        raise
+    else:
+        _record(name, started_at, (time.perf_counter() - t0) * 1000, "success", None)
+        return result
+    finally:
+        lock.release()
+
+
+def tracked_job(name: str):
+    """Decorator for scheduler entry points: track the run and log (not raise) errors."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return run_tracked(name, fn, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"Error in scheduled job {name}: {e}")
+                return None
+        return wrapper
+    return decorator
+
+
+def job_stats(db) -> list[dict]:
+    """Per-job summary: latency percentiles (ring buffer) + persisted counters."""
+    rows = (
+        db.query(
+            models.JobRun.job_name,
+            models.JobRun.status,
+            func.count(models.JobRun.id),
+            func.max(models.JobRun.started_at),
+        )
+        .group_by(models.JobRun.job_name, models.JobRun.status)
+        .all()
+    )
+    persisted: dict[str, dict] = defaultdict(dict)
+    for job_name, status, count, last_at in rows:
+        persisted[job_name][status] = (count, last_at)
+
+    stats = []
+    for name in sorted(set(persisted) | set(_runs)):
+        recent = list(_runs.get(name, ()))
+        durations = [r["duration_ms"] for r in recent if r["status"] != "skipped"]
+        by_status = persisted.get(name, {})
+        success_count, last_success = by_status.get("success", (0, None))
+        failure_count, last_failure = by_status.get("failure", (0, None))
+        skipped_count, _ = by_status.get("skipped", (0, None))
+        stats.append({
+            "job":             name,
+            "running":         is_running(name),
+            "recent_runs":     len(recent),
+            "p50_ms":          round(percentile(durations, 50), 1),
+            "p95_ms":          round(percentile(durations, 95), 1),
+            "last_status":     recent[-1]["status"] if recent else None,
+            "last_error":      next((r["error"] for r in reversed(recent) if r["status"] == "failure"), None),
+            "last_success_at": last_success,
+            "last_failure_at": last_failure,
+            "success_count":   success_count,
+            "failure_count":   failure_count,
+            "skipped_count":   skipped_count,
+        })
+    return stats
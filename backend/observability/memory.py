@@ -0,0 +1,215 @@
+"""Memory diagnostics for a long-running process.
+
+Three views, served under ``/api/system/memory`` (admin token required):
+
+* ``tracemalloc`` control — start/stop tracing, take named snapshots and
+  diff two of them to find the file:line sites whose allocations grew.
+  Tracing slows allocation-heavy code noticeably, so it is off until
+  started and snapshots are capped at ``MAX_SNAPSHOTS``.
+* ORM identity maps — every live ``Session`` (SQLAlchemy keeps a weak
+  registry in ``sqlalchemy.orm.session._sessions``) with its identity-map,
+  new and dirty counts.  A session that is never closed, or one that keeps
+  loading rows, shows up here.
+* Module-level caches — modules that keep state for the life of the process
+  call ``register_cache(name, size_fn)``; ``cache_sizes()`` reports each
+  one's current entry count.
+"""
+import gc
+import logging
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy.orm import session as orm_session
+
+logger = logging.getLogger(__name__)
+
+MAX_SNAPSHOTS = 10
+DEFAULT_FRAMES = 1
+GROUP_BY = ("lineno", "filename", "traceback")
+
+# Allocations made by tracemalloc itself and the import machinery are noise.
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_lock = threading.Lock()
+_snapshots: "OrderedDict[str, tuple[datetime, tracemalloc.Snapshot]]" = OrderedDict()
+_caches: dict[str, Callable[[], int]] = {}
+
+
+class TracingNotStarted(RuntimeError):
+    """Raised when a snapshot is requested while tracemalloc is off."""
+
+
+# ── Cache registry ────────────────────────────────────────────────────────────
+
+def register_cache(name: str, size_fn: Callable[[], int]) -> None:
+    """Report ``size_fn()`` (entries held) as cache ``name`` in ``cache_sizes``."""
+    _caches[name] = size_fn
+
+
+def cache_sizes() -> dict[str, int | None]:
+    sizes = {}
+    for name, size_fn in sorted(_caches.items()):
+        try:
+            sizes[name] = int(size_fn())
+        except Exception as e:
+            logger.warning(f"Cache size for {name} failed: {e}")
+            sizes[name] = None
+    return sizes
+
+
+register_cache("memory.snapshots", lambda: len(_snapshots))
+
+
+# ── Identity maps ─────────────────────────────────────────────────────────────
+
+def identity_maps(top: int = 10) -> dict:
+    """Live ORM sessions, largest identity maps first."""
+    sessions = []
+    for session in list(orm_session._sessions.values()):
+        try:
+            sessions.append({
+                "hash_key": session.hash_key,
+                "identity_map": len(session.identity_map),
+                "new":   len(session.new),
+                "dirty": len(session.dirty),
+                "bind":  str(session.bind.url) if session.bind is not None else None,
+            })
+        except Exception:
+            continue    # session closed or torn down mid-iteration
+    sessions.sort(key=lambda s: s["identity_map"], reverse=True)
+    return {
+        "live_sessions": len(sessions),
+        "total_identities": sum(s["identity_map"] for s in sessions),
+        "largest": sessions[:top],
+    }
+
+
+# ── Process ───────────────────────────────────────────────────────────────────
+
+def rss_bytes() -> int | None:
+    """Resident set size from /proc (Linux); None elsewhere."""
+    try:
+        with open(f"/proc/{os.getpid()}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def overview() -> dict:
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (None, None)
+    return {
+        "rss_bytes": rss_bytes(),
+        "gc_objects": len(gc.get_objects()),
+        "gc_counts": gc.get_count(),
+        "tracemalloc": {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "snapshots": list_snapshots(),
+        },
+        "identity_maps": identity_maps(),
+        "caches": cache_sizes(),
+    }
+
+
+# ── tracemalloc ───────────────────────────────────────────────────────────────
+
+def start(frames: int = DEFAULT_FRAMES) -> None:
+    """Start tracing with ``frames`` of traceback per allocation (no-op if already on)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.info(f"tracemalloc started ({frames} frame(s))")
+
+
+def stop() -> None:
+    """Stop tracing and drop every snapshot."""
+    with _lock:
+        _snapshots.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("tracemalloc stopped")
+
+
+def take_snapshot(name: str) -> dict:
+    """Store a snapshot under ``name`` (replacing one of that name); evicts the oldest beyond the cap."""
+    if not tracemalloc.is_tracing():
+        raise TracingNotStarted("tracemalloc is not running; start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    taken_at = datetime.now()
+    with _lock:
+        _snapshots.pop(name, None)
+        _snapshots[name] = (taken_at, snapshot)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return _describe(name, taken_at, snapshot)
+
+
+def _describe(name: str, taken_at: datetime, snapshot: tracemalloc.Snapshot) -> dict:
+    stats = snapshot.statistics("filename")
+    return {
+        "name": name,
+        "taken_at": taken_at,
+        "traced_bytes": sum(s.size for s in stats),
+        "blocks": sum(s.count for s in stats),
+    }
+
+
+def list_snapshots() -> list[dict]:
+    with _lock:
+        items = list(_snapshots.items())
+    return [_describe(name, taken_at, snap) for name, (taken_at, snap) in items]
+
+
+def delete_snapshot(name: str) -> bool:
+    with _lock:
+        return _snapshots.pop(name, None) is not None
+
+
+def diff(base: str, target: str | None = None, group_by: str = "lineno", limit: int = 25) -> dict:
+    """Top allocation growth from snapshot ``base`` to ``target`` (a fresh snapshot if None).
+
+    Raises KeyError for an unknown snapshot name and TracingNotStarted when
+    ``target`` is None and tracing is off.
+    """
+    with _lock:
+        base_snap = _snapshots[base][1]
+        target_snap = _snapshots[target][1] if target is not None else None
+    if target_snap is None:
+        if not tracemalloc.is_tracing():
+            raise TracingNotStarted("tracemalloc is not running; start it first")
+        target_snap = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    stats = sorted(target_snap.compare_to(base_snap, group_by), key=lambda s: s.size_diff, reverse=True)
+    top = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        top.append({
+            "file": frame.filename,
+            "line": frame.lineno if group_by != "filename" else None,
+            "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback] if group_by == "traceback" else None,
+            "size_diff_bytes": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size_bytes": stat.size,
+            "count": stat.count,
+        })
+    return {
+        "base": base,
+        "target": target or "now",
+        "group_by": group_by,
+        "total_size_diff_bytes": sum(s.size_diff for s in stats),
+        "top": top,
+    }
@@ -0,0 +1,236 @@
+"""Request and database metrics in Prometheus text format.
+
+``MetricsMiddleware`` is a pure ASGI middleware (no BaseHTTPMiddleware
+task/queue overhead) that records per-route latency, response size and
+in-flight requests.  Routes are labelled by their path template
+(``/api/assets/{asset_id}``), never the raw path, so cardinality stays
+bounded; unmatched paths share the ``unmatched`` label.
+
+SQLAlchemy ``before/after_cursor_execute`` hooks on the ``Engine`` class
+(so they survive ``database.reconnect``) count statements and time spent
+in the driver.  The running total lives in a context variable set by the
+middleware for each request and by ``observability.jobs.run_tracked`` for
+each scheduler job; sync endpoints run in the threadpool with a copy of
+the context, so their queries land on the request's tally.
+
+``render()`` produces the ``/metrics`` payload.  Everything is in-memory
+and per-process; a restart resets the counters, as Prometheus expects.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import memory
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_lock = threading.Lock()
+
+
+class _Tally:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_tally: ContextVar[_Tally | None] = ContextVar("db_tally", default=None)
+
+
+# ── Metric types ──────────────────────────────────────────────────────────────
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {value:g}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple, buckets: tuple):
+        self.name, self.help, self.label_names, self.buckets = name, help, labels, buckets
+        self.values: dict[tuple, list] = {}   # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels: tuple, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with _lock:
+            row = self.values.get(labels)
+            if row is None:
+                row = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def samples(self):
+        for labels, row in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row):
+                cumulative += count
+                le = f'le="{bound:g}"' if bound != "+Inf" else 'le="+Inf"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {row[-1]:g}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+ROUTE = ("method", "route")
+
+requests_total = Counter("http_requests_total", "HTTP requests by route and status.", ROUTE + ("status",))
+request_seconds = Histogram("http_request_duration_seconds", "Request latency until the response is sent.",
+                            ROUTE, LATENCY_BUCKETS)
+response_bytes = Histogram("http_response_size_bytes", "Response body size.", ROUTE, SIZE_BUCKETS)
+in_flight = Gauge("http_requests_in_flight", "Requests currently being served.")
+request_db_statements = Histogram("http_request_db_statements", "SQL statements executed per request.",
+                                  ROUTE, STATEMENT_BUCKETS)
+request_db_seconds = Histogram("http_request_db_seconds", "Time spent executing SQL per request.",
+                               ROUTE, LATENCY_BUCKETS)
+job_db_statements = Counter("job_db_statements_total", "SQL statements executed by scheduler jobs.", ("job",))
+job_db_seconds = Counter("job_db_seconds_total", "Time scheduler jobs spent executing SQL.", ("job",))
+db_statements = Counter("db_statements_total", "SQL statements by source (http, job, other).", ("source",))
+db_seconds = Counter("db_seconds_total", "Time spent executing SQL by source (http, job, other).", ("source",))
+
+REGISTRY = [
+    requests_total, request_seconds, response_bytes, in_flight,
+    request_db_statements, request_db_seconds,
+    job_db_statements, job_db_seconds, db_statements, db_seconds,
+]
+
+
+memory.register_cache("metrics.series", lambda: sum(len(m.values) for m in list(REGISTRY)))
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    with _lock:
+        for metric in REGISTRY:
+            metric.values.clear()
+
+
+# ── SQLAlchemy hooks ──────────────────────────────────────────────────────────
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_t0"].pop()
+    tally = _tally.get()
+    if tally is not None:
+        tally.statements += 1
+        tally.seconds += elapsed
+    else:
+        db_statements.inc(("other",))
+        db_seconds.inc(("other",), elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(context):
+    # after_cursor_execute does not fire for a failed statement.
+    if context.connection is not None:
+        stack = context.connection.info.get("metrics_t0")
+        if stack:
+            stack.pop()
+
+
+@contextmanager
+def track_job(name: str):
+    """Attribute SQL executed in this block to scheduler job ``name``."""
+    tally = _Tally()
+    token = _tally.set(tally)
+    try:
+        yield
+    finally:
+        _tally.reset(token)
+        job_db_statements.inc((name,), tally.statements)
+        job_db_seconds.inc((name,), tally.seconds)
+        db_statements.inc(("job",), tally.statements)
+        db_seconds.inc(("job",), tally.seconds)
+
+
+# ── ASGI middleware ───────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        tally = _Tally()
+        token = _tally.set(tally)
+        in_flight.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            in_flight.dec()
+            _tally.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", None) or "unmatched")
+            requests_total.inc(labels + (str(status),))
+            request_seconds.observe(labels, elapsed)
+            response_bytes.observe(labels, size)
+            request_db_statements.observe(labels, tally.statements)
+            request_db_seconds.observe(labels, tally.seconds)
+            db_statements.inc(("http",), tally.statements)
+            db_seconds.inc(("http",), tally.seconds)
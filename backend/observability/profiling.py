@@ -0,0 +1,301 @@
+"""On-demand sampling profiler for single requests and scheduler jobs.
+
+Off unless ``PROFILING_TOKEN`` is set; without it ``ProfilingMiddleware``
+is not installed and jobs skip a single set lookup, so the cost is nil.
+
+With the token set, a request carrying ``X-Profile-Token: <token>`` (or
+``?profile_token=<token>``) is profiled: a background thread samples every
+thread's Python stack with ``sys._current_frames()`` every
+``SAMPLE_INTERVAL`` seconds until the response has been sent.  Idle samples
+(threads parked in a lock, queue or selector wait) are dropped, so what
+remains is the request's handler thread, the event loop serializing the
+response, and any job that happened to run alongside.  Each thread becomes
+its own root frame / speedscope profile.
+
+``arm_job(name)`` profiles the next run of tracked job ``name``
+(observability/jobs.run_tracked).
+
+Output goes to ``DATA_DIR/profiles/`` as speedscope JSON (default; open at
+https://www.speedscope.app) or collapsed stacks (``X-Profile-Format:
+collapsed``; feed to flamegraph.pl / inferno).  Only the newest
+``MAX_PROFILES`` files are kept.
+"""
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+
+from .. import profile_manager
+
+logger = logging.getLogger(__name__)
+
+TOKEN_ENV = "PROFILING_TOKEN"
+TOKEN_HEADER = b"x-profile-token"
+FORMAT_HEADER = b"x-profile-format"
+TOKEN_PARAM = "profile_token"
+FILE_HEADER = b"x-profile-file"
+SPEEDSCOPE = "speedscope"
+COLLAPSED = "collapsed"
+EXTENSIONS = {SPEEDSCOPE: ".speedscope.json", COLLAPSED: ".collapsed.txt"}
+SAMPLE_INTERVAL = 0.002
+MAX_PROFILES = 50
+# Requests to these paths are never profiled (downloading a profile would profile itself).
+EXCLUDED_PREFIX = "/api/system/profiling"
+
+# Leaf frames of a thread that is blocked waiting, not working.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+_armed_jobs: set[str] = set()
+
+
+def token() -> str | None:
+    return os.getenv(TOKEN_ENV) or None
+
+
+def check_token(candidate: str | None) -> bool:
+    expected = token()
+    return bool(expected and candidate) and hmac.compare_digest(candidate.encode(), expected.encode())
+
+
+def profiles_dir() -> Path:
+    path = profile_manager.DATA_DIR / "profiles"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# ── Sampler ───────────────────────────────────────────────────────────────────
+
+_REPO_ROOT = str(Path(__file__).resolve().parents[2]) + os.sep
+_SITE_PACKAGES = "site-packages" + os.sep
+
+
+def _frame_label(code) -> tuple[str, str, int]:
+    filename = code.co_filename
+    if filename.startswith(_REPO_ROOT):
+        filename = filename[len(_REPO_ROOT):]
+    elif _SITE_PACKAGES in filename:
+        filename = filename.rsplit(_SITE_PACKAGES, 1)[1]
+    return code.co_name, filename, code.co_firstlineno
+
+
+class Sampler:
+    """Wall-clock stack sampler over all threads but its own."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()    # (thread name, (frame, ...root→leaf)) -> count
+        self.started_at: float | None = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _is_idle(self, frame) -> bool:
+        return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (not self.include_idle and self._is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.samples[(names.get(ident, str(ident)), tuple(reversed(stack)))] += 1
+
+    def start(self) -> "Sampler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    # ── Output ────────────────────────────────────────────────────────────────
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format: ``thread;root;...;leaf count`` per line."""
+        lines = []
+        for (thread, stack), count in sorted(self.samples.items()):
+            frames = ";".join(f"{name} ({file}:{line})" for name, file, line in stack)
+            lines.append(f"{thread};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, title: str) -> dict:
+        frames: list[dict] = []
+        index: dict[tuple, int] = {}
+        by_thread: dict[str, tuple[list, list]] = {}
+        for (thread, stack), count in sorted(self.samples.items()):
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                ids.append(index[frame])
+            samples, weights = by_thread.setdefault(thread, ([], []))
+            samples.append(ids)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": title,
+            "exporter": "yantage",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled", "name": thread, "unit": "seconds",
+                    "startValue": 0, "endValue": round(sum(weights), 6),
+                    "samples": samples, "weights": weights,
+                }
+                for thread, (samples, weights) in by_thread.items()
+            ],
+        }
+
+
+# ── Files ─────────────────────────────────────────────────────────────────────
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def new_path(title: str, fmt: str = SPEEDSCOPE) -> Path:
+    slug = _UNSAFE.sub("_", title).strip("_")[:80] or "profile"
+    return profiles_dir() / f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{slug}{EXTENSIONS[fmt]}"
+
+
+def save(sampler: Sampler, path: Path, title: str, fmt: str = SPEEDSCOPE) -> Path:
+    """Write ``sampler``'s profile to ``path`` and prune old files."""
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == COLLAPSED:
+        tmp.write_text(sampler.collapsed())
+    else:
+        tmp.write_text(json.dumps(sampler.speedscope(title)))
+    os.replace(tmp, path)
+    logger.info(f"Saved profile {path.name} ({sum(sampler.samples.values())} samples, {sampler.duration:.3f}s)")
+    for old in list_profiles()[MAX_PROFILES:]:
+        (profiles_dir() / old["name"]).unlink(missing_ok=True)
+    return path
+
+
+def list_profiles() -> list[dict]:
+    """Saved profiles, newest first."""
+    entries = []
+    for path in profiles_dir().iterdir():
+        if path.name.endswith(tuple(EXTENSIONS.values())):
+            stat = path.stat()
+            entries.append({
+                "name": path.name,
+                "size_bytes": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime),
+            })
+    return sorted(entries, key=lambda e: e["name"], reverse=True)
+
+
+def profile_path(name: str) -> Path | None:
+    """Resolve a listed profile by file name; None for anything else."""
+    if "/" in name or "\\" in name or not name.endswith(tuple(EXTENSIONS.values())):
+        return None
+    path = profiles_dir() / name
+    return path if path.is_file() else None
+
+
+@contextmanager
+def profile(title: str, fmt: str = SPEEDSCOPE):
+    """Sample the block and save the result; yields the output path."""
+    path = new_path(title, fmt)
+    sampler = Sampler().start()
+    try:
+        yield path
+    finally:
+        sampler.stop()
+        try:
+            save(sampler, path, title, fmt)
+        except OSError as e:
+            logger.error(f"Failed to save profile {title}: {e}")
+
+
+# ── Jobs ──────────────────────────────────────────────────────────────────────
+
+def arm_job(name: str) -> None:
+    _armed_jobs.add(name)
+
+
+def job_profiler(name: str):
+    """Context manager for a job run: profiles it once if armed, else a no-op."""
+    if name in _armed_jobs:
+        _armed_jobs.discard(name)
+        return profile(f"job_{name}")
+    return _noop()
+
+
+@contextmanager
+def _noop():
+    yield
+
+
+# ── ASGI middleware ───────────────────────────────────────────────────────────
+
+def _requested(scope) -> tuple[bool, str]:
+    headers = dict(scope.get("headers") or ())
+    candidate = headers.get(TOKEN_HEADER, b"").decode("latin-1") or None
+    if candidate is None and TOKEN_PARAM.encode() in scope.get("query_string", b""):
+        candidate = parse_qs(scope["query_string"].decode("latin-1")).get(TOKEN_PARAM, [None])[0]
+    fmt = headers.get(FORMAT_HEADER, b"").decode("latin-1")
+    return check_token(candidate), fmt if fmt in EXTENSIONS else SPEEDSCOPE
+
+
+class ProfilingMiddleware:
+    """Profiles requests carrying the admin token.  Only installed when PROFILING_TOKEN is set."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PREFIX):
+            return await self.app(scope, receive, send)
+        enabled, fmt = _requested(scope)
+        if not enabled:
+            return await self.app(scope, receive, send)
+
+        path = new_path(f"{scope['method']} {scope['path']}", fmt)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((FILE_HEADER, path.name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = Sampler().start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            route = getattr(scope.get("route"), "path", scope["path"])
+            try:
+                await run_in_threadpool(save, sampler, path, f"{scope['method']} {route}", fmt)
+            except OSError as e:
+                logger.error(f"Failed to save profile for {route}: {e}")
@@ -0,0 +1,105 @@
+"""Per-request SQL capture and N+1 detection.
+
+``capture()`` records every statement executed in the current context
+(including sync endpoints running in the threadpool, which inherit it) into
+a ``QueryLog``.  Statements are reduced to a *shape* — whitespace collapsed,
+``IN (?, ?, ?)`` lists folded, numeric literals replaced — so the same
+query with different parameters counts as a repeat.  A shape executed
+``N_PLUS_ONE_THRESHOLD`` or more times in one request is almost always a
+lazy load or a query inside a loop.
+
+``QueryDebugMiddleware`` wraps each request in ``capture()``, adds an
+``X-Query-Count`` response header and logs a warning for repeated shapes.
+It is enabled with ``QUERY_DEBUG=1``; tests use ``capture()`` directly to
+hold endpoints to a query budget (tests/test_queries.py).
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+N_PLUS_ONE_THRESHOLD = 5
+HEADER = b"x-query-count"
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def shape(statement: str) -> str:
+    s = _WHITESPACE.sub(" ", statement).strip()
+    s = _IN_LIST.sub("(?)", s)
+    return _NUMBER.sub("?", s)
+
+
+class QueryLog:
+    def __init__(self, parent: "QueryLog | None" = None):
+        self.statements: list[str] = []
+        self.parent = parent     # enclosing capture, which sees these statements too
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict[str, int]:
+        """{shape: executions} for shapes run at least ``threshold`` times."""
+        counts = Counter(shape(s) for s in self.statements)
+        return {s: n for s, n in counts.most_common() if n >= threshold}
+
+
+_current: ContextVar[QueryLog | None] = ContextVar("query_log", default=None)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record(conn, cursor, statement, parameters, context, executemany):
+    log = _current.get()
+    while log is not None:
+        log.statements.append(statement)
+        log = log.parent
+
+
+@contextmanager
+def capture():
+    """Collect the statements executed in this block into a ``QueryLog``.
+
+    Captures nest: an enclosing capture also records the inner block.
+    """
+    log = QueryLog(_current.get())
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+
+class QueryDebugMiddleware:
+    def __init__(self, app, threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with capture() as log:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((HEADER, str(log.count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        route = getattr(scope.get("route"), "path", scope["path"])
+        for stmt, n in log.repeated(self.threshold).items():
+            logger.warning(f"Possible N+1 in {scope['method']} {route}: {n}x {stmt[:200]}")
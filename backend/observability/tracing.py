@@ -0,0 +1,137 @@
+"""Timing spans around outbound calls (Yahoo, exchanges, MAX FX, Web3 RPC).
+
+Wrap each call to an external service in ``span``::
+
+    with tracing.span("pionex", "balances") as s:
+        resp = requests.get(url, ...)
+        s.response(resp)          # payload size; HTTP >= 400 counts as an error
+
+A span records duration, outcome (``ok`` / ``error`` — an exception
+escaping the block is an error and is re-raised) and, when known, payload
+size in bytes.  Calls slower than ``SLOW_CALL_MS`` (env, default 2000) are
+logged with their target.
+
+Per (dependency, operation) aggregates feed ``/metrics``
+(``outbound_call_duration_seconds``, ``outbound_calls_total``,
+``outbound_response_bytes_total``).  A ring buffer of recent durations backs
+the percentiles and error rates returned by ``dependency_stats`` (served at
+``/api/system/dependencies``).  The target (ticker, URL path) goes to logs
+only, never to metric labels, to keep cardinality bounded.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from ..utils.math import percentile
+from . import memory, metrics
+
+logger = logging.getLogger(__name__)
+
+RING_BUFFER_SIZE = 500
+OK, ERROR = "ok", "error"
+
+_lock = threading.Lock()
+_recent: dict[tuple[str, str], deque] = defaultdict(lambda: deque(maxlen=RING_BUFFER_SIZE))
+_last_error: dict[tuple[str, str], str] = {}
+memory.register_cache("tracing.recent_calls", lambda: sum(len(d) for d in list(_recent.values())))
+
+DEP = ("dependency", "operation")
+call_seconds = metrics.Histogram("outbound_call_duration_seconds", "Outbound call latency by dependency.",
+                                 DEP, metrics.LATENCY_BUCKETS)
+calls_total = metrics.Counter("outbound_calls_total", "Outbound calls by dependency and outcome.",
+                              DEP + ("outcome",))
+response_bytes = metrics.Counter("outbound_response_bytes_total", "Payload bytes received from dependencies.", DEP)
+metrics.REGISTRY.extend([call_seconds, calls_total, response_bytes])
+
+
+def slow_call_ms() -> float:
+    return float(os.getenv("SLOW_CALL_MS", "2000"))
+
+
+class Span:
+    __slots__ = ("dependency", "operation", "target", "outcome", "size", "error")
+
+    def __init__(self, dependency: str, operation: str, target: str | None):
+        self.dependency, self.operation, self.target = dependency, operation, target
+        self.outcome = OK
+        self.size: int | None = None
+        self.error: str | None = None
+
+    def fail(self, reason: str) -> None:
+        """Mark the call failed without raising (e.g. an error status or empty result)."""
+        self.outcome, self.error = ERROR, reason
+
+    def response(self, resp) -> None:
+        """Take size and outcome from a ``requests.Response``."""
+        self.size = len(resp.content or b"")
+        if resp.status_code >= 400:
+            self.fail(f"HTTP {resp.status_code}")
+
+
+def _finish(s: Span, seconds: float) -> None:
+    key = (s.dependency, s.operation)
+    with _lock:
+        _recent[key].append((seconds * 1000, s.outcome))
+        if s.error:
+            _last_error[key] = s.error[:300]
+    call_seconds.observe(key, seconds)
+    calls_total.inc(key + (s.outcome,))
+    if s.size:
+        response_bytes.inc(key, s.size)
+    if seconds * 1000 >= slow_call_ms():
+        logger.warning(
+            f"Slow outbound call {s.dependency}.{s.operation}"
+            f"{f' [{s.target}]' if s.target else ''}: {seconds * 1000:.0f} ms ({s.outcome})"
+        )
+
+
+@contextmanager
+def span(dependency: str, operation: str, target: str | None = None):
+    s = Span(dependency, operation, target)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.fail(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _finish(s, time.perf_counter() - t0)
+
+
+def frame_bytes(frame) -> int | None:
+    """In-memory size of a pandas result, as a stand-in for payload size."""
+    try:
+        return int(frame.memory_usage(deep=False).sum())
+    except Exception:
+        return None
+
+
+def dependency_stats() -> list[dict]:
+    """Percentiles and error rate over the recent calls of each dependency operation."""
+    with _lock:
+        snapshot = {key: list(calls) for key, calls in _recent.items()}
+        errors = dict(_last_error)
+    stats = []
+    for (dependency, operation), calls in sorted(snapshot.items()):
+        durations = [ms for ms, _ in calls]
+        failed = sum(1 for _, outcome in calls if outcome == ERROR)
+        stats.append({
+            "dependency":   dependency,
+            "operation":    operation,
+            "recent_calls": len(calls),
+            "error_rate":   round(failed / len(calls), 4) if calls else 0.0,
+            "p50_ms":       round(percentile(durations, 50), 1),
+            "p95_ms":       round(percentile(durations, 95), 1),
+            "p99_ms":       round(percentile(durations, 99), 1),
+            "last_error":   errors.get((dependency, operation)),
+        })
+    return stats
+
+
+def reset() -> None:
+    with _lock:
+        _recent.clear()
+        _last_error.clear()
@@ -1,9 +1,13 @@
-from datetime import datetime
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session, joinedload
 
 from .. import models, schemas
+from ..services import holdings_service, lot_service, snapshot_service
 from ..services.exchange_rate_service import get_usdt_twd_rate
 from ..utils.currency import is_usd_denominated
+from ..utils.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 
 class AssetRepository:
@@ -12,8 +16,12 @@ class AssetRepository:
 
     # ── Internal helpers ──────────────────────────────────────────────────────
 
-    def _enrich(self, asset: models.Asset) -> models.Asset:
-        """Compute value_twd, unrealized_pl, roi as transient attributes."""
+    def _enrich(self, asset: models.Asset, open_cost: float) -> models.Asset:
+        """Compute value_twd, unrealized_pl, roi as transient attributes.
+
+        ``open_cost`` is the native-currency cost of the asset's open lots
+        (see lot_service), so sells reduce the invested capital.
+        """
         usdt_rate = get_usdt_twd_rate(self.db)
         is_usd = is_usd_denominated(asset)
 
@@ -21,13 +29,7 @@ class AssetRepository:
         native_value = (asset.current_price or 0.0) * total_qty
         asset.value_twd = native_value * usdt_rate if is_usd else native_value
 
-        invested_capital = 0.0
-        for t in asset.transactions:
-            if t.amount > 0:
-                cost = t.amount * (t.buy_price or 0.0)
-                if is_usd:
-                    cost *= usdt_rate
-                invested_capital += cost
+        invested_capital = open_cost * usdt_rate if is_usd else open_cost
 
         if invested_capital > 0:
             asset.unrealized_pl = asset.value_twd - invested_capital
@@ -41,23 +43,52 @@ class AssetRepository:
     # ── Asset CRUD ────────────────────────────────────────────────────────────
 
     def get(self, asset_id: int) -> models.Asset | None:
+        costs = lot_service.open_cost_by_asset(self.db, [asset_id])
         asset = (
             self.db.query(models.Asset)
             .options(joinedload(models.Asset.transactions))
             .filter(models.Asset.id == asset_id)
             .first()
         )
-        return self._enrich(asset) if asset else None
+        return self._enrich(asset, costs.get(asset_id, 0.0)) if asset else None
 
-    def list_all(self, skip: int = 0, limit: int = 100) -> list[models.Asset]:
-        assets = (
-            self.db.query(models.Asset)
-            .options(joinedload(models.Asset.transactions))
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-        return [self._enrich(a) for a in assets]
+    def exists(self, asset_id: int) -> bool:
+        """Cheap existence check; ``get`` loads every transaction."""
+        return self.db.query(models.Asset.id).filter(models.Asset.id == asset_id).first() is not None
+
+    def list_all(self) -> list[models.Asset]:
+        """Every asset, enriched.  No cap: snapshots and the dashboard need them all."""
+        return self.list_page(limit=None)[0]
+
+    def list_page(self, limit: int | None = None, cursor: str | None = None) -> tuple[list[models.Asset], str | None]:
+        """Assets ordered by id after ``cursor``; returns (page, next_cursor).
+
+        Raises InvalidCursor for a malformed cursor.
+        """
+        query = self.db.query(models.Asset).order_by(models.Asset.id)
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 1:
+                raise InvalidCursor("expected (id,)")
+            try:
+                after_id = int(values[0])
+            except (TypeError, ValueError) as e:
+                raise InvalidCursor(str(e)) from e
+            query = query.filter(models.Asset.id > after_id)
+        ids = None
+        if limit is not None:
+            # Limit the asset rows before joinedload multiplies them by transactions.
+            ids = [row[0] for row in query.with_entities(models.Asset.id).limit(limit + 1)]
+            has_more = len(ids) > limit
+            ids = ids[:limit]
+            query = self.db.query(models.Asset).filter(models.Asset.id.in_(ids)).order_by(models.Asset.id)
+        else:
+            has_more = False
+        assets = query.options(joinedload(models.Asset.transactions)).all()
+        # Costs for this page only; a full listing reads them all in one pass.
+        costs = lot_service.open_cost_by_asset(self.db, ids)
+        next_cursor = encode_cursor(assets[-1].id) if has_more and assets else None
+        return [self._enrich(a, costs.get(a.id, 0.0)) for a in assets], next_cursor
 
     def create(self, data: schemas.AssetCreate) -> models.Asset:
         db_asset = models.Asset(
@@ -94,6 +125,11 @@ class AssetRepository:
     def delete(self, asset_id: int) -> bool:
         db_asset = self.db.query(models.Asset).filter(models.Asset.id == asset_id).first()
         if db_asset:
+            self.db.query(models.AssetValueHistory).filter(
+                models.AssetValueHistory.asset_id == asset_id
+            ).delete(synchronize_session=False)
+            lot_service.invalidate(self.db, asset_id)
+            holdings_service.invalidate(self.db, asset_id)
             self.db.delete(db_asset)
             self.db.commit()
             return True
@@ -117,29 +153,89 @@ class AssetRepository:
 
         db_tx = models.Transaction(**tx_data, asset_id=asset_id)
         self.db.add(db_tx)
+        holdings_service.invalidate(self.db, asset_id, tx_data['date'])
+        snapshot_service.restate_history(self.db, {(asset_id, tx_data['date']): tx_data['amount']})
 
-        asset = self.db.query(models.Asset).filter(models.Asset.id == asset_id).first()
+        asset = self.db.get(models.Asset, asset_id)
         if asset:
             asset.last_updated_at = datetime.now()
 
         self.db.commit()
+        lot_service.sync_lots(self.db, [asset_id])
         self.db.refresh(db_tx)
         return db_tx
 
+    def list_transactions(
+        self,
+        limit: int = 100,
+        cursor: str | None = None,
+        asset_id: int | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        is_transfer: bool | None = None,
+        q: str | None = None,
+    ) -> tuple[list[models.Transaction], str | None]:
+        """Newest-first ledger page keyed on (date, id); returns (page, next_cursor).
+
+        ``end`` is inclusive.  Raises InvalidCursor for a malformed cursor.
+        """
+        T = models.Transaction
+        query = self.db.query(T)
+        if asset_id is not None:
+            query = query.filter(T.asset_id == asset_id)
+        if start is not None:
+            query = query.filter(T.date >= datetime.combine(start, datetime.min.time()))
+        if end is not None:
+            query = query.filter(T.date < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        if is_transfer is not None:
+            query = query.filter(T.is_transfer.is_(is_transfer))
+        if q:
+            pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.filter(T.note.ilike(f"%{pattern}%", escape="\\"))
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2:
+                raise InvalidCursor("expected (date, id)")
+            try:
+                last_date, last_id = datetime.fromisoformat(values[0]), int(values[1])
+            except (TypeError, ValueError) as e:
+                raise InvalidCursor(str(e)) from e
+            query = query.filter(tuple_(T.date, T.id) < tuple_(last_date, last_id))
+
+        rows = query.order_by(T.date.desc(), T.id.desc()).limit(limit + 1).all()
+        next_cursor = encode_cursor(rows[limit - 1].date, rows[limit - 1].id) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
     def delete_transaction(self, transaction_id: int) -> bool:
         tx = self.db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
         if tx:
+            asset_id = tx.asset_id
+            lot_service.invalidate(self.db, asset_id)
+            holdings_service.invalidate(self.db, asset_id, tx.date)
+            snapshot_service.restate_history(self.db, {(asset_id, tx.date): -(tx.amount or 0.0)})
             self.db.delete(tx)
             self.db.commit()
+            lot_service.sync_lots(self.db, [asset_id])
             return True
         return False
 
     def update_transaction(self, transaction_id: int, data: schemas.TransactionUpdate) -> models.Transaction | None:
         tx = self.db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
         if tx:
+            old_date, old_amount = tx.date, tx.amount or 0.0
             for key, value in data.dict(exclude_unset=True).items():
                 setattr(tx, key, value)
+            lot_service.invalidate(self.db, tx.asset_id)
+            changed = [d for d in (old_date, tx.date) if d]
+            holdings_service.invalidate(self.db, tx.asset_id, min(changed) if changed else None)
+            deltas = defaultdict(float)
+            if old_date:
+                deltas[(tx.asset_id, old_date.date())] -= old_amount
+            if tx.date:
+                deltas[(tx.asset_id, tx.date.date())] += tx.amount or 0.0
+            snapshot_service.restate_history(self.db, deltas)
             self.db.commit()
+            lot_service.sync_lots(self.db, [tx.asset_id])
             self.db.refresh(tx)
         return tx
 
@@ -154,7 +250,7 @@ class AssetRepository:
         )
 
         deposit_amount = transfer.amount - (transfer.fee or 0.0)
-        to_asset = self.get(transfer.to_asset_id)
+        to_asset = self.db.get(models.Asset, transfer.to_asset_id)
         if to_asset and to_asset.category == 'Liabilities':
             deposit_amount = -deposit_amount
 
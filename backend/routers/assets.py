@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import List, Optional, Union
 
 from .. import schemas, models, database
+from ..observability import tracing
 from ..repositories.asset_repo import AssetRepository
+from ..services import holdings_service
+from ..utils.pagination import InvalidCursor
 
 router = APIRouter(
     prefix="/api/assets",
@@ -13,9 +17,28 @@ router = APIRouter(
 
 
 @router.get("", include_in_schema=False)
-@router.get("/", response_model=List[schemas.Asset])
-def read_assets(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    return AssetRepository(db).list_all(skip=skip, limit=limit)
+@router.get("/", response_model=Union[List[schemas.Asset], List[schemas.AssetHolding]])
+def read_assets(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    as_of: Optional[date] = None,
+    db: Session = Depends(database.get_db),
+):
+    """All assets, or one keyset page when ``limit`` is given.
+
+    The next page's cursor is returned in the ``X-Next-Cursor`` header.  With
+    ``as_of=YYYY-MM-DD`` returns the holdings at the end of that day instead.
+    """
+    if as_of is not None:
+        return holdings_service.holdings_as_of(db, as_of)
+    try:
+        assets, next_cursor = AssetRepository(db).list_page(limit=limit, cursor=cursor)
+    except (InvalidCursor, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return assets
 
 
 @router.post("", include_in_schema=False)
@@ -38,8 +61,8 @@ def lookup_ticker(ticker: str):
     try:
         if ticker.isdigit() and len(ticker) == 4:
             ticker = f"{ticker}.TW"
-        t = yf.Ticker(ticker)
-        info = t.info
+        with tracing.span("yfinance", "info", ticker):
+            info = yf.Ticker(ticker).info
         name = info.get('longName') or info.get('shortName') or ticker
         current_price = info.get('currentPrice') or info.get('regularMarketPrice') or info.get('previousClose')
         return {"name": name, "symbol": ticker, "price": current_price}
@@ -60,7 +83,7 @@ def create_transaction_for_asset(
     asset_id: int, transaction: schemas.TransactionCreate, db: Session = Depends(database.get_db)
 ):
     repo = AssetRepository(db)
-    if repo.get(asset_id) is None:
+    if not repo.exists(asset_id):
         raise HTTPException(status_code=404, detail="Asset not found")
     return repo.create_transaction(transaction, asset_id)
 
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..database import get_db
-from ..services.providers import PROVIDERS
+from ..services.providers import PROVIDERS, run_sync
 from ..utils.masking import mask_api_key
+from ..observability import jobs
 
 router = APIRouter(
     prefix="/api/integrations",
@@ -60,7 +61,11 @@ def sync_provider(provider: str, db: Session = Depends(get_db)):
     p = PROVIDERS.get(provider)
     if not p:
         raise HTTPException(status_code=400, detail="Unknown provider")
-    if not p.sync(db):
+    try:
+        synced = jobs.run_tracked(f"{provider}_sync", run_sync, provider, db, raise_on_overlap=True)
+    except jobs.JobAlreadyRunning:
+        raise HTTPException(status_code=409, detail=f"{provider} sync already in progress")
+    if not synced:
         raise HTTPException(status_code=400, detail="Sync failed or no active connections")
     return {"status": "success", "message": f"{provider} synced successfully"}
 
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from .. import models, schemas, scheduler
 from ..database import get_db
+from ..services import lot_service
 
 router = APIRouter(
     prefix="/api/settings",
@@ -34,7 +35,17 @@ def read_setting(key: str, db: Session = Depends(get_db)):
     # Defaults map if not found in DB
     defaults = {
         "price_update_interval_minutes": "60",
+        "crypto_price_interval_minutes": "5",
+        "stock_price_interval_minutes": "15",
+        "price_refresh_budget": "25",
+        "intraday_snapshot_interval_minutes": "60",
+        "intraday_retention_days": "7",
+        "hourly_retention_days": "90",
         "budget_start_day": "1",
+        "cost_basis_method": "fifo",
+        "forecast_paths": "10000",
+        "backup_interval_hours": "24",
+        "backup_retention_count": "7",
         "chart_theme": "Morandi",
         "visible_categories": '["Fluid","Investment","Fixed","Receivables","Liabilities"]',
         "wealth_simulator_monthly_contribution": "10000",
@@ -65,11 +76,19 @@ def update_setting(key: str, setting: schemas.SystemSettingBase, db: Session = D
     db.refresh(db_setting)
 
     # Trigger scheduler update if needed
-    if key == "price_update_interval_minutes":
+    interval_jobs = {
+        "price_update_interval_minutes": "price_update_job",
+        "crypto_price_interval_minutes": "crypto_price_job",
+        "stock_price_interval_minutes":  "stock_price_job",
+    }
+    if key in interval_jobs:
         try:
             minutes = int(db_setting.value)
-            scheduler.reschedule_updates(minutes)
+            scheduler.reschedule_updates(minutes, interval_jobs[key])
         except Exception as e:
             logger.error(f"Failed to reschedule: {e}")
+    elif key == "cost_basis_method":
+        # Lots are rebuilt here, not on the next read.
+        lot_service.sync_lots(db)
 
     return db_setting
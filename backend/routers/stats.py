@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..services import analytics_service
-from ..repositories.asset_repo import AssetRepository
+from ..services import analytics_service, risk_service, simulator_service
+from ..utils.downsample import downsample_points, to_columnar
 
 router = APIRouter(
     prefix="/api/stats",
@@ -11,26 +14,72 @@ router = APIRouter(
 )
 
 
+def _shape_series(points: list[dict], max_points: Optional[int], format: str):
+    """Apply LTTB downsampling and the requested response layout."""
+    points = downsample_points(points, max_points)
+    if format == "columnar":
+        # Plain lists of floats/strings: skip jsonable_encoder's per-item walk.
+        return JSONResponse(content=to_columnar(points))
+    return points
+
+
 @router.get("/asset/{asset_id}/history")
-def get_asset_history(asset_id: int, range: str = "1y", db: Session = Depends(get_db)):
-    asset = AssetRepository(db).get(asset_id)
-    if not asset:
-        return []
+def get_asset_history(
+    asset_id: int,
+    range: str = "1y",
+    max_points: Optional[int] = Query(None, ge=3),
+    format: Literal["rows", "columnar"] = "rows",
+    db: Session = Depends(get_db),
+):
     start_date = analytics_service.parse_range(range)
-    return analytics_service.build_asset_history(asset, start_date)
+    history = analytics_service.get_asset_history(db, asset_id, start_date)
+    if history is None:
+        return []
+    return _shape_series(history, max_points, format)
 
 
 @router.get("/history")
-def get_net_worth_history(range: str = "30d", db: Session = Depends(get_db)):
-    return analytics_service.get_net_worth_history(db, range_str=range)
+def get_net_worth_history(
+    range: str = "30d",
+    resolution: Literal["auto", "hour", "day", "week"] = "auto",
+    max_points: Optional[int] = Query(None, ge=3),
+    format: Literal["rows", "columnar"] = "rows",
+    db: Session = Depends(get_db),
+):
+    """``resolution``: hour | day | week | auto (picks by range length).
+
+    ``max_points`` downsamples with LTTB; ``format=columnar`` returns
+    ``{"dates": [], "values": [], "breakdown": {category: []}}``.
+    """
+    points = analytics_service.get_net_worth_history(db, range_str=range, resolution=resolution)
+    return _shape_series(points, max_points, format)
 
 
 @router.get("/risk_metrics")
 def get_risk_metrics(db: Session = Depends(get_db)):
+    """Served from the incrementally maintained RiskMetricState row.
+
+    Falls back to a full-history calculation until at least two positive
+    daily snapshots exist.
+    """
+    metrics = risk_service.get_risk_metrics(db)
+    if metrics is not None:
+        return metrics
     history = analytics_service.get_net_worth_history(db, range_str="all")
     return analytics_service.compute_risk_metrics(history)
 
 
+@router.get("/realized_pnl")
+def get_realized_pnl(asset_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Realized P&L per asset from the lot engine (``cost_basis_method`` setting)."""
+    return analytics_service.compute_realized_pnl(db, asset_id)
+
+
+@router.get("/realized_pnl/yearly")
+def get_realized_pnl_yearly(db: Session = Depends(get_db)):
+    return analytics_service.compute_realized_pnl_yearly(db)
+
+
 @router.get("/rebalance")
 def get_rebalance_suggestions(db: Session = Depends(get_db)):
     return analytics_service.compute_rebalance_suggestions(db)
@@ -39,3 +88,34 @@ def get_rebalance_suggestions(db: Session = Depends(get_db)):
 @router.get("/forecast")
 def get_goal_forecast(db: Session = Depends(get_db)):
     return analytics_service.compute_goal_forecast(db)
+
+
+@router.get("/simulate")
+def simulate_wealth(
+    contribution_min: Optional[float] = Query(None, ge=0),
+    contribution_max: Optional[float] = Query(None, ge=0),
+    contribution_steps: int = Query(5, ge=1, le=101),
+    return_min: Optional[float] = Query(None, gt=-100),
+    return_max: Optional[float] = Query(None, gt=-100),
+    return_steps: int = Query(9, ge=1, le=101),
+    years: Optional[int] = Query(None, ge=1, le=100),
+    initial: Optional[float] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Contribution × annual return (%) × year grid of projected balances.
+
+    Unset bounds default around the ``wealth_simulator_*`` settings.  The
+    response is ``values[c][r][y]`` with the axis arrays alongside it, so the
+    UI can scrub the whole grid without further requests.
+    """
+    try:
+        grid = simulator_service.simulate_grid(
+            db,
+            contribution_min=contribution_min, contribution_max=contribution_max,
+            contribution_steps=contribution_steps,
+            return_min=return_min, return_max=return_max, return_steps=return_steps,
+            years=years, initial=initial,
+        )
+    except simulator_service.GridTooLarge as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return JSONResponse(content=grid)
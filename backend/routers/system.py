@@ -1,15 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse, Response
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime, timedelta
+from typing import Literal
 import csv
 import io
 import json
 import random
-from .. import database, models, profile_manager, schemas
+from .. import database, models, profile_manager, schemas, scheduler
 from ..repositories.asset_repo import AssetRepository
-from ..services.providers import PROVIDERS
+from ..services import backup_service, export_service, lot_service
+from ..services.providers import run_sync
+from ..observability import jobs, memory, profiling, tracing
 
 router = APIRouter(
     prefix="/api/system",
@@ -18,21 +21,25 @@ router = APIRouter(
 )
 
 @router.get("/backup")
-def download_backup():
-    import os
-    from ..profile_manager import get_db_url, get_current_profile
-    # Derive the actual SQLite file path from the active profile's DB URL
-    # URL format: sqlite:////absolute/path/to/file.db
-    db_url = get_db_url()
-    db_path = db_url.replace("sqlite:///", "")
-    profile = get_current_profile()
-    backup_name = f"yantage_backup_{profile}.db" if profile != "default" else "yantage_backup.db"
-    if not os.path.exists(db_path):
+def download_backup(codec: Literal["gzip", "zstd"] | None = None):
+    """Stream a compressed, consistent snapshot of the active profile.
+
+    Taken with the SQLite backup API, so commits still in the WAL are
+    included and concurrent writes cannot tear the copy.
+    """
+    profile = profile_manager.get_current_profile()
+    try:
+        path = backup_service.create_backup(profile=profile, codec=codec)
+    except backup_service.CodecUnavailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Database file not found")
-    return FileResponse(
-        path=db_path,
-        filename=backup_name,
-        media_type='application/x-sqlite3'
+    codec = codec or backup_service.default_codec()
+    filename = backup_service.backup_name(profile, codec)
+    return StreamingResponse(
+        backup_service.iter_file(path),
+        media_type=backup_service.MEDIA_TYPES[codec],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
 @router.get("/export/csv")
@@ -60,9 +67,38 @@ def export_assets_csv(db: Session = Depends(database.get_db)):
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+@router.get("/export/ledger")
+def export_ledger(format: Literal["csv", "ndjson"] = "csv", gzip: bool = False):
+    """Stream every transaction (with its asset) as CSV or NDJSON, oldest first."""
+    filename = export_service.export_filename(format, gzip)
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    media_type = export_service.MEDIA_TYPES[format]
+    if gzip:
+        # Served as a .gz download rather than Content-Encoding so clients keep the compressed file.
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_service.iter_ledger(format, gzip),
+        media_type=media_type,
+        headers=headers,
+    )
+
+# Rows derived from assets and transactions.  Asset ids are reused after a
+# reset, so per-asset rows left behind would attach to the new assets.
+_DERIVED_TABLES = (
+    "realized_gains", "lots", "lot_checkpoints", "holding_checkpoints",
+    "asset_value_history", "net_worth_intraday", "net_worth_rollups", "risk_metric_state",
+)
+
+
+def _clear_derived(db: Session) -> None:
+    for table in _DERIVED_TABLES:
+        db.execute(text(f"DELETE FROM {table}"))
+
+
 @router.delete("/reset")
 def reset_database(db: Session = Depends(database.get_db)):
     try:
+        _clear_derived(db)
         db.execute(text("DELETE FROM transactions"))
         db.execute(text("DELETE FROM assets"))
         db.execute(text("DELETE FROM goals"))
@@ -89,6 +125,7 @@ def seed_database(db: Session = Depends(database.get_db)):
 
     # 1. Reset first
     try:
+        _clear_derived(db)
         db.execute(text("DELETE FROM transactions"))
         db.execute(text("DELETE FROM assets"))
         db.execute(text("DELETE FROM goals"))
@@ -222,27 +259,138 @@ def seed_database(db: Session = Depends(database.get_db)):
         db.add_all(budget_categories)
 
         db.commit()
+        lot_service.sync_lots(db)
         return {"message": "Database seeded with comprehensive fake data successfully"}
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Seeding failed: {str(e)}")
 
+def _manual_sync(name: str, db: Session) -> bool:
+    try:
+        return jobs.run_tracked(f"{name}_sync", run_sync, name, db, raise_on_overlap=True)
+    except jobs.JobAlreadyRunning:
+        raise HTTPException(status_code=409, detail=f"{name} sync already in progress")
+
 @router.post("/sync/max")
 def trigger_max_sync(db: Session = Depends(database.get_db)):
-    success = PROVIDERS["max"].sync(db)
+    success = _manual_sync("max", db)
     return {"message": "MAX assets synced successfully" if success else "Sync attempted (Check logs or API keys)"}
 
 @router.post("/sync/pionex")
 def trigger_pionex_sync(db: Session = Depends(database.get_db)):
-    success = PROVIDERS["pionex"].sync(db)
+    success = _manual_sync("pionex", db)
     return {"message": "Pionex assets synced successfully" if success else "Sync attempted (Check active connections)"}
 
 @router.post("/sync/wallet")
 def trigger_wallet_sync(db: Session = Depends(database.get_db)):
-    success = PROVIDERS["wallet"].sync(db)
+    success = _manual_sync("wallet", db)
     return {"message": "Wallet assets synced successfully" if success else "Sync attempted (Check logs or API keys)"}
 
+# --- Job Telemetry ---
+
+@router.get("/jobs")
+def get_job_stats(db: Session = Depends(database.get_db)):
+    """Duration percentiles, last success and failure counts per background job."""
+    stats = jobs.job_stats(db)
+    for entry in stats:
+        job = scheduler.scheduler.get_job(f"{entry['job']}_job")
+        entry["next_run_at"] = job.next_run_time if job else None
+    return stats
+
+@router.get("/dependencies")
+def get_dependency_stats():
+    """Recent latency percentiles and error rate per outbound dependency call."""
+    return tracing.dependency_stats()
+
+# --- Profiling ---
+
+def _require_profiling_token(x_profile_token: str | None = Header(None)):
+    if not profiling.token():
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING_TOKEN)")
+    if not profiling.check_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+@router.get("/profiling", dependencies=[Depends(_require_profiling_token)])
+def list_profiles():
+    """Saved request/job profiles, newest first."""
+    return profiling.list_profiles()
+
+@router.get("/profiling/{name}", dependencies=[Depends(_require_profiling_token)])
+def download_profile(name: str):
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if name.endswith(".json") else "text/plain"
+    return StreamingResponse(
+        backup_service.iter_file(path, remove=False),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={name}"},
+    )
+
+@router.post("/profiling/jobs/{job}", dependencies=[Depends(_require_profiling_token)])
+def profile_job(job: str, run_now: bool = False):
+    """Profile the next run of ``job`` (a name from /jobs); ``run_now`` triggers it immediately."""
+    scheduled = scheduler.scheduler.get_job(f"{job}_job")
+    if run_now and scheduled is None:
+        raise HTTPException(status_code=404, detail=f"No scheduled job '{job}'")
+    profiling.arm_job(job)
+    if run_now:
+        scheduled.modify(next_run_time=datetime.now(scheduler.scheduler.timezone))
+    return {"message": f"Next run of '{job}' will be profiled"}
+
+# --- Memory (shares the profiling token) ---
+
+@router.get("/memory", dependencies=[Depends(_require_profiling_token)])
+def memory_overview():
+    """RSS, tracemalloc state, live ORM identity maps and module cache sizes."""
+    return memory.overview()
+
+@router.post("/memory/tracemalloc/start", dependencies=[Depends(_require_profiling_token)])
+def start_tracemalloc(frames: int = 1):
+    if not 1 <= frames <= 50:
+        raise HTTPException(status_code=400, detail="frames must be between 1 and 50")
+    memory.start(frames)
+    return {"message": "tracemalloc started", "frames": frames}
+
+@router.post("/memory/tracemalloc/stop", dependencies=[Depends(_require_profiling_token)])
+def stop_tracemalloc():
+    """Stop tracing and discard all snapshots."""
+    memory.stop()
+    return {"message": "tracemalloc stopped"}
+
+@router.get("/memory/snapshots", dependencies=[Depends(_require_profiling_token)])
+def list_memory_snapshots():
+    return memory.list_snapshots()
+
+@router.post("/memory/snapshots/{name}", dependencies=[Depends(_require_profiling_token)])
+def take_memory_snapshot(name: str):
+    try:
+        return memory.take_snapshot(name)
+    except memory.TracingNotStarted as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.delete("/memory/snapshots/{name}", dependencies=[Depends(_require_profiling_token)])
+def delete_memory_snapshot(name: str):
+    if not memory.delete_snapshot(name):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"message": f"Snapshot '{name}' deleted"}
+
+@router.get("/memory/diff", dependencies=[Depends(_require_profiling_token)])
+def diff_memory_snapshots(
+    base: str,
+    target: str | None = None,
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    limit: int = 25,
+):
+    """Top allocation growth from snapshot ``base`` to ``target`` (or to now)."""
+    try:
+        return memory.diff(base, target, group_by, max(1, min(limit, 200)))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot {e} not found")
+    except memory.TracingNotStarted as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 # --- Profile Management ---
 
 @router.get("/profiles")
@@ -277,6 +425,7 @@ def switch_active_profile(profile: schemas.ProfileSwitch):
         
 @router.delete("/profile/{name}")
 def delete_profile(name: str):
+    database.dispose_profile(name)
     if profile_manager.delete_profile(name):
         return {"message": f"Profile '{name}' deleted"}
     else:
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import tempfile
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from .. import schemas, database
 from ..repositories.asset_repo import AssetRepository
+from ..services import import_service
+from ..utils.pagination import InvalidCursor
 
 router = APIRouter(
     prefix="/api/transactions",
@@ -10,14 +17,67 @@ router = APIRouter(
 )
 
 
+@router.get("", include_in_schema=False)
+@router.get("/", response_model=schemas.TransactionPage)
+def list_transactions(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    asset_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    is_transfer: Optional[bool] = None,
+    q: Optional[str] = None,
+    db: Session = Depends(database.get_db),
+):
+    """Newest-first ledger with keyset paging on (date, id).
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page;
+    ``end`` is inclusive and ``q`` matches the note text.
+    """
+    try:
+        items, next_cursor = AssetRepository(db).list_transactions(
+            limit=limit, cursor=cursor, asset_id=asset_id,
+            start=start, end=end, is_transfer=is_transfer, q=q,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+
 @router.post("/transfer", status_code=status.HTTP_200_OK)
 def transfer_funds(transfer: schemas.TransferCreate, db: Session = Depends(database.get_db)):
     if transfer.from_asset_id == transfer.to_asset_id:
         raise HTTPException(status_code=400, detail="Cannot transfer to the same account")
 
     repo = AssetRepository(db)
-    if not repo.get(transfer.from_asset_id) or not repo.get(transfer.to_asset_id):
+    if not repo.exists(transfer.from_asset_id) or not repo.exists(transfer.to_asset_id):
         raise HTTPException(status_code=404, detail="One or more assets not found")
 
     repo.transfer_funds(transfer)
     return {"message": "Transfer successful"}
+
+
+# Uploads above this size spool to disk instead of memory.
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_transactions(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    dry_run: bool = False,
+    db: Session = Depends(database.get_db),
+):
+    """Bulk-import transactions from a CSV or NDJSON request body.
+
+    The format defaults from Content-Type (``application/x-ndjson`` or
+    ``text/csv``).  Invalid rows are skipped and reported in ``errors``.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "json" in content_type else "csv"
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        return await run_in_threadpool(import_service.import_transactions, db, body, format, dry_run)
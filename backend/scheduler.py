@@ -1,94 +1,208 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from sqlalchemy.orm import Session
-from .database import SessionLocal
-from . import models
-from .services.providers import PROVIDERS
-from .services.price_service import update_prices
+from . import database, models, profile_manager
+from .services.providers import run_sync
+from .services.price_service import update_prices_across
 from .services.exchange_rate_service import get_usdt_twd_rate
 from .services.snapshot_service import snapshot_net_worth
+from .services import backup_service, holdings_service, lot_service, market_calendar
+from .observability.jobs import tracked_job
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 scheduler = BackgroundScheduler()
 
-def run_price_updates():
-    logger.info("Running scheduled price updates...")
-    db: Session = SessionLocal()
+# Per-class refresh cadence (minutes) and per-run upstream call budget.
+# Overridable via SystemSetting; see routers/settings.py defaults.
+DEFAULT_CRYPTO_INTERVAL = 5
+DEFAULT_STOCK_INTERVAL = 15
+DEFAULT_PRICE_BUDGET = 25
+
+# SCHEDULER_ALL_PROFILES=1 refreshes prices and snapshots in every profile,
+# not just the active one.  Provider syncs and backups stay on the active profile.
+ALL_PROFILES_ENV = "SCHEDULER_ALL_PROFILES"
+MAX_SNAPSHOT_WORKERS = 4
+
+
+def all_profiles_mode() -> bool:
+    return os.getenv(ALL_PROFILES_ENV, "").lower() in ("1", "true", "yes")
+
+
+def _setting_int(db: Session, key: str, default: int) -> int:
+    try:
+        setting = db.query(models.SystemSetting).filter_by(key=key).first()
+        return int(setting.value) if setting else default
+    except Exception as e:
+        logger.error(f"Could not load setting {key}: {e}")
+        return default
+
+
+@contextmanager
+def _profile_sessions():
+    """{profile: session} for the profiles a price job should refresh.
+
+    The active profile always comes first (its settings, e.g. the call
+    budget, govern the run); a profile whose database cannot be opened is
+    logged and skipped.
+    """
+    active = profile_manager.get_current_profile()
+    names = [active]
+    if all_profiles_mode():
+        names += [p for p in profile_manager.list_profiles() if p != active]
+    sessions: dict[str, Session] = {}
+    try:
+        for name in names:
+            try:
+                sessions[name] = database.profile_session(name)
+            except Exception as e:
+                logger.error(f"Could not open profile {name}: {e}")
+        yield sessions
+    finally:
+        for db in sessions.values():
+            db.close()
+
+
+def _refresh_prices(sessions: dict[str, Session], markets: set[str]) -> int:
+    if not sessions:
+        return 0
+    active = next(iter(sessions.values()))
+    budget = _setting_int(active, "price_refresh_budget", DEFAULT_PRICE_BUDGET)
+    return update_prices_across(sessions, markets=markets, budget=budget)
+
+
+def _snapshot_profile(name: str, db: Session) -> None:
     try:
-        update_prices(db)
         get_usdt_twd_rate(db)
-        # Take a net worth snapshot after every price update so the history
-        # endpoint can serve from fast DB reads instead of recalculating.
+        # Catches transactions written outside the repository / importer.
+        lot_service.sync_lots(db)
+        holdings_service.ensure_checkpoints(db)
         snapshot_net_worth(db)
-        logger.info("Scheduled price updates + snapshot completed.")
     except Exception as e:
-        logger.error(f"Error in scheduled price update: {e}")
-    finally:
-        db.close()
+        logger.error(f"Snapshot for profile {name} failed: {e}")
+
+
+def _refresh_market_prices(markets: set[str]) -> None:
+    with _profile_sessions() as sessions:
+        calls = _refresh_prices(sessions, markets)
+        if calls:
+            logger.info(f"Refreshed {'/'.join(sorted(markets))} prices for {len(sessions)} profile(s) ({calls} upstream calls).")
+
+
+@tracked_job("crypto_price")
+def run_crypto_price_updates():
+    _refresh_market_prices({market_calendar.CRYPTO})
+
+
+@tracked_job("stock_price")
+def run_stock_price_updates():
+    # Closed TW/US sessions are filtered out per asset by market_calendar,
+    # so off-hours runs make no upstream calls.
+    _refresh_market_prices({market_calendar.TW, market_calendar.US})
+
+
+@tracked_job("price_update")
+def run_price_updates():
+    # Prices come from the crypto / stock jobs; this one snapshots what they
+    # applied so the history endpoint can serve from fast DB reads instead of
+    # recalculating.
+    logger.info("Running scheduled snapshot...")
+    with _profile_sessions() as sessions:
+        # Each profile is its own database file, so snapshots run in parallel;
+        # every session is handed to exactly one worker.
+        workers = min(MAX_SNAPSHOT_WORKERS, len(sessions)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot") as executor:
+            list(executor.map(_snapshot_profile, sessions.keys(), sessions.values()))
+        logger.info(f"Scheduled snapshot completed ({len(sessions)} profile(s)).")
 
 def _run_provider_sync(name: str) -> None:
-    db: Session = SessionLocal()
+    db: Session = database.SessionLocal()
     try:
-        success = PROVIDERS[name].sync(db)
+        success = run_sync(name, db)
         if success:
             logger.info(f"{name} sync completed.")
-    except Exception as e:
-        logger.error(f"Error in {name} sync: {e}")
     finally:
         db.close()
 
 
+@tracked_job("backup")
+def run_backup():
+    db: Session = database.SessionLocal()
+    try:
+        keep = _setting_int(db, "backup_retention_count", backup_service.DEFAULT_RETENTION)
+    finally:
+        db.close()
+    backup_service.run_scheduled_backup(keep=keep)
+
+
+@tracked_job("max_sync")
 def run_max_sync():     _run_provider_sync("max")
+@tracked_job("pionex_sync")
 def run_pionex_sync():  _run_provider_sync("pionex")
+@tracked_job("binance_sync")
 def run_binance_sync(): _run_provider_sync("binance")
+@tracked_job("wallet_sync")
 def run_wallet_sync():  _run_provider_sync("wallet")
 
 def start_scheduler():
     # Helper to get interval from DB
-    db = SessionLocal()
-    interval_minutes = 60 # Default to 1 hour
+    db = database.SessionLocal()
     try:
-        setting = db.query(models.SystemSetting).filter_by(key="price_update_interval_minutes").first()
-        if setting:
-            interval_minutes = int(setting.value)
-    except Exception as e:
-        logger.error(f"Could not load scheduler usage setting: {e}")
+        interval_minutes = _setting_int(db, "price_update_interval_minutes", 60)
+        crypto_minutes = _setting_int(db, "crypto_price_interval_minutes", DEFAULT_CRYPTO_INTERVAL)
+        stock_minutes = _setting_int(db, "stock_price_interval_minutes", DEFAULT_STOCK_INTERVAL)
+        backup_hours = _setting_int(db, "backup_interval_hours", backup_service.DEFAULT_INTERVAL_HOURS)
     finally:
         db.close()
 
     # coalesce=True: if a job misfires multiple times, run it only once on recovery.
     # misfire_grace_time=60: tolerate up to 60s late start before marking a misfire.
-    _job_defaults = dict(coalesce=True, misfire_grace_time=60)
+    # max_instances=1: APScheduler never starts a second copy; run_tracked's lock
+    # additionally covers manual syncs racing a scheduled run.
+    _job_defaults = dict(coalesce=True, misfire_grace_time=60, max_instances=1)
 
     if not scheduler.running:
         scheduler.add_job(run_price_updates, 'interval', minutes=interval_minutes, id='price_update_job', **_job_defaults)
+        scheduler.add_job(run_crypto_price_updates, 'interval', minutes=crypto_minutes, id='crypto_price_job', **_job_defaults)
+        scheduler.add_job(run_stock_price_updates, 'interval', minutes=stock_minutes, id='stock_price_job', **_job_defaults)
         scheduler.add_job(run_max_sync, 'interval', minutes=60, id='max_sync_job', **_job_defaults)
         scheduler.add_job(run_pionex_sync, 'interval', minutes=60, id='pionex_sync_job', **_job_defaults)
         scheduler.add_job(run_binance_sync, 'interval', minutes=60, id='binance_sync_job', **_job_defaults)
         scheduler.add_job(run_wallet_sync, 'interval', minutes=10, id='wallet_sync_job', **_job_defaults)
+        if backup_hours > 0:
+            scheduler.add_job(run_backup, 'interval', hours=backup_hours, id='backup_job', **_job_defaults)
         # Daily midnight snapshot ensures history data exists even on days with no manual refresh
         scheduler.add_job(lambda: run_price_updates(), 'cron', hour=0, minute=5, id='daily_snapshot_job', **_job_defaults)
         scheduler.start()
         logger.info(f"Scheduler started with interval: {interval_minutes} minutes")
 
-def reschedule_updates(interval_minutes: int):
-    _job_defaults = dict(coalesce=True, misfire_grace_time=60)
-    if scheduler.get_job('price_update_job'):
+_INTERVAL_JOBS = {
+    'price_update_job': run_price_updates,
+    'crypto_price_job': run_crypto_price_updates,
+    'stock_price_job':  run_stock_price_updates,
+}
+
+
+def reschedule_updates(interval_minutes: int, job_id: str = 'price_update_job'):
+    _job_defaults = dict(coalesce=True, misfire_grace_time=60, max_instances=1)
+    if scheduler.get_job(job_id):
         scheduler.reschedule_job(
-            'price_update_job',
+            job_id,
             trigger='interval',
             minutes=interval_minutes,
         )
-        logger.info(f"Rescheduled price updates to every {interval_minutes} minutes")
+        logger.info(f"Rescheduled {job_id} to every {interval_minutes} minutes")
     else:
         scheduler.add_job(
-            run_price_updates, 'interval',
+            _INTERVAL_JOBS[job_id], 'interval',
             minutes=interval_minutes,
-            id='price_update_job',
+            id=job_id,
             **_job_defaults,
         )
-        logger.info(f"Added new price update job with interval: {interval_minutes} minutes")
+        logger.info(f"Added new {job_id} with interval: {interval_minutes} minutes")
 
 def shutdown_scheduler():
     if scheduler.running:
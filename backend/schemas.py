@@ -33,6 +33,22 @@ class Transaction(TransactionBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    assets: int
+    earliest: Optional[datetime] = None
+    dry_run: bool
+    errors: List[ImportRowError]
+
 # Asset Schemas
 class AssetBase(BaseModel):
     name: str
@@ -86,6 +102,18 @@ class Asset(AssetBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class AssetHolding(BaseModel):
+    """An asset's position at the end of a past day (``/api/assets?as_of=``)."""
+    asset_id: int
+    name: str
+    ticker: Optional[str] = None
+    category: str
+    sub_category: Optional[str] = None
+    quantity: float
+    cost: float                       # Σ amount × buy_price, native currency
+    price: Optional[float] = None     # TWD per unit, from that day's snapshot if any
+    value_twd: Optional[float] = None
+
 class DashboardData(BaseModel):
     net_worth: float
     total_pl: float
@@ -9,11 +9,13 @@ from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..observability import tracing
 from ..repositories.asset_repo import AssetRepository
 from ..repositories.goal_repo import GoalRepository
 from ..utils.math import safe_float
 from ..utils.currency import is_usd_denominated
 from ..services.exchange_rate_service import get_usdt_twd_rate
+from . import forecast_service, lot_service, market_data_service, risk_service, snapshot_service
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,8 @@ logger = logging.getLogger(__name__)
 
 def parse_range(range_str: str) -> date:
     today = datetime.now().date()
+    if range_str == "1d":   return today - timedelta(days=1)
+    if range_str == "7d":   return today - timedelta(days=7)
     if range_str == "30d":  return today - timedelta(days=30)
     if range_str == "3mo":  return today - timedelta(days=90)
     if range_str == "6mo":  return today - timedelta(days=180)
@@ -33,29 +37,56 @@ def parse_range(range_str: str) -> date:
 
 # ── Yahoo Finance helpers ─────────────────────────────────────────────────────
 
-def fetch_yahoo_history(symbols, start_date: date) -> dict:
-    try:
-        fetch_start = (start_date - timedelta(days=7)).strftime("%Y-%m-%d")
-        today = datetime.now().date()
+def _download_closes(symbols: list[str], since: date) -> dict[str, dict[str, float]]:
+    """One ``yf.download`` of daily closes from ``since`` to today, NaNs dropped."""
+    today = datetime.now().date()
+    target = symbols[0] if len(symbols) == 1 else f"{len(symbols)} symbols from {since}"
+    with tracing.span("yfinance", "download", target) as s:
         data = yf.download(
             symbols,
-            start=fetch_start,
+            start=since.strftime("%Y-%m-%d"),
             end=str(today + timedelta(days=1)),
             progress=False,
         )['Close']
-        history_map = {}
-        if isinstance(data, pd.DataFrame) and not data.empty:
-            for col in data.columns:
-                series = data[col].ffill().bfill()
-                history_map[col] = {d.strftime("%Y-%m-%d"): val for d, val in series.items()}
-        elif isinstance(data, pd.Series) and not data.empty:
-            symbol = symbols[0] if isinstance(symbols, list) else symbols
-            series = data.ffill().bfill()
-            history_map[symbol] = {d.strftime("%Y-%m-%d"): val for d, val in series.items()}
-        return history_map
-    except Exception as e:
-        logger.error(f"fetch_yahoo_history failed for {symbols}: {e}")
+        s.size = tracing.frame_bytes(data)
+    if isinstance(data, pd.Series):
+        data = data.to_frame(symbols[0])
+    closes = {}
+    for col in data.columns:
+        series = data[col].dropna()
+        closes[col] = {d.strftime("%Y-%m-%d"): float(val) for d, val in series.items()}
+    return closes
+
+
+def fetch_yahoo_history(symbols, start_date: date) -> dict:
+    """Daily closes per symbol from a week before ``start_date``, gaps filled.
+
+    Served from the shared market database; only symbols missing there (or
+    stale, see market_data_service) are downloaded, once per distinct window.
+    """
+    symbols = [symbols] if isinstance(symbols, str) else list(dict.fromkeys(symbols))
+    if not symbols:
         return {}
+    fetch_start = start_date - timedelta(days=7)
+    fetched: dict[str, dict[str, float]] = {}
+    for since, batch in market_data_service.history_plan(symbols, fetch_start).items():
+        try:
+            closes = _download_closes(batch, since)
+        except Exception as e:
+            logger.error(f"fetch_yahoo_history failed for {batch}: {e}")
+            continue
+        market_data_service.store_history(since, closes)
+        fetched.update(closes)
+
+    stored = market_data_service.load_history(symbols, fetch_start)
+    for symbol, closes in fetched.items():
+        stored.setdefault(symbol, {}).update(closes)
+    frame = pd.DataFrame({sym: pd.Series(closes, dtype=float) for sym, closes in stored.items() if closes})
+    if frame.empty:
+        return {}
+    frame = frame.sort_index()
+    frame = frame[frame.index >= fetch_start.strftime("%Y-%m-%d")].ffill().bfill()
+    return {col: frame[col].to_dict() for col in frame.columns}
 
 
 def _yf_ticker_for_asset(asset) -> str | None:
@@ -121,13 +152,123 @@ def build_asset_history(asset, start_date: date) -> list[dict]:
     return history
 
 
+def get_asset_history(db: Session, asset_id: int, start_date: date) -> list[dict] | None:
+    """Per-asset history, served from AssetValueHistory when it covers the range.
+
+    One indexed range scan on (asset_id, date); falls back to rebuilding from
+    Yahoo prices + transactions (build_asset_history) when coverage < 80%.
+    Returns None if the asset does not exist.
+    """
+    today = datetime.now().date()
+    rows = (
+        db.query(models.AssetValueHistory)
+        .filter(
+            models.AssetValueHistory.asset_id == asset_id,
+            models.AssetValueHistory.date >= start_date.strftime("%Y-%m-%d"),
+        )
+        .order_by(models.AssetValueHistory.date)
+        .all()
+    )
+    expected_days = (today - start_date).days + 1
+    if rows and len(rows) >= max(1, int(expected_days * 0.8)):
+        return [
+            {
+                "date": r.date,
+                "quantity": r.quantity,
+                "value": round(r.value_twd, 2),
+                "price": round(r.price, 2),
+            }
+            for r in rows
+        ]
+
+    asset = AssetRepository(db).get(asset_id)
+    if asset is None:
+        return None
+    return build_asset_history(asset, start_date)
+
+
 # ── Net worth history ─────────────────────────────────────────────────────────
 
-def get_net_worth_history(db: Session, range_str: str = "30d") -> list[dict]:
+HOURLY_MAX_DAYS = 7          # auto resolution: ranges up to a week use hour buckets
+WEEKLY_MIN_DAYS = 3 * 365    # auto resolution: ranges over 3 years use week buckets
+
+
+def _rollup_history(db: Session, resolution: str, start_bucket: str) -> list[dict]:
+    rows = (
+        db.query(models.NetWorthRollup)
+        .filter(
+            models.NetWorthRollup.resolution == resolution,
+            models.NetWorthRollup.bucket >= start_bucket,
+        )
+        .order_by(models.NetWorthRollup.bucket)
+        .all()
+    )
+    return [
+        {
+            "date": r.bucket,
+            "value": safe_float(r.value),
+            "breakdown": json.loads(r.breakdown) if r.breakdown else {},
+        }
+        for r in rows
+    ]
+
+
+def _resolve_resolution(db: Session, resolution: str, start_date: date, today: date) -> str:
+    span = (today - start_date).days
+    if resolution == "auto":
+        if span <= HOURLY_MAX_DAYS:
+            resolution = "hour"
+        elif span > WEEKLY_MIN_DAYS:
+            resolution = "week"
+        else:
+            return "day"
+
+    # Buckets must cover >= 80% of the range, like the daily fast path; right
+    # after deploy only a few captures exist and the daily series is better.
+    if resolution == "hour":
+        n_hours = (
+            db.query(models.NetWorthRollup)
+            .filter(
+                models.NetWorthRollup.resolution == "hour",
+                models.NetWorthRollup.bucket >= start_date.strftime("%Y-%m-%d 00:00"),
+            )
+            .count()
+        )
+        interval = snapshot_service._setting_int(
+            db, "intraday_snapshot_interval_minutes", snapshot_service.DEFAULT_INTRADAY_INTERVAL_MINUTES)
+        elapsed = datetime.now() - datetime.combine(start_date, datetime.min.time())
+        expected_hours = elapsed.total_seconds() / 60 / max(60, interval)
+        return "hour" if n_hours >= 2 and n_hours >= int(expected_hours * 0.8) else "day"
+
+    if resolution == "week":
+        start_str = start_date.strftime("%Y-%m-%d")
+        n_weeks = (
+            db.query(models.NetWorthRollup)
+            .filter(models.NetWorthRollup.resolution == "week", models.NetWorthRollup.bucket >= start_str)
+            .count()
+        )
+        expected_weeks = span // 7 + 1
+        return "week" if n_weeks and n_weeks >= int(expected_weeks * 0.8) else "day"
+
+    return "day"
+
+
+def get_net_worth_history(db: Session, range_str: str = "30d", resolution: str = "day") -> list[dict]:
+    """Net worth series for ``range_str`` at ``resolution`` (hour/day/week/auto).
+
+    Hour and week series come from NetWorthRollup; when they don't cover the
+    range the daily series is returned instead.
+    """
     try:
         today = datetime.now().date()
         start_date = parse_range(range_str)
 
+        resolution = _resolve_resolution(db, resolution, start_date, today)
+        if resolution == "hour":
+            return _rollup_history(db, "hour", start_date.strftime("%Y-%m-%d 00:00"))
+        if resolution == "week":
+            return _rollup_history(db, "week", snapshot_service.week_bucket(start_date))
+
         # Fast path: serve from pre-computed daily snapshots when coverage ≥ 80%.
         snapshots = (
             db.query(models.NetWorthHistory)
@@ -235,22 +376,16 @@ def get_net_worth_history(db: Session, range_str: str = "30d") -> list[dict]:
 
 # ── Risk metrics ──────────────────────────────────────────────────────────────
 
-_EMPTY_METRICS = {
-    "cagr":        {"value": 0, "status": "N/A"},
-    "maxDrawdown": {"value": 0, "status": "N/A"},
-    "volatility":  {"value": 0, "status": "N/A"},
-}
-
-
 def compute_risk_metrics(history: list[dict]) -> dict:
+    """Full-history risk metrics; the snapshot-backed path lives in risk_service."""
     if not history or len(history) < 2:
-        return _EMPTY_METRICS
+        return risk_service.EMPTY_METRICS
 
     values = [h["value"] for h in history if h["value"] > 0]
     dates  = [datetime.strptime(h["date"], "%Y-%m-%d") for h in history if h["value"] > 0]
 
     if len(values) < 2:
-        return _EMPTY_METRICS
+        return risk_service.EMPTY_METRICS
 
     # Max drawdown
     peak = values[0]
@@ -271,40 +406,8 @@ def compute_risk_metrics(history: list[dict]) -> dict:
     else:
         annualised_vol = 0.0
 
-    # CAGR
-    days = (dates[-1] - dates[0]).days
-    years = days / 365.25
-    start_val, end_val = values[0], values[-1]
-    if years >= 1.0 and start_val > 0:
-        cagr = (end_val / start_val) ** (1 / years) - 1
-    else:
-        cagr = (end_val - start_val) / start_val if start_val > 0 else 0
-
-    cagr_pct = cagr * 100
-    mdd_pct  = max_dd * 100
-    vol_pct  = annualised_vol * 100
-
-    def _cagr_status(v):
-        if v > 15: return "Excellent"
-        if v > 5:  return "Healthy"
-        if v >= 0: return "Slow"
-        return "Declining"
-
-    def _vol_status(v):
-        if v > 40: return "High Risk"
-        if v > 15: return "Moderate"
-        return "Stable"
-
-    def _dd_status(v):
-        if v > 30: return "Heavy Loss"
-        if v > 15: return "Correction"
-        return "Safe"
-
-    return {
-        "cagr":        {"value": cagr_pct, "status": _cagr_status(cagr_pct)},
-        "maxDrawdown": {"value": mdd_pct,  "status": _dd_status(mdd_pct)},
-        "volatility":  {"value": vol_pct,  "status": _vol_status(vol_pct)},
-    }
+    cagr = risk_service.cagr(values[0], values[-1], (dates[-1] - dates[0]).days)
+    return risk_service.format_risk_metrics(cagr, max_dd, annualised_vol)
 
 
 # ── Goal forecast ─────────────────────────────────────────────────────────────
@@ -322,6 +425,9 @@ def compute_goal_forecast(db: Session) -> dict:
         nw_goals = [g for g in goals if g.goal_type == 'NET_WORTH']
         current_nw = history_data[-1]['value'] if history_data else 0
 
+        simulated = forecast_service.forecast_goals(db, current_nw, nw_goals, today)
+        mc_goals = simulated["goals"] if simulated else {}
+
         forecasts = []
         for goal in nw_goals:
             remaining = goal.target_amount - current_nw
@@ -341,13 +447,59 @@ def compute_goal_forecast(db: Session) -> dict:
                 "avg_monthly_growth": round(avg_growth, 0),
                 "months_to_reach":    round(months_to_go, 1),
                 "predicted_date":     prediction,
+                # Monte Carlo arrival dates; None when beyond the horizon or history is too short.
+                **mc_goals.get(goal.id, {"p10_date": None, "p50_date": None, "p90_date": None,
+                                         "probability": 1.0 if remaining <= 0 else None}),
             })
 
-        return {"growth_rate_6mo": round(avg_growth, 0), "forecasts": forecasts}
+        return {
+            "growth_rate_6mo": round(avg_growth, 0),
+            "forecasts":       forecasts,
+            "simulation":      simulated["simulation"] if simulated else None,
+        }
     except Exception as e:
         logger.error(f"compute_goal_forecast failed: {e}")
         traceback.print_exc()
-        return {"growth_rate_6mo": 0, "forecasts": []}
+        return {"growth_rate_6mo": 0, "forecasts": [], "simulation": None}
+
+
+# ── Realized P&L ──────────────────────────────────────────────────────────────
+
+def _twd_factors(db: Session, asset_ids) -> dict[int, float]:
+    """{asset_id: native → TWD factor}; USD assets use the current USDT rate."""
+    usdt_rate = get_usdt_twd_rate(db)
+    assets = db.query(models.Asset).filter(models.Asset.id.in_(list(asset_ids))).all()
+    return {a.id: usdt_rate if is_usd_denominated(a) else 1.0 for a in assets}
+
+
+def compute_realized_pnl(db: Session, asset_id: int | None = None) -> dict:
+    rows = lot_service.realized_by_asset(db, asset_id)
+    factors = _twd_factors(db, {r["asset_id"] for r in rows})
+    names = dict(db.query(models.Asset.id, models.Asset.name).filter(models.Asset.id.in_(list(factors))))
+    assets = [
+        {
+            **r,
+            "name":         names.get(r["asset_id"]),
+            "realized_twd": round(r["realized"] * factors.get(r["asset_id"], 1.0), 0),
+        }
+        for r in rows
+    ]
+    return {
+        "method":       lot_service.cost_basis_method(db),
+        "total_twd":    round(sum(a["realized_twd"] for a in assets), 0),
+        "assets":       sorted(assets, key=lambda a: -abs(a["realized_twd"])),
+    }
+
+
+def compute_realized_pnl_yearly(db: Session) -> list[dict]:
+    rows = lot_service.realized_by_year(db)
+    factors = _twd_factors(db, {r["asset_id"] for r in rows})
+    years: dict[int, dict] = {}
+    for r in rows:
+        y = years.setdefault(r["year"], {"year": r["year"], "realized_twd": 0.0, "trades": 0})
+        y["realized_twd"] += r["realized"] * factors.get(r["asset_id"], 1.0)
+        y["trades"] += r["trades"]
+    return [{**y, "realized_twd": round(y["realized_twd"], 0)} for y in years.values()]
 
 
 # ── Rebalance suggestions ─────────────────────────────────────────────────────
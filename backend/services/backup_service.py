@@ -0,0 +1,217 @@
+"""Consistent online backups of a profile database.
+
+Copying the ``.db`` file is not a backup in WAL mode: commits still in the
+``-wal`` file are missing and a concurrent write can tear the copy.  This
+module uses the SQLite online backup API on a private connection instead:
+
+* pages are copied ``STEP_PAGES`` at a time with a short sleep between steps,
+  so the source read lock is held only briefly and the WAL can still be
+  checkpointed.  ``sqlite3`` releases the GIL inside each step, so request
+  threads keep running;
+* a write from another connection restarts a stepped backup.  After
+  ``MAX_RESTARTS`` restarts the copy is finished in a single step, which in
+  WAL mode is one read transaction — a consistent snapshot that does not
+  block writers;
+* the snapshot is then compressed in chunks (zstd when ``zstandard`` is
+  installed, gzip otherwise) so memory stays flat for large profiles.
+
+Scheduled backups are written to ``DATA_DIR/backups`` and rotated, keeping
+the newest ``backup_retention_count`` per profile.
+"""
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from .. import profile_manager
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+STEP_PAGES = 1024           # 4 MiB per step at the default page size
+STEP_SLEEP = 0.005          # seconds between steps, lets writers in
+MAX_RESTARTS = 3            # stepped restarts before finishing in one step
+CHUNK_SIZE = 1 << 20        # compression / streaming chunk
+STALE_TMP_SECONDS = 3600    # abandoned temp files older than this are removed
+
+DEFAULT_RETENTION = 7
+DEFAULT_INTERVAL_HOURS = 24
+
+GZIP, ZSTD = "gzip", "zstd"
+EXTENSIONS = {GZIP: ".gz", ZSTD: ".zst"}
+MEDIA_TYPES = {GZIP: "application/gzip", ZSTD: "application/zstd"}
+
+
+class CodecUnavailable(ValueError):
+    pass
+
+
+class _Restarted(Exception):
+    pass
+
+
+def default_codec() -> str:
+    return ZSTD if zstandard is not None else GZIP
+
+
+def backup_dir() -> Path:
+    path = Path(profile_manager.DATA_DIR) / "backups"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def db_path(profile: str | None = None) -> Path:
+    return Path(profile_manager.get_db_url(profile).replace("sqlite:///", "", 1))
+
+
+def backup_name(profile: str, codec: str, timestamp: datetime | None = None) -> str:
+    stamp = (timestamp or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    base = "yantage_backup" if profile == profile_manager.DEFAULT_PROFILE else f"yantage_backup_{profile}"
+    return f"{base}_{stamp}.db{EXTENSIONS[codec]}"
+
+
+# ── Snapshot ──────────────────────────────────────────────────────────────────
+
+def snapshot(src_path: Path, dest_path: Path, pages: int = STEP_PAGES, sleep: float = STEP_SLEEP,
+             max_restarts: int = MAX_RESTARTS) -> int:
+    """Copy ``src_path`` into ``dest_path`` with the online backup API; returns restarts seen."""
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _Restarted
+        last_remaining = remaining
+
+    src = sqlite3.connect(src_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        try:
+            src.backup(dest, pages=pages, progress=progress, sleep=sleep)
+        except _Restarted:
+            logger.info(f"Backup of {src_path.name} restarted {restarts} times; finishing in one step")
+            src.backup(dest, pages=-1)
+    finally:
+        dest.close()
+        src.close()
+    return restarts
+
+
+# ── Compression ───────────────────────────────────────────────────────────────
+
+def compress_file(src_path: Path, dest_path: Path, codec: str) -> None:
+    with open(src_path, "rb") as src, open(dest_path, "wb") as raw:
+        if codec == ZSTD:
+            with zstandard.ZstdCompressor(level=3).stream_writer(raw) as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+        else:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+
+
+def _check_codec(codec: str | None) -> str:
+    codec = codec or default_codec()
+    if codec == ZSTD and zstandard is None:
+        raise CodecUnavailable("zstd compression needs the 'zstandard' package")
+    if codec not in EXTENSIONS:
+        raise CodecUnavailable(f"Unknown codec {codec}")
+    return codec
+
+
+def _tmp_dir() -> Path:
+    path = backup_dir() / "tmp"
+    path.mkdir(exist_ok=True)
+    cutoff = time.time() - STALE_TMP_SECONDS
+    for leftover in path.iterdir():
+        try:
+            if leftover.stat().st_mtime < cutoff:
+                leftover.unlink()
+        except OSError:
+            pass
+    return path
+
+
+def create_backup(dest_path: Path | None = None, profile: str | None = None,
+                  codec: str | None = None) -> Path:
+    """Write a compressed, consistent snapshot of ``profile``; returns its path.
+
+    Without ``dest_path`` the file goes to a temp directory under
+    ``DATA_DIR/backups`` and the caller owns (and removes) it.
+    """
+    codec = _check_codec(codec)
+    src = db_path(profile)
+    if not src.exists():
+        raise FileNotFoundError(src)
+    tmp = _tmp_dir()
+    fd, raw_name = tempfile.mkstemp(suffix=".db", dir=tmp)
+    os.close(fd)
+    raw = Path(raw_name)
+    fd, out_name = tempfile.mkstemp(suffix=".db" + EXTENSIONS[codec], dir=tmp)
+    os.close(fd)
+    out = Path(out_name)
+    try:
+        snapshot(src, raw)
+        compress_file(raw, out, codec)
+    except BaseException:
+        out.unlink(missing_ok=True)
+        raise
+    finally:
+        raw.unlink(missing_ok=True)
+    if dest_path is None:
+        return out
+    os.replace(out, dest_path)   # never leave a half-written file under its final name
+    return dest_path
+
+
+def iter_file(path: Path, remove: bool = True) -> Iterator[bytes]:
+    """Stream ``path`` in chunks, deleting it afterwards when ``remove``."""
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                yield chunk
+    finally:
+        if remove:
+            path.unlink(missing_ok=True)
+
+
+# ── Scheduled, rotating backups ───────────────────────────────────────────────
+
+def rotate(profile: str, keep: int) -> list[Path]:
+    """Delete all but the newest ``keep`` backups of ``profile``; returns the removed files."""
+    prefix = backup_name(profile, GZIP).rsplit("_", 2)[0] + "_"
+    ours = sorted(
+        (p for p in backup_dir().glob(prefix + "*.db.*")
+         if p.name[len(prefix):len(prefix) + 8].isdigit()),
+        key=lambda p: p.name[len(prefix):],
+    )
+    removed = ours[:-keep] if keep > 0 else ours
+    for path in removed:
+        path.unlink(missing_ok=True)
+    return removed
+
+
+def run_scheduled_backup(keep: int = DEFAULT_RETENTION, profile: str | None = None) -> Path:
+    profile = profile or profile_manager.get_current_profile()
+    codec = default_codec()
+    dest = backup_dir() / backup_name(profile, codec)
+    started = time.monotonic()
+    create_backup(dest, profile=profile, codec=codec)
+    removed = rotate(profile, keep)
+    logger.info(
+        f"Backup {dest.name} written in {time.monotonic() - started:.1f}s"
+        + (f"; rotated out {len(removed)}" if removed else "")
+    )
+    return dest
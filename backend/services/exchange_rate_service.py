@@ -2,8 +2,11 @@
 import requests
 import logging
 import time
+from datetime import datetime
 from sqlalchemy.orm import Session
 from .. import models
+from ..observability import memory, tracing
+from . import market_data_service
 
 logger = logging.getLogger(__name__)
 
@@ -13,12 +16,14 @@ _rate_cache = {
     "rate": 32.0, # Default fallback
     "timestamp": 0
 }
+memory.register_cache("exchange_rate_service.rate", lambda: int(_rate_cache["timestamp"] > 0))
 
 def get_usdt_twd_rate(db: Session = None) -> float:
     """
     Get the current USDT/TWD exchange rate.
     Uses caching to avoid excessive API calls.
-    Prioritizes MAX API -> DB Saved Value -> Hardcoded Fallback.
+    Prioritizes process cache -> shared market DB (if fresh) -> MAX API ->
+    last market DB rate -> legacy profile setting -> hardcoded fallback.
     """
     global _rate_cache
     now = time.time()
@@ -26,6 +31,13 @@ def get_usdt_twd_rate(db: Session = None) -> float:
     # Check Cache
     if now - _rate_cache["timestamp"] < CACHE_DURATION:
         return _rate_cache["rate"]
+
+    # Another process (or a restart) may have fetched it recently
+    stored = market_data_service.latest_fx(market_data_service.USDT_TWD)
+    if stored and (datetime.now() - stored[1]).total_seconds() < CACHE_DURATION:
+        _rate_cache["rate"] = stored[0]
+        _rate_cache["timestamp"] = stored[1].timestamp()
+        return stored[0]
         
     # Fetch from External Source (MAX)
     rate = fetch_rate_from_max()
@@ -33,23 +45,13 @@ def get_usdt_twd_rate(db: Session = None) -> float:
     if rate:
         _rate_cache["rate"] = rate
         _rate_cache["timestamp"] = now
-        
-        # Update DB if session provided
-        if db:
-            try:
-                setting = db.query(models.SystemSetting).filter_by(key="exchange_rate_usdtwd").first()
-                if not setting:
-                    setting = models.SystemSetting(key="exchange_rate_usdtwd", value=str(rate))
-                    db.add(setting)
-                else:
-                    setting.value = str(rate)
-                db.commit()
-            except Exception as e:
-                logger.error(f"Failed to update exchange rate in DB: {e}")
-                
+        market_data_service.store_fx(market_data_service.USDT_TWD, rate)
         return rate
-        
-    # Fallback to DB if external fetch failed
+
+    # Fallback to the last known rate if external fetch failed
+    if stored:
+        return stored[0]
+    # Profiles from before the shared market DB kept the rate as a setting
     if db:
         try:
             setting = db.query(models.SystemSetting).filter_by(key="exchange_rate_usdtwd").first()
@@ -64,7 +66,9 @@ def get_usdt_twd_rate(db: Session = None) -> float:
 
 def fetch_rate_from_max() -> float:
     try:
-        response = requests.get("https://max-api.maicoin.com/api/v3/tickers?markets[]=usdttwd", timeout=5)
+        with tracing.span("max", "tickers", "usdttwd") as s:
+            response = requests.get("https://max-api.maicoin.com/api/v3/tickers?markets[]=usdttwd", timeout=5)
+            s.response(response)
         if response.status_code == 200:
             data = response.json()
             for item in data:
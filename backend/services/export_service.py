@@ -0,0 +1,91 @@
+"""Streaming ledger export (CSV / NDJSON, optionally gzipped).
+
+Rows are read with ``yield_per`` so the driver fetches them in batches and
+nothing accumulates in the ORM identity map; each batch is encoded and
+handed to the response before the next one is read.  Peak memory is one
+batch regardless of ledger size.
+
+The generator opens its own session: a ``StreamingResponse`` body keeps
+running after the request-scoped ``get_db`` session may have been closed.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Callable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import database, models
+
+BATCH_SIZE = 1000
+
+COLUMNS = [
+    "id", "date", "asset_id", "asset_name", "ticker", "category",
+    "amount", "buy_price", "is_transfer", "note",
+]
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _ledger_rows(db: Session) -> Iterator:
+    T, A = models.Transaction, models.Asset
+    stmt = (
+        select(T.id, T.date, T.asset_id, A.name, A.ticker, A.category,
+               T.amount, T.buy_price, T.is_transfer, T.note)
+        .join(A, A.id == T.asset_id)
+        .order_by(T.date, T.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for partition in db.execute(stmt).partitions():
+        yield partition
+
+
+def _encode_csv(batch, header: bool) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(COLUMNS)
+    writer.writerows(
+        [r[0], r[1].isoformat() if r[1] else "", *r[2:8], bool(r[8]), r[9] or ""] for r in batch
+    )
+    return buf.getvalue()
+
+
+def _encode_ndjson(batch) -> str:
+    return "".join(
+        json.dumps(dict(zip(COLUMNS, (r[0], r[1].isoformat() if r[1] else None, *r[2:8], bool(r[8]), r[9]))),
+                   ensure_ascii=False) + "\n"
+        for r in batch
+    )
+
+
+def iter_ledger(fmt: str = "csv", gzip: bool = False,
+                session_factory: Callable[[], Session] | None = None) -> Iterator[bytes]:
+    """Yield the encoded ledger one batch at a time."""
+    db = (session_factory or database.SessionLocal)()
+    compressor = zlib.compressobj(wbits=31) if gzip else None   # 31 → gzip container
+    try:
+        first = True
+        for batch in _ledger_rows(db):
+            text = _encode_csv(batch, header=first) if fmt == "csv" else _encode_ndjson(batch)
+            first = False
+            data = text.encode()
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if first and fmt == "csv":   # empty ledger: header only
+            data = _encode_csv([], header=True).encode()
+            yield compressor.compress(data) if compressor else data
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
+
+
+def export_filename(fmt: str, gzip: bool) -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"ymoney_ledger_{timestamp}.{fmt}" + (".gz" if gzip else "")
@@ -0,0 +1,206 @@
+"""Monte Carlo net worth forecast for NET_WORTH goals.
+
+Monthly net worth is modelled as ``W[t+1] = W[t] * (1 + r[t]) + C[t]`` with
+normally distributed returns ``r`` and contributions ``C``.  Both are estimated
+from month-end NetWorthHistory snapshots:
+
+* OLS of ``ΔW`` on ``W`` gives the mean contribution (intercept) and mean
+  return (slope);
+* regressing the squared residuals on ``W²`` splits the residual variance
+  into a contribution part and a return part.
+
+Months are stepped in place over all paths at once, one float32 row of
+shocks per month, and paths come in antithetic pairs (the second half
+mirrors the first half's shocks), which halves the normal draws; 10k
+paths over 30 years take roughly 75 ms, almost all of it drawing normals.  One
+simulation serves every goal; results are cached per profile database until
+its snapshots or goals change.
+"""
+from datetime import date
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..observability import memory
+
+N_PATHS = 10_000            # default path count (5,000 antithetic pairs); ``forecast_paths`` setting
+MIN_PATHS = 1_000
+HORIZON_MONTHS = 30 * 12
+MIN_MONTHS = 6              # month-end points needed to fit the model
+MAX_MONTHS = 60             # only the last five years inform the estimate
+MAX_MONTHLY_RETURN = 0.05   # clamp on the fitted mean return (short histories overfit)
+MIN_MONTHLY_GROWTH = 0.5   # floor on a single month's growth factor (−50%)
+SEED = 20240101             # fixed so the same data yields the same forecast
+
+# {database url: (key, result)}: profiles have their own snapshots and goals.
+_cache: dict[str, tuple] = {}
+memory.register_cache("forecast_service.result", lambda: len(_cache))
+
+
+# ── Model fit ─────────────────────────────────────────────────────────────────
+
+def monthly_series(db: Session) -> np.ndarray:
+    """Month-end net worth values (last snapshot of each month), oldest first."""
+    by_month: dict[str, float] = {}
+    rows = (
+        db.query(models.NetWorthHistory.date, models.NetWorthHistory.value)
+        .order_by(models.NetWorthHistory.date)
+    )
+    for day, value in rows:
+        by_month[day[:7]] = value
+    values = list(by_month.values())[-MAX_MONTHS:]
+    return np.asarray(values, dtype=np.float64)
+
+
+def fit_model(values: np.ndarray) -> dict | None:
+    """Estimate monthly return / contribution mean and std; None if too little data."""
+    if len(values) < MIN_MONTHS:
+        return None
+    w, dw = values[:-1], np.diff(values)
+    X = np.column_stack([np.ones_like(w), w])
+    (mu_c, mu_r), *_ = np.linalg.lstsq(X, dw, rcond=None)
+    mu_r = float(np.clip(mu_r, -MAX_MONTHLY_RETURN, MAX_MONTHLY_RETURN))
+    mu_c = float(np.mean(dw - mu_r * w))
+
+    resid = dw - mu_c - mu_r * w
+    X2 = np.column_stack([np.ones_like(w), w * w])
+    (var_c, var_r), *_ = np.linalg.lstsq(X2, resid * resid, rcond=None)
+    var_c, var_r = max(float(var_c), 0.0), max(float(var_r), 0.0)
+    if var_c == 0.0 and var_r == 0.0:
+        safe_w = np.where(w > 0, w, np.nan)
+        var_r = float(np.nanvar(resid / safe_w)) if np.any(w > 0) else 0.0
+
+    return {
+        "monthly_return":           mu_r,
+        "monthly_return_std":       var_r ** 0.5,
+        "monthly_contribution":     mu_c,
+        "monthly_contribution_std": var_c ** 0.5,
+        "months_of_history":        len(values),
+    }
+
+
+# ── Simulation ────────────────────────────────────────────────────────────────
+
+def simulate_paths(w0: float, model: dict, n_paths: int = N_PATHS,
+                   months: int = HORIZON_MONTHS, seed: int = SEED) -> np.ndarray:
+    """Return a (n_paths, months) float32 array of simulated net worth.
+
+    Column ``t`` is the value at the end of month ``t + 1``.  The result is
+    the only path-sized allocation: each month draws ``n_paths / 2`` normals
+    per shock into reused row buffers.
+    """
+    rng = np.random.Generator(np.random.SFC64(seed))
+    out = np.empty((months, n_paths), dtype=np.float32)
+    z = np.empty((n_paths + 1) // 2, dtype=np.float32)
+    growth = np.empty(n_paths, dtype=np.float32)
+    contrib = np.empty(n_paths, dtype=np.float32)
+    growth_mean = np.float32(1.0 + model["monthly_return"])
+    growth_std = np.float32(model["monthly_return_std"])
+    contrib_mean = np.float32(model["monthly_contribution"])
+    contrib_std = np.float32(model["monthly_contribution_std"])
+    floor = np.float32(MIN_MONTHLY_GROWTH)
+
+    prev = np.full(n_paths, w0, dtype=np.float32)
+    # Extreme fitted volatility can overflow float32; such paths saturate.
+    with np.errstate(over="ignore", invalid="ignore"):
+        for t in range(months):
+            _antithetic(rng, z, growth, growth_mean, growth_std)
+            np.maximum(growth, floor, out=growth)
+            _antithetic(rng, z, contrib, contrib_mean, contrib_std)
+            row = out[t]
+            np.multiply(prev, growth, out=row)
+            row += contrib
+            prev = row
+    return out.T
+
+
+def _antithetic(rng: np.random.Generator, z: np.ndarray, dest: np.ndarray,
+                mean: np.float32, std: np.float32) -> None:
+    """Fill ``dest`` with ``mean ± std * z`` for one fresh draw of ``z``."""
+    rng.standard_normal(out=z, dtype=np.float32)
+    z *= std
+    half = len(z)
+    np.add(mean, z, out=dest[:half])
+    np.subtract(mean, z[:len(dest) - half], out=dest[half:])
+
+
+def arrival_months(paths: np.ndarray, targets: list[float]) -> np.ndarray:
+    """(len(targets), n_paths) first month reaching each target; inf if never."""
+    out = np.full((len(targets), paths.shape[0]), np.inf)
+    for i, target in enumerate(targets):
+        hit = paths >= np.float32(target)
+        reached = hit.any(axis=1)
+        out[i, reached] = hit[reached].argmax(axis=1) + 1
+    return out
+
+
+def _add_months(start: date, months: int) -> date:
+    total = start.year * 12 + start.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _label(today: date, months: float) -> str | None:
+    if not np.isfinite(months):
+        return None
+    return _add_months(today, int(months)).strftime("%b %Y")
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def path_count(db: Session) -> int:
+    """Paths per simulation: the ``forecast_paths`` setting, at least MIN_PATHS."""
+    setting = db.query(models.SystemSetting).filter_by(key="forecast_paths").first()
+    try:
+        return max(MIN_PATHS, int(setting.value)) if setting else N_PATHS
+    except ValueError:
+        return N_PATHS
+
+
+def _data_version(db: Session) -> tuple:
+    count, last = db.query(func.count(models.NetWorthHistory.id), func.max(models.NetWorthHistory.date)).one()
+    return count, last
+
+
+def forecast_goals(db: Session, current_nw: float, goals: list, today: date | None = None) -> dict | None:
+    """P10/P50/P90 arrival dates per goal, or None when history is too short.
+
+    Returns ``{"simulation": {...model, paths, horizon_years}, "goals": {goal_id: {...}}}``.
+    """
+    today = today or date.today()
+    url = str(db.get_bind().engine.url)
+    n_paths = path_count(db)
+    key = (_data_version(db), n_paths, round(current_nw, 0), tuple((g.id, g.target_amount) for g in goals), today)
+    cached = _cache.get(url)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    model = fit_model(monthly_series(db))
+    if model is None:
+        result = None
+    else:
+        pending = [g for g in goals if g.target_amount > current_nw]
+        by_goal = {}
+        if pending:
+            paths = simulate_paths(current_nw, model, n_paths=n_paths)
+            arrivals = arrival_months(paths, [g.target_amount for g in pending])
+            for goal, months in zip(pending, arrivals):
+                p10, p50, p90 = np.quantile(months, [0.1, 0.5, 0.9], method="inverted_cdf")
+                by_goal[goal.id] = {
+                    "p10_date":    _label(today, p10),
+                    "p50_date":    _label(today, p50),
+                    "p90_date":    _label(today, p90),
+                    "probability": round(float(np.isfinite(months).mean()), 3),
+                }
+        result = {
+            "simulation": {
+                **{k: round(v, 6) if isinstance(v, float) else v for k, v in model.items()},
+                "paths": n_paths,
+                "horizon_years": HORIZON_MONTHS // 12,
+            },
+            "goals": by_goal,
+        }
+
+    _cache[url] = (key, result)
+    return result
@@ -0,0 +1,157 @@
+"""Point-in-time holdings ("what did I hold on date X").
+
+HoldingCheckpoint stores each asset's cumulative quantity and cost at the end
+of every completed month with activity.  An as-of query takes the latest
+checkpoint before the target month per asset (an index seek on
+``(asset_id, month)``) and replays the asset's transactions after it, so with
+current checkpoints the work is bounded by one month of activity rather than
+the whole ledger.
+
+Queries are read-only: checkpoints are appended for newly completed months by
+``ensure_checkpoints``, run from the scheduled snapshot and at startup.  Any
+transaction written, edited or deleted in a month drops that asset's
+checkpoints from that month on (``invalidate``); until they are rebuilt the
+query replays that asset's ledger from its last remaining checkpoint.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from .. import models
+
+EPS = 1e-9
+
+
+def _month(d) -> str:
+    return d.strftime("%Y-%m")
+
+
+def _month_start(month: str) -> datetime:
+    return datetime.strptime(month + "-01", "%Y-%m-%d")
+
+
+def invalidate(db: Session, asset_id: int, since=None) -> None:
+    """Drop checkpoints of ``asset_id`` from the month of ``since`` (all if None).  Does not commit."""
+    query = db.query(models.HoldingCheckpoint).filter(models.HoldingCheckpoint.asset_id == asset_id)
+    if since is not None:
+        query = query.filter(models.HoldingCheckpoint.month >= _month(since))
+    query.delete(synchronize_session=False)
+
+
+def ensure_checkpoints(db: Session, today: date | None = None) -> int:
+    """Append checkpoints for completed months not yet covered; returns rows written.
+
+    Only transactions after each asset's latest checkpoint are aggregated.
+    """
+    today = today or date.today()
+    T, H = models.Transaction, models.HoldingCheckpoint
+    last = (
+        db.query(H.asset_id.label("asset_id"), func.max(H.month).label("month"))
+        .group_by(H.asset_id)
+        .subquery()
+    )
+    # "YYYY-MM-32" sorts after every timestamp in month YYYY-MM and before the next month.
+    after = func.coalesce(last.c.month + "-32", "")
+    month = func.strftime("%Y-%m", T.date)
+    rows = (
+        db.query(
+            T.asset_id, month,
+            func.sum(T.amount), func.sum(T.amount * func.coalesce(T.buy_price, 0.0)), func.count(T.id),
+        )
+        .select_from(models.Asset)
+        .outerjoin(last, last.c.asset_id == models.Asset.id)
+        .join(T, and_(
+            T.asset_id == models.Asset.id,
+            T.date > after,
+            T.date < _month_start(_month(today)),
+        ))
+        .group_by(T.asset_id, month)
+        .order_by(T.asset_id, month)
+        .all()
+    )
+    if not rows:
+        return 0
+
+    asset_ids = {r[0] for r in rows}
+    running = {
+        h.asset_id: (h.quantity, h.cost, h.tx_count)
+        for h in db.query(H).join(last, and_(last.c.asset_id == H.asset_id, last.c.month == H.month))
+        .filter(H.asset_id.in_(asset_ids))
+    }
+    new_rows = []
+    for asset_id, mon, qty, cost, count in rows:
+        q0, c0, n0 = running.get(asset_id, (0.0, 0.0, 0))
+        running[asset_id] = (q0 + (qty or 0.0), c0 + (cost or 0.0), n0 + count)
+        q, c, n = running[asset_id]
+        new_rows.append({"asset_id": asset_id, "month": mon, "quantity": q, "cost": c, "tx_count": n})
+    db.bulk_insert_mappings(H, new_rows)
+    db.commit()
+    return len(new_rows)
+
+
+def holdings_as_of(db: Session, as_of: date) -> list[dict]:
+    """Quantity and cost of every asset held at the end of ``as_of``.
+
+    ``price``/``value_twd`` come from that day's AssetValueHistory row when
+    one exists, else None.
+    """
+    T, H = models.Transaction, models.HoldingCheckpoint
+    tail_month = min(_month(as_of), _month(date.today()))
+
+    base = (
+        db.query(H.asset_id.label("asset_id"), func.max(H.month).label("month"))
+        .filter(H.month < tail_month)
+        .group_by(H.asset_id)
+        .subquery()
+    )
+    state: dict[int, list[float]] = {
+        h.asset_id: [h.quantity, h.cost]
+        for h in db.query(H).join(base, and_(base.c.asset_id == H.asset_id, base.c.month == H.month))
+    }
+    end = datetime.combine(as_of + timedelta(days=1), datetime.min.time())
+    # Everything after each asset's checkpoint (the whole ledger without one);
+    # "YYYY-MM-32" sorts after every timestamp in month YYYY-MM.
+    tail = (
+        db.query(T.asset_id, func.sum(T.amount), func.sum(T.amount * func.coalesce(T.buy_price, 0.0)))
+        .select_from(models.Asset)
+        .outerjoin(base, base.c.asset_id == models.Asset.id)
+        .join(T, and_(
+            T.asset_id == models.Asset.id,
+            T.date > func.coalesce(base.c.month + "-32", ""),
+            T.date < end,
+        ))
+        .group_by(T.asset_id)
+    )
+    for asset_id, qty, cost in tail:
+        s = state.setdefault(asset_id, [0.0, 0.0])
+        s[0] += qty or 0.0
+        s[1] += cost or 0.0
+
+    held = {a: s for a, s in state.items() if abs(s[0]) > EPS}
+    if not held:
+        return []
+    assets = db.query(models.Asset).filter(models.Asset.id.in_(list(held))).all()
+    values = {
+        v.asset_id: v for v in
+        db.query(models.AssetValueHistory).filter(
+            models.AssetValueHistory.date == as_of.strftime("%Y-%m-%d"),
+            models.AssetValueHistory.asset_id.in_(list(held)),
+        )
+    }
+    result = []
+    for asset in sorted(assets, key=lambda a: (a.category or "", a.name or "")):
+        qty, cost = held[asset.id]
+        v = values.get(asset.id)
+        result.append({
+            "asset_id":     asset.id,
+            "name":         asset.name,
+            "ticker":       asset.ticker,
+            "category":     asset.category,
+            "sub_category": asset.sub_category,
+            "quantity":     qty,
+            "cost":         cost,
+            "price":        v.price if v else None,
+            "value_twd":    v.value_twd if v else None,
+        })
+    return result
@@ -0,0 +1,247 @@
+"""Bulk transaction import from CSV / NDJSON.
+
+The file is parsed as a stream and handled ``BATCH_SIZE`` rows at a time:
+each batch is validated in Python against an in-memory asset index (one
+query up front), then written with a single ``executemany`` INSERT.  Batches
+are committed every ``COMMIT_ROWS`` rows, so a large import never holds
+the write lock for long and memory stays at one batch.
+
+Derived state is updated once at the end rather than per row: holding
+checkpoints are dropped per asset from the month of its earliest imported
+row, the recorded daily history is restated with the imported quantities
+(per asset and day, see snapshot_service.restate_history), and the imported
+assets' lots are synced (rebuilt when the import is back-dated, see
+lot_service).
+
+Columns match the ledger export (``asset_id`` / ``ticker`` / ``asset_name``,
+``amount``, ``buy_price``, ``date``, ``is_transfer``, ``note``); ``asset`` is
+accepted as a name-or-ticker alias.  Invalid rows are skipped and reported.
+"""
+import csv
+import io
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import IO, Iterable, Iterator
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .. import models
+from . import holdings_service, lot_service, snapshot_service
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+COMMIT_ROWS = 20_000
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("csv", "ndjson")
+_TRUE = {"1", "true", "yes", "y", "t"}
+_FALSE = {"", "0", "false", "no", "n", "f"}
+
+
+class RowError(ValueError):
+    pass
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+
+def _text(stream: IO[bytes]) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def parse_csv(stream: IO[bytes]) -> Iterator[dict]:
+    yield from csv.DictReader(_text(stream))
+
+
+def parse_ndjson(stream: IO[bytes]) -> Iterator[dict]:
+    for line_no, line in enumerate(_text(stream), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"__error__": f"invalid JSON on line {line_no}: {e.msg}"}
+            continue
+        yield obj if isinstance(obj, dict) else {"__error__": f"line {line_no} is not an object"}
+
+
+# ── Validation ────────────────────────────────────────────────────────────────
+
+class AssetIndex:
+    """Resolve an asset by id, ticker (case-insensitive) or exact name."""
+
+    def __init__(self, db: Session) -> None:
+        self.ids: set[int] = set()
+        self.by_ticker: dict[str, int | None] = {}
+        self.by_name: dict[str, int | None] = {}
+        for asset_id, name, ticker in db.query(models.Asset.id, models.Asset.name, models.Asset.ticker):
+            self.ids.add(asset_id)
+            # None marks an ambiguous key (shared by several assets).
+            if ticker:
+                key = ticker.strip().upper()
+                self.by_ticker[key] = None if key in self.by_ticker else asset_id
+            if name:
+                key = name.strip().lower()
+                self.by_name[key] = None if key in self.by_name else asset_id
+
+    def resolve(self, row: dict) -> int:
+        raw_id = row.get("asset_id")
+        if raw_id not in (None, ""):
+            try:
+                asset_id = int(raw_id)
+            except (TypeError, ValueError):
+                raise RowError(f"invalid asset_id {raw_id!r}")
+            if asset_id not in self.ids:
+                raise RowError(f"unknown asset_id {asset_id}")
+            return asset_id
+
+        ticker, name, alias = (_field(row, k) for k in ("ticker", "asset_name", "asset"))
+        lookups = []
+        if ticker:
+            lookups.append((ticker, self.by_ticker, str.upper))
+        if name:
+            lookups.append((name, self.by_name, str.lower))
+        if alias:   # name first, then ticker
+            lookups += [(alias, self.by_name, str.lower), (alias, self.by_ticker, str.upper)]
+        if not lookups:
+            raise RowError("missing asset_id, ticker or asset_name")
+        for value, index, fold in lookups:
+            key = fold(value)
+            if key in index:
+                if index[key] is None:
+                    raise RowError(f"{value!r} matches several assets")
+                return index[key]
+        raise RowError(f"unknown asset {lookups[0][0]!r}")
+
+
+def _field(row: dict, key: str) -> str:
+    value = row.get(key)
+    return str(value).strip() if value is not None else ""
+
+
+def _float(row: dict, key: str, default: float | None = None) -> float:
+    value = row.get(key)
+    if value in (None, ""):
+        if default is None:
+            raise RowError(f"missing {key}")
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"invalid {key} {value!r}")
+
+
+def _date(value) -> datetime:
+    if value in (None, ""):
+        raise RowError("missing date")
+    try:
+        return datetime.fromisoformat(str(value).strip()).replace(tzinfo=None)
+    except ValueError:
+        raise RowError(f"invalid date {value!r}")
+
+
+def _bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else "").strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise RowError(f"invalid is_transfer {value!r}")
+
+
+def validate_row(row: dict, assets: AssetIndex) -> dict:
+    """Map one parsed row to Transaction column values; raises RowError."""
+    if "__error__" in row:
+        raise RowError(row["__error__"])
+    return {
+        "asset_id":    assets.resolve(row),
+        "amount":      _float(row, "amount"),
+        "buy_price":   _float(row, "buy_price", default=0.0),
+        "date":        _date(row.get("date")),
+        "is_transfer": _bool(row.get("is_transfer")),
+        "note":        (row.get("note") or None),
+    }
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ── Import ────────────────────────────────────────────────────────────────────
+
+def import_transactions(db: Session, stream: IO[bytes], fmt: str = "csv", dry_run: bool = False) -> dict:
+    """Import a CSV / NDJSON ledger; returns counts and the first errors.
+
+    With ``dry_run`` rows are only validated.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt}")
+    rows = parse_csv(stream) if fmt == "csv" else parse_ndjson(stream)
+    assets = AssetIndex(db)
+    insert = models.Transaction.__table__.insert()
+
+    imported = failed = pending_commit = 0
+    errors: list[dict] = []
+    earliest: dict[int, datetime] = {}
+    deltas: dict[tuple, float] = defaultdict(float)
+    row_no = 0
+    for batch in _batches(rows, BATCH_SIZE):
+        valid = []
+        for row in batch:
+            row_no += 1
+            try:
+                values = validate_row(row, assets)
+            except RowError as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": row_no, "error": str(e)})
+                continue
+            valid.append(values)
+            asset_id, day = values["asset_id"], values["date"]
+            if asset_id not in earliest or day < earliest[asset_id]:
+                earliest[asset_id] = day
+            deltas[(asset_id, day.date())] += values["amount"]
+        if not valid or dry_run:
+            imported += len(valid)
+            continue
+        db.connection().execute(insert, valid)
+        imported += len(valid)
+        pending_commit += len(valid)
+        if pending_commit >= COMMIT_ROWS:
+            db.commit()
+            pending_commit = 0
+
+    if earliest and not dry_run:
+        for asset_id, since in earliest.items():
+            holdings_service.invalidate(db, asset_id, since)
+        snapshot_service.restate_history(db, deltas)
+        db.execute(
+            update(models.Asset)
+            .where(models.Asset.id.in_(list(earliest)))
+            .values(last_updated_at=datetime.now())
+        )
+        db.commit()
+        lot_service.sync_lots(db, list(earliest))
+        logger.info(f"Imported {imported} transactions into {len(earliest)} assets ({failed} rows rejected)")
+
+    return {
+        "imported": imported,
+        "failed":   failed,
+        "assets":   len(earliest),
+        "earliest": min(earliest.values()) if earliest else None,
+        "dry_run":  dry_run,
+        "errors":   errors,
+    }
@@ -0,0 +1,224 @@
+"""Lot-based cost basis with realized P&L, maintained incrementally.
+
+Each asset's transactions are folded, in (date, id) order, into open lots
+and realized-gain rows.  A per-asset LotCheckpoint records the last folded
+transaction, so ``sync_lots`` only touches transactions added since then.
+An asset is rebuilt from its full ledger when:
+
+* a new transaction is dated before the checkpoint (back-dated entry);
+* a transaction is edited or deleted (the repository calls ``invalidate``);
+* the ``cost_basis_method`` setting changes.
+
+Writers sync: the repository after a transaction write, the importer,
+provider syncs, the settings endpoint and the scheduled snapshot (which
+also picks up anything written elsewhere).  Reads only query lots, so
+a GET never writes or waits on the sync lock.
+
+Positive amounts open lots at ``buy_price``.  Negative amounts close lots
+(FIFO) or reduce the pooled lot (average cost); ``buy_price`` is the sale
+price.  Transfers and zero-price disposals (e.g. wallet balance syncs) leave
+at cost and realize nothing.  Quantity sold beyond the open lots has no
+known basis and is ignored.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+FIFO = "fifo"
+AVERAGE = "average"
+METHODS = (FIFO, AVERAGE)
+DEFAULT_METHOD = FIFO
+
+EPS = 1e-9
+
+# One lock per database: profiles refreshed in parallel don't wait on each other.
+_sync_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+_sync_locks_guard = threading.Lock()
+
+
+def cost_basis_method(db: Session) -> str:
+    setting = db.query(models.SystemSetting).filter_by(key="cost_basis_method").first()
+    method = (setting.value or "").lower() if setting else DEFAULT_METHOD
+    return method if method in METHODS else DEFAULT_METHOD
+
+
+def invalidate(db: Session, asset_id: int) -> None:
+    """Drop an asset's lots, gains and checkpoint so the next sync rebuilds it.  Does not commit."""
+    for model in (models.Lot, models.RealizedGain, models.LotCheckpoint):
+        db.query(model).filter(model.asset_id == asset_id).delete(synchronize_session=False)
+
+
+# ── Fold ──────────────────────────────────────────────────────────────────────
+
+def _apply(db: Session, method: str, lots: list[models.Lot], tx: models.Transaction) -> None:
+    """Fold one transaction into ``lots`` (open lots, oldest first), in place."""
+    qty = tx.amount or 0.0
+    price = tx.buy_price or 0.0
+    if qty > EPS:
+        if method == AVERAGE and lots:
+            pool = lots[0]
+            total_cost = pool.remaining * pool.unit_cost + qty * price
+            pool.quantity += qty
+            pool.remaining += qty
+            pool.unit_cost = total_cost / pool.remaining
+        else:
+            lot = models.Lot(
+                asset_id=tx.asset_id, transaction_id=tx.id, opened_at=tx.date,
+                quantity=qty, remaining=qty, unit_cost=price,
+            )
+            db.add(lot)
+            lots.append(lot)
+        return
+    if qty > -EPS:
+        return
+
+    to_close = -qty
+    matched = cost = 0.0
+    while to_close > EPS and lots:
+        lot = lots[0]
+        take = min(lot.remaining, to_close)
+        lot.remaining -= take
+        matched += take
+        cost += take * lot.unit_cost
+        to_close -= take
+        if lot.remaining <= EPS:
+            lot.remaining = 0.0
+            lots.pop(0)
+
+    if matched > EPS and price > 0 and not tx.is_transfer:
+        proceeds = matched * price
+        db.add(models.RealizedGain(
+            asset_id=tx.asset_id, transaction_id=tx.id, closed_at=tx.date,
+            quantity=matched, proceeds=proceeds, cost_basis=cost, gain=proceeds - cost,
+        ))
+
+
+def _open_lots(db: Session, asset_id: int) -> list[models.Lot]:
+    return (
+        db.query(models.Lot)
+        .filter(models.Lot.asset_id == asset_id, models.Lot.remaining > EPS)
+        .order_by(models.Lot.opened_at, models.Lot.id)
+        .all()
+    )
+
+
+def _fold(db: Session, method: str, asset_id: int, txs: list, checkpoint) -> None:
+    if checkpoint is None:
+        checkpoint = models.LotCheckpoint(asset_id=asset_id, method=method)
+        db.add(checkpoint)
+        lots = []
+    else:
+        lots = _open_lots(db, asset_id)
+    for tx in txs:
+        _apply(db, method, lots, tx)
+    checkpoint.last_transaction_id = max(t.id for t in txs)
+    checkpoint.last_date = txs[-1].date
+    checkpoint.updated_at = datetime.now()
+
+
+def sync_lots(db: Session, asset_ids: list[int] | None = None) -> int:
+    """Fold pending transactions into lots; returns the number processed.
+
+    One query fetches every transaction newer than its asset's checkpoint.
+    Commits when anything changed.  Serialized per database: two requests
+    folding the same pending transactions would double-apply them (or race
+    on the first checkpoint insert).
+    """
+    with _sync_locks_guard:
+        lock = _sync_locks[str(db.get_bind().engine.url)]
+    with lock:
+        return _sync_lots(db, asset_ids)
+
+
+def _sync_lots(db: Session, asset_ids: list[int] | None) -> int:
+    method = cost_basis_method(db)
+    stale = [
+        cp.asset_id for cp in
+        db.query(models.LotCheckpoint.asset_id).filter(models.LotCheckpoint.method != method)
+    ]
+    for asset_id in stale:
+        invalidate(db, asset_id)
+
+    T, C, A = models.Transaction, models.LotCheckpoint, models.Asset
+    # Driven from assets so each asset is an index range seek on
+    # (asset_id, rowid > checkpoint) rather than a scan of the ledger.
+    query = (
+        db.query(T)
+        .select_from(A)
+        .outerjoin(C, C.asset_id == A.id)
+        .join(T, and_(T.asset_id == A.id, T.id > func.coalesce(C.last_transaction_id, 0)))
+    )
+    if asset_ids is not None:
+        query = query.filter(A.id.in_(asset_ids))
+    pending: dict[int, list] = defaultdict(list)
+    for tx in query.order_by(T.asset_id, T.date, T.id):
+        pending[tx.asset_id].append(tx)
+
+    if not pending and not stale:
+        return 0
+
+    checkpoints = {
+        cp.asset_id: cp for cp in
+        db.query(C).filter(C.asset_id.in_(list(pending)))
+    }
+    processed = 0
+    for asset_id, txs in pending.items():
+        checkpoint = checkpoints.get(asset_id)
+        if checkpoint is not None and (txs[0].date or datetime.min) < (checkpoint.last_date or datetime.min):
+            logger.info(f"Back-dated transaction for asset {asset_id}; rebuilding lots")
+            invalidate(db, asset_id)
+            db.expunge(checkpoint)   # its row is gone; a fresh one is added by _fold
+            db.flush()
+            checkpoint = None
+            txs = db.query(T).filter(T.asset_id == asset_id).order_by(T.date, T.id).all()
+        _fold(db, method, asset_id, txs, checkpoint)
+        processed += len(txs)
+    db.commit()
+    return processed
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def open_cost_by_asset(db: Session, asset_ids: list[int] | None = None) -> dict[int, float]:
+    """{asset_id: cost of open lots (native currency)} as of the last sync."""
+    query = (
+        db.query(models.Lot.asset_id, func.sum(models.Lot.remaining * models.Lot.unit_cost))
+        .filter(models.Lot.remaining > EPS)
+    )
+    if asset_ids is not None:
+        query = query.filter(models.Lot.asset_id.in_(asset_ids))
+    return {asset_id: cost or 0.0 for asset_id, cost in query.group_by(models.Lot.asset_id)}
+
+
+def realized_by_asset(db: Session, asset_id: int | None = None) -> list[dict]:
+    """Realized P&L per asset in native currency."""
+    G = models.RealizedGain
+    query = db.query(
+        G.asset_id, func.sum(G.gain), func.sum(G.proceeds), func.sum(G.cost_basis), func.count(G.id)
+    )
+    if asset_id is not None:
+        query = query.filter(G.asset_id == asset_id)
+    return [
+        {"asset_id": a, "realized": gain, "proceeds": proceeds, "cost_basis": cost, "trades": n}
+        for a, gain, proceeds, cost, n in query.group_by(G.asset_id)
+    ]
+
+
+def realized_by_year(db: Session) -> list[dict]:
+    """Realized P&L per (year, asset) in native currency, oldest year first."""
+    G = models.RealizedGain
+    year = func.strftime("%Y", G.closed_at)
+    rows = (
+        db.query(year, G.asset_id, func.sum(G.gain), func.count(G.id))
+        .group_by(year, G.asset_id)
+        .order_by(year)
+    )
+    return [{"year": int(y), "asset_id": a, "realized": gain, "trades": n} for y, a, gain, n in rows]
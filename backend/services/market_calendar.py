@@ -0,0 +1,167 @@
+"""Exchange trading calendars used to skip price refreshes for closed markets.
+
+Covers the two stock markets the app quotes (TWSE and US equities) with
+regular-session hours, weekends and the rule-based / fixed-date holidays.
+Lunar-calendar TWSE holidays (Lunar New Year, Dragon Boat, Mid-Autumn) are
+not modelled; on those days the market simply looks open and a refresh
+returns the previous close.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from ..observability import memory
+
+CRYPTO = "CRYPTO"
+TW = "TW"
+US = "US"
+
+# A closed market is refreshed once more if the asset's last update predates
+# the session close by less than this — picks up the official closing print.
+CLOSE_SETTLE = timedelta(minutes=20)
+
+
+@dataclass(frozen=True)
+class Market:
+    tz: ZoneInfo
+    open: time
+    close: time
+
+
+MARKETS = {
+    TW: Market(ZoneInfo("Asia/Taipei"),      time(9, 0),  time(13, 30)),
+    US: Market(ZoneInfo("America/New_York"), time(9, 30), time(16, 0)),
+}
+
+
+# ── Asset → market ────────────────────────────────────────────────────────────
+
+def asset_market(asset) -> str | None:
+    """Return CRYPTO / TW / US for assets with a live quote, else None."""
+    if not asset.ticker:
+        return None
+    if asset.category == "Crypto" or (asset.sub_category and "Crypto" in asset.sub_category):
+        return CRYPTO
+    if asset.category == "Stock":
+        t = asset.ticker
+        if t.endswith(".TW") or t.endswith(".TWO") or (t.isdigit() and len(t) == 4):
+            return TW
+        return US
+    return None
+
+
+# ── Holidays ──────────────────────────────────────────────────────────────────
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    d = date(year, month, 1)
+    d += timedelta(days=(weekday - d.weekday()) % 7)
+    return d + timedelta(weeks=n - 1)
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    d = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(d: date) -> date:
+    """NYSE rule: Saturday holidays move to Friday, Sunday holidays to Monday."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=32)
+def holidays(market: str, year: int) -> frozenset[date]:
+    if market == US:
+        days = {
+            _observed(date(year, 1, 1)),
+            _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+            _nth_weekday(year, 2, 0, 3),    # Presidents' Day
+            _easter(year) - timedelta(days=2),  # Good Friday
+            _last_weekday(year, 5, 0),      # Memorial Day
+            _observed(date(year, 6, 19)),   # Juneteenth
+            _observed(date(year, 7, 4)),
+            _nth_weekday(year, 9, 0, 1),    # Labor Day
+            _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+            _observed(date(year, 12, 25)),
+        }
+        return frozenset(days)
+    if market == TW:
+        return frozenset({
+            date(year, 1, 1),
+            date(year, 2, 28),   # Peace Memorial Day
+            date(year, 4, 4),    # Children's Day
+            date(year, 5, 1),    # Labour Day
+            date(year, 10, 10),  # National Day
+        })
+    return frozenset()
+
+
+# ── Session queries ───────────────────────────────────────────────────────────
+
+def is_trading_day(market: str, day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(market, day.year)
+
+
+def _local_now(market: Market, now: datetime | None) -> datetime:
+    if now is None:
+        return datetime.now(market.tz)
+    if now.tzinfo is None:
+        now = now.astimezone()  # naive timestamps are server-local
+    return now.astimezone(market.tz)
+
+
+def is_open(market: str, now: datetime | None = None) -> bool:
+    if market == CRYPTO:
+        return True
+    m = MARKETS[market]
+    local = _local_now(m, now)
+    return is_trading_day(market, local.date()) and m.open <= local.time() < m.close
+
+
+def last_close(market: str, now: datetime | None = None) -> datetime | None:
+    """Most recent session close at or before ``now`` (aware datetime)."""
+    if market == CRYPTO:
+        return None
+    m = MARKETS[market]
+    local = _local_now(m, now)
+    day = local.date()
+    if local.time() < m.close:
+        day -= timedelta(days=1)
+    for _ in range(15):
+        if is_trading_day(market, day):
+            return datetime.combine(day, m.close, tzinfo=m.tz)
+        day -= timedelta(days=1)
+    return None
+
+
+def needs_refresh(market: str, last_updated_at: datetime | None, now: datetime | None = None) -> bool:
+    """True while the market is open, or once after close to capture the final print."""
+    if last_updated_at is None or market == CRYPTO or is_open(market, now):
+        return True
+    close = last_close(market, now)
+    if close is None:
+        return False
+    updated = last_updated_at if last_updated_at.tzinfo else last_updated_at.astimezone()
+    return updated < close + CLOSE_SETTLE
+
+
+memory.register_cache("market_calendar.holidays", lambda: holidays.cache_info().currsize)
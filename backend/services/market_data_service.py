@@ -0,0 +1,248 @@
+"""Read-through access to the shared market database (``market_db``).
+
+Price, history and FX fetchers ask here before going upstream and store
+what they fetch, so each market fact is fetched once for all profiles.
+
+* Quotes are reused while ``market_calendar`` says the market needs no
+  refresh (a closed market after its final print), or for ``QUOTE_TTL``
+  while it trades.  A ticker whose fetch fails is retried after
+  ``QUOTE_RETRY``, doubling per consecutive failure up to ``QUOTE_RETRY_MAX``.
+* Daily closes are reused for ``HISTORY_TTL``; after that only the last
+  ``HISTORY_OVERLAP`` of a symbol's window is fetched again.
+* FX rates form a daily series; the latest one is reused by every profile.
+
+A market.db error is logged and treated as "nothing cached": a broken cache
+must never block a refresh.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .. import market_db
+from . import market_calendar
+
+logger = logging.getLogger(__name__)
+
+QUOTE_TTL = timedelta(seconds=60)
+QUOTE_RETRY = timedelta(minutes=15)
+QUOTE_RETRY_MAX = timedelta(hours=6)
+HISTORY_TTL = timedelta(hours=1)
+# Refetched tail of a cached window: covers the still-open day and late revisions.
+HISTORY_OVERLAP = timedelta(days=7)
+# A window whose first close is this close to the requested start still covers
+# it: the gap is weekends and market holidays.
+HISTORY_START_GRACE = timedelta(days=7)
+
+USDT_TWD = "USDT/TWD"
+
+
+def _upsert(db, model, rows: list[dict], keys: list[str]) -> None:
+    if not rows:
+        return
+    stmt = sqlite_insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={c: stmt.excluded[c] for c in rows[0] if c not in keys},
+    )
+    db.execute(stmt)
+
+
+# ── Quotes ────────────────────────────────────────────────────────────────────
+
+def cached_quotes(keys, now: datetime | None = None) -> dict[tuple[str, str], float]:
+    """Stored prices for the (market, ticker) ``keys`` that are still current."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    try:
+        with market_db.session() as db:
+            rows = (
+                db.query(market_db.Quote)
+                .filter(market_db.Quote.ticker.in_(sorted({t for _, t in keys})))
+                .all()
+            )
+    except Exception as e:
+        logger.error(f"Reading cached quotes failed: {e}")
+        return {}
+    wall = datetime.now()
+    return {
+        (r.market, r.ticker): r.price
+        for r in rows
+        if (r.market, r.ticker) in keys and (
+            wall - r.fetched_at < QUOTE_TTL
+            or not market_calendar.needs_refresh(r.market, r.fetched_at, now)
+        )
+    }
+
+
+def store_quotes(quotes: dict[tuple[str, str], float]) -> None:
+    fetched_at = datetime.now()
+    rows = [
+        {"market": m, "ticker": t, "price": price, "fetched_at": fetched_at}
+        for (m, t), price in quotes.items()
+    ]
+    try:
+        with market_db.session() as db:
+            _upsert(db, market_db.Quote, rows, ["market", "ticker"])
+            F = market_db.QuoteFailure
+            db.query(F).filter(tuple_(F.market, F.ticker).in_(list(quotes))).delete(synchronize_session=False)
+            db.commit()
+    except Exception as e:
+        logger.error(f"Storing {len(rows)} quotes failed: {e}")
+
+
+def backed_off(keys) -> set[tuple[str, str]]:
+    """The (market, ticker) ``keys`` whose last fetch failed and whose retry is not due yet."""
+    keys = set(keys)
+    if not keys:
+        return set()
+    F = market_db.QuoteFailure
+    try:
+        with market_db.session() as db:
+            rows = (
+                db.query(F.market, F.ticker)
+                .filter(F.ticker.in_(sorted({t for _, t in keys})), F.retry_at > datetime.now())
+                .all()
+            )
+    except Exception as e:
+        logger.error(f"Reading quote failures failed: {e}")
+        return set()
+    return {(m, t) for m, t in rows if (m, t) in keys}
+
+
+def record_failures(keys) -> None:
+    """Push back the next fetch of quotes that failed (see ``QUOTE_RETRY``)."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return
+    now = datetime.now()
+    F = market_db.QuoteFailure
+    try:
+        with market_db.session() as db:
+            failures = {
+                (m, t): n for m, t, n in
+                db.query(F.market, F.ticker, F.failures).filter(tuple_(F.market, F.ticker).in_(keys))
+            }
+            rows = []
+            for m, t in keys:
+                n = failures.get((m, t), 0) + 1
+                delay = min(QUOTE_RETRY * 2 ** (n - 1), QUOTE_RETRY_MAX)
+                rows.append({"market": m, "ticker": t, "failures": n, "retry_at": now + delay})
+            _upsert(db, F, rows, ["market", "ticker"])
+            db.commit()
+    except Exception as e:
+        logger.error(f"Recording {len(keys)} quote failures failed: {e}")
+
+
+# ── Daily history ─────────────────────────────────────────────────────────────
+
+def history_plan(symbols: list[str], start: date) -> dict[date, list[str]]:
+    """Symbols that must be downloaded to serve ``start``..today, grouped by download start."""
+    try:
+        with market_db.session() as db:
+            ranges = {
+                r.symbol: r for r in
+                db.query(market_db.HistoryRange).filter(market_db.HistoryRange.symbol.in_(symbols))
+            }
+    except Exception as e:
+        logger.error(f"Reading history ranges failed: {e}")
+        ranges = {}
+    now = datetime.now()
+    plan: dict[date, list[str]] = defaultdict(list)
+    for symbol in dict.fromkeys(symbols):
+        r = ranges.get(symbol)
+        if r is None or r.first_date > start + HISTORY_START_GRACE:
+            plan[start].append(symbol)
+        elif now - r.fetched_at >= HISTORY_TTL:
+            plan[max(start, r.fetched_at.date() - HISTORY_OVERLAP)].append(symbol)
+    return dict(plan)
+
+
+def store_history(since: date, closes: dict[str, dict[str, float]]) -> None:
+    """Record a download from ``since`` to today of the symbols in ``closes``.
+
+    Only symbols that returned closes get a cached window, starting at their
+    first returned date: a failed or partial download (yfinance returns an
+    all-NaN column) must not mark the window as covered.
+    """
+    fetched_at = datetime.now()
+    returned = {s: series for s, series in closes.items() if series}
+    if not returned:
+        return
+    try:
+        with market_db.session() as db:
+            rows = [
+                {"symbol": s, "date": d, "close": v}
+                for s, series in returned.items() for d, v in series.items()
+            ]
+            for i in range(0, len(rows), 500):
+                _upsert(db, market_db.DailyClose, rows[i:i + 500], ["symbol", "date"])
+            existing = {
+                r.symbol: r for r in
+                db.query(market_db.HistoryRange).filter(market_db.HistoryRange.symbol.in_(list(returned)))
+            }
+            ranges = []
+            for s, series in returned.items():
+                first = datetime.strptime(min(series), "%Y-%m-%d").date()
+                r = existing.get(s)
+                if r is not None and since <= r.fetched_at.date() + timedelta(days=1):
+                    first = min(r.first_date, first)
+                ranges.append({"symbol": s, "first_date": first, "fetched_at": fetched_at})
+            _upsert(db, market_db.HistoryRange, ranges, ["symbol"])
+            db.commit()
+    except Exception as e:
+        logger.error(f"Storing history for {len(returned)} symbols failed: {e}")
+
+
+def load_history(symbols: list[str], start: date) -> dict[str, dict[str, float]]:
+    """Stored closes from ``start`` on, as {symbol: {YYYY-MM-DD: close}}."""
+    history: dict[str, dict[str, float]] = {}
+    try:
+        with market_db.session() as db:
+            rows = (
+                db.query(market_db.DailyClose.symbol, market_db.DailyClose.date, market_db.DailyClose.close)
+                .filter(
+                    market_db.DailyClose.symbol.in_(symbols),
+                    market_db.DailyClose.date >= start.strftime("%Y-%m-%d"),
+                )
+                .all()
+            )
+    except Exception as e:
+        logger.error(f"Reading history failed: {e}")
+        return history
+    for symbol, day, close in rows:
+        history.setdefault(symbol, {})[day] = close
+    return history
+
+
+# ── FX ────────────────────────────────────────────────────────────────────────
+
+def latest_fx(pair: str) -> tuple[float, datetime] | None:
+    """(rate, updated_at) of the newest stored rate for ``pair``."""
+    try:
+        with market_db.session() as db:
+            row = (
+                db.query(market_db.FxRate)
+                .filter_by(pair=pair)
+                .order_by(market_db.FxRate.date.desc())
+                .first()
+            )
+            return (row.rate, row.updated_at) if row else None
+    except Exception as e:
+        logger.error(f"Reading {pair} rate failed: {e}")
+        return None
+
+
+def store_fx(pair: str, rate: float) -> None:
+    now = datetime.now()
+    try:
+        with market_db.session() as db:
+            _upsert(db, market_db.FxRate,
+                    [{"pair": pair, "date": now.strftime("%Y-%m-%d"), "rate": rate, "updated_at": now}],
+                    ["pair", "date"])
+            db.commit()
+    except Exception as e:
+        logger.error(f"Storing {pair} rate failed: {e}")
@@ -4,9 +4,14 @@ import logging
 import yfinance as yf
 import ccxt
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from itertools import zip_longest
 from sqlalchemy.orm import Session
 
+from .. import models
+from ..observability import tracing
 from ..repositories.asset_repo import AssetRepository
+from . import market_calendar, market_data_service
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +21,11 @@ def fetch_stock_price(ticker: str) -> float:
         ticker = f"{ticker}.TW"
     for attempt in range(3):
         try:
-            data = yf.Ticker(ticker)
-            history = data.history(period="1d")
+            with tracing.span("yfinance", "history", ticker) as s:
+                history = yf.Ticker(ticker).history(period="1d")
+                s.size = tracing.frame_bytes(history)
+                if history.empty:
+                    s.fail("empty history")
             if not history.empty:
                 return float(history["Close"].iloc[-1])
         except Exception as e:
@@ -28,16 +36,23 @@ def fetch_stock_price(ticker: str) -> float:
     return 0.0
 
 
-def fetch_crypto_price(ticker: str) -> float:
+def _crypto_symbol(ticker: str) -> str:
     symbol = ticker.replace("-USD", "")
     if symbol == "BTCB": symbol = "BTC"
     elif symbol == "WETH": symbol = "ETH"
+    return symbol
+
+
+def fetch_crypto_price(ticker: str) -> float:
+    symbol = _crypto_symbol(ticker)
     if symbol in ("USDT", "USDC"): return 1.0
 
     for attempt in range(3):
         try:
             exchange = ccxt.binance()
-            ticker_data = exchange.fetch_ticker(f"{symbol}/USDT")
+            with tracing.span("binance", "fetch_ticker", symbol) as s:
+                ticker_data = exchange.fetch_ticker(f"{symbol}/USDT")
+                s.size = len(getattr(exchange, "last_http_response", None) or "")
             return float(ticker_data["last"])
         except Exception as e:
             if attempt == 2:
@@ -47,37 +62,175 @@ def fetch_crypto_price(ticker: str) -> float:
     return 0.0
 
 
-def update_prices(db: Session) -> None:
-    assets = AssetRepository(db).list_all()
+def fetch_crypto_prices(tickers: list[str]) -> dict[str, float]:
+    """Quote many crypto tickers with one ``fetch_tickers`` call.
+
+    Falls back to per-symbol ``fetch_crypto_price`` if the batch call fails.
+    """
+    prices: dict[str, float] = {}
+    wanted: dict[str, list[str]] = {}
+    for t in tickers:
+        symbol = _crypto_symbol(t)
+        if symbol in ("USDT", "USDC"):
+            prices[t] = 1.0
+        else:
+            wanted.setdefault(f"{symbol}/USDT", []).append(t)
+    if not wanted:
+        return prices
+
+    try:
+        exchange = ccxt.binance()
+        with tracing.span("binance", "fetch_tickers", f"{len(wanted)} symbols") as s:
+            quotes = exchange.fetch_tickers(list(wanted))
+            s.size = len(getattr(exchange, "last_http_response", None) or "")
+        for pair, originals in wanted.items():
+            last = (quotes.get(pair) or {}).get("last")
+            if last:
+                for t in originals:
+                    prices[t] = float(last)
+    except Exception as e:
+        logger.warning(f"Batch crypto quote failed, falling back to single fetches: {e}")
+        for originals in wanted.values():
+            price = fetch_crypto_price(originals[0])
+            if price > 0:
+                for t in originals:
+                    prices[t] = price
+    return prices
 
-    crypto_jobs: list[tuple[int, str]] = []
-    stock_jobs:  list[tuple[int, str]] = []
 
-    for asset in assets:
-        is_crypto = asset.category == "Crypto" or (
-            asset.sub_category and "Crypto" in asset.sub_category
+def _refresh_queue(db: Session, markets, now: datetime | None) -> list[tuple[str, str, list[int]]]:
+    """Due assets as a staleness-ordered list of (market, ticker, asset_ids).
+
+    Assets sharing a ticker cost one upstream call; the ticker's position in
+    the queue is set by its stalest asset.
+    """
+    rows = (
+        db.query(
+            models.Asset.id, models.Asset.ticker, models.Asset.category,
+            models.Asset.sub_category, models.Asset.last_updated_at,
         )
-        if is_crypto and asset.ticker:
-            crypto_jobs.append((asset.id, asset.ticker))
-        elif asset.category == "Stock" and asset.ticker:
-            stock_jobs.append((asset.id, asset.ticker))
+        .filter(models.Asset.ticker != None, models.Asset.ticker != "")
+        .order_by(models.Asset.last_updated_at.asc())
+        .all()
+    )
+    queue: dict[tuple[str, str], list[int]] = {}
+    for row in rows:
+        market = market_calendar.asset_market(row)
+        if market is None or (markets is not None and market not in markets):
+            continue
+        if not market_calendar.needs_refresh(market, row.last_updated_at, now):
+            continue
+        queue.setdefault((market, row.ticker), []).append(row.id)
+    return [(market, ticker, ids) for (market, ticker), ids in queue.items()]
 
-    price_results: dict[int, float] = {}
-    _max_workers = min(8, os.cpu_count() or 4)
 
+def fetch_quotes(
+    queue: list[tuple[str, str]], budget: int | None = None, now: datetime | None = None,
+) -> tuple[dict[tuple[str, str], float], int]:
+    """Quote a staleness-ordered list of (market, ticker) pairs.
+
+    Quotes still current in the shared market database are reused (see
+    market_data_service), and tickers whose recent fetches failed wait out
+    their backoff.  For the rest, all crypto quotes share one batch call,
+    then stock tickers are taken in order until ``budget`` upstream calls are
+    spent; fetched quotes are stored for every profile.  Returns
+    ({(market, ticker): price}, calls made); failed quotes are left out.
+    """
+    calls = 0
+    cached = market_data_service.cached_quotes(queue, now)
+    queue = [key for key in queue if key not in cached]
+    waiting = market_data_service.backed_off(queue)
+    queue = [key for key in queue if key not in waiting]
+    quotes: dict[tuple[str, str], float] = {}
+    attempted: list[tuple[str, str]] = []
+
+    crypto = [t for m, t in queue if m == market_calendar.CRYPTO]
+    if crypto and (budget is None or budget > 0):
+        prices = fetch_crypto_prices(crypto)
+        calls += 1
+        for ticker in crypto:
+            attempted.append((market_calendar.CRYPTO, ticker))
+            if prices.get(ticker, 0.0) > 0:
+                quotes[(market_calendar.CRYPTO, ticker)] = prices[ticker]
+
+    stock_jobs = [(m, t) for m, t in queue if m != market_calendar.CRYPTO]
+    if budget is not None:
+        stock_jobs = stock_jobs[:max(0, budget - calls)]
+    calls += len(stock_jobs)
+    attempted += stock_jobs
+
+    _max_workers = min(8, os.cpu_count() or 4)
     with ThreadPoolExecutor(max_workers=_max_workers) as executor:
-        futures = {
-            **{executor.submit(fetch_crypto_price, t): aid for aid, t in crypto_jobs},
-            **{executor.submit(fetch_stock_price,  t): aid for aid, t in stock_jobs},
-        }
+        futures = {executor.submit(fetch_stock_price, t): (m, t) for m, t in stock_jobs}
         for future in as_completed(futures):
             try:
                 price = future.result()
                 if price > 0:
-                    price_results[futures[future]] = price
+                    quotes[futures[future]] = price
             except Exception as e:
-                logger.error(f"Price fetch error for asset {futures[future]}: {e}")
+                logger.error(f"Price fetch error for {futures[future][1]}: {e}")
+    if quotes:
+        market_data_service.store_quotes(quotes)
+    failed = [key for key in attempted if key not in quotes]
+    if failed:
+        market_data_service.record_failures(failed)
+    return {**cached, **quotes}, calls
+
 
+def _apply_quotes(db: Session, queue: list[tuple[str, str, list[int]]], quotes: dict) -> None:
     repo = AssetRepository(db)
-    for asset_id, price in price_results.items():
-        repo.update_price(asset_id, price)
+    for market, ticker, asset_ids in queue:
+        price = quotes.get((market, ticker))
+        if price:
+            for aid in asset_ids:
+                repo.update_price(aid, price)
+
+
+def update_prices(
+    db: Session,
+    markets: set[str] | None = None,
+    budget: int | None = None,
+    now: datetime | None = None,
+) -> int:
+    """Refresh prices for due assets; returns the number of upstream calls made.
+
+    ``markets`` limits the run to CRYPTO / TW / US (None = all).  Closed stock
+    markets are skipped except for one post-close refresh.  ``budget`` caps the
+    upstream calls per run: all crypto quotes share one batch call, then stock
+    tickers are taken stalest-first until the budget is spent.
+    """
+    queue = _refresh_queue(db, markets, now)
+    quotes, calls = fetch_quotes([(m, t) for m, t, _ in queue], budget, now)
+    _apply_quotes(db, queue, quotes)
+    return calls
+
+
+def update_prices_across(
+    sessions: dict[str, Session],
+    markets: set[str] | None = None,
+    budget: int | None = None,
+    now: datetime | None = None,
+) -> int:
+    """``update_prices`` over several profile databases, quoting each ticker once.
+
+    ``sessions`` maps profile name to an open session.  The per-profile
+    queues are interleaved round-robin, so under a tight budget every
+    profile's stalest tickers go first; a ticker held by several profiles
+    costs one upstream call.  A profile whose writes fail is rolled back and
+    logged without affecting the others.  Returns the upstream calls made.
+    """
+    queues = {name: _refresh_queue(db, markets, now) for name, db in sessions.items()}
+    merged: dict[tuple[str, str], None] = {}
+    for batch in zip_longest(*queues.values()):
+        for item in batch:
+            if item is not None:
+                merged.setdefault(item[:2])
+    quotes, calls = fetch_quotes(list(merged), budget, now)
+
+    for name, db in sessions.items():
+        try:
+            _apply_quotes(db, queues[name], quotes)
+        except Exception as e:
+            logger.error(f"Price update for profile {name} failed: {e}")
+            db.rollback()
+    return calls
@@ -1,3 +1,6 @@
+from sqlalchemy.orm import Session
+
+from .. import lot_service
 from .binance import BinanceProvider
 from .max import MaxProvider
 from .pionex import PionexProvider
@@ -9,3 +12,10 @@ PROVIDERS = {
     "pionex":  PionexProvider(),
     "wallet":  WalletProvider(),
 }
+
+
+def run_sync(name: str, db: Session) -> bool:
+    """Run a provider's sync, then fold the transactions it wrote into lots."""
+    synced = PROVIDERS[name].sync(db)
+    lot_service.sync_lots(db)
+    return synced
@@ -1,9 +1,38 @@
 from abc import ABC, abstractmethod
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from ... import models
+
 
 class ExchangeProvider(ABC):
     @abstractmethod
     def sync(self, db: Session) -> bool:
         """Sync balances from exchange to DB. Returns True on success."""
         ...
+
+
+def connection_assets(db: Session, connection_id: int) -> dict[str, models.Asset]:
+    """{ticker: asset} for a connection, in one query (not one per synced coin).
+
+    With duplicate tickers the oldest asset wins, as ``.first()`` did.
+    """
+    assets: dict[str, models.Asset] = {}
+    for a in db.query(models.Asset).filter(models.Asset.connection_id == connection_id).order_by(models.Asset.id):
+        assets.setdefault(a.ticker, a)
+    return assets
+
+
+def ledger_quantities(db: Session, connection_id: int) -> dict[int, float]:
+    """{asset_id: sum of transaction amounts} for a connection's assets.
+
+    One aggregate instead of lazy-loading ``asset.transactions`` per asset.
+    """
+    T = models.Transaction
+    rows = (
+        db.query(T.asset_id, func.sum(T.amount))
+        .join(models.Asset, models.Asset.id == T.asset_id)
+        .filter(models.Asset.connection_id == connection_id)
+        .group_by(T.asset_id)
+    )
+    return {asset_id: qty or 0.0 for asset_id, qty in rows}
@@ -3,8 +3,9 @@ import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from .base import ExchangeProvider
+from .base import ExchangeProvider, connection_assets, ledger_quantities
 from ... import models
+from ...observability import tracing
 from ...utils.icons import get_icon_for_ticker
 from ..exchange_rate_service import get_usdt_twd_rate
 
@@ -39,7 +40,9 @@ class BinanceProvider(ExchangeProvider):
                     'enableRateLimit': True,
                 })
 
-                balance = exchange.fetch_balance()
+                with tracing.span("binance", "fetch_balance", conn.name) as s:
+                    balance = exchange.fetch_balance()
+                    s.size = len(getattr(exchange, "last_http_response", None) or "")
                 assets_found = {
                     coin: amount
                     for coin, amount in balance.get('total', {}).items()
@@ -51,21 +54,22 @@ class BinanceProvider(ExchangeProvider):
                 else:
                     logger.info(f"  {conn.name}: Found {len(assets_found)} assets.")
 
-                all_tickers = exchange.fetch_tickers()
+                with tracing.span("binance", "fetch_tickers", conn.name) as s:
+                    all_tickers = exchange.fetch_tickers()
+                    s.size = len(getattr(exchange, "last_http_response", None) or "")
                 usdt_twd_rate = get_usdt_twd_rate(db)
                 logger.info(f"  USDT/TWD Rate: {usdt_twd_rate}")
 
                 clean_conn_name = conn.name.replace(' Connection', '').strip().capitalize()
 
+                existing = connection_assets(db, conn.id)
+                quantities = ledger_quantities(db, conn.id)
                 for coin, amount in assets_found.items():
                     current_price_usd = 1.0 if coin == 'USDT' else float(
                         all_tickers.get(f"{coin}/USDT", {}).get('last') or 0
                     )
 
-                    db_asset = db.query(models.Asset).filter(
-                        models.Asset.connection_id == conn.id,
-                        models.Asset.ticker == coin,
-                    ).first()
+                    db_asset = existing.get(coin)
 
                     target_name = f"{coin} ({clean_conn_name})"
                     target_icon = get_icon_for_ticker(coin, "Crypto")
@@ -79,14 +83,12 @@ class BinanceProvider(ExchangeProvider):
                         if db_asset.icon != target_icon:
                             db_asset.icon = target_icon
 
-                        current_qty = sum(t.amount for t in db_asset.transactions)
-                        diff = amount - current_qty
+                        diff = amount - quantities.get(db_asset.id, 0.0)
                         if abs(diff) > 1e-8:
                             db.add(models.Transaction(
                                 asset_id=db_asset.id, amount=diff,
                                 buy_price=0, date=datetime.now(), is_transfer=False,
                             ))
-                        db.commit()
                     else:
                         new_asset = models.Asset(
                             name=target_name, ticker=coin,
@@ -97,17 +99,19 @@ class BinanceProvider(ExchangeProvider):
                             connection_id=conn.id,
                         )
                         db.add(new_asset)
-                        db.commit()
-                        db.refresh(new_asset)
+                        db.flush()
                         db.add(models.Transaction(
                             asset_id=new_asset.id, amount=amount,
                             buy_price=0, date=datetime.now(), is_transfer=False,
                         ))
-                        db.commit()
 
+                # One commit per connection: committing per coin expires every
+                # loaded row and the next coin re-selects them.
+                db.commit()
                 success_count += 1
 
             except Exception as e:
                 logger.error(f"Binance Sync Exception for {conn.name}: {e}")
+                db.rollback()
 
         return success_count > 0
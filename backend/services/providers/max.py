@@ -8,8 +8,9 @@ import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from .base import ExchangeProvider
+from .base import ExchangeProvider, connection_assets, ledger_quantities
 from ... import models
+from ...observability import tracing
 from ...utils.icons import get_icon_for_ticker
 
 logger = logging.getLogger(__name__)
@@ -58,7 +59,9 @@ class MaxProvider(ExchangeProvider):
                 path = "/api/v3/wallet/spot/accounts"
                 headers, payload_data = _auth_headers(path, conn.api_key, conn.api_secret)
                 query_params = {k: v for k, v in payload_data.items() if k != 'path'}
-                resp = requests.get(f"{BASE_URL}{path}", headers=headers, params=query_params)
+                with tracing.span("max", "accounts", conn.name) as s:
+                    resp = requests.get(f"{BASE_URL}{path}", headers=headers, params=query_params)
+                    s.response(resp)
 
                 if resp.status_code != 200:
                     logger.error(f"MAX API Error {resp.status_code}: {resp.text}")
@@ -85,16 +88,20 @@ class MaxProvider(ExchangeProvider):
                         else:
                             markets.append(f"{ticker.lower()}twd")
                     if markets:
-                        pr = requests.get(
-                            f"{BASE_URL}/api/v3/tickers",
-                            params=[('markets[]', m) for m in markets],
-                        )
+                        with tracing.span("max", "tickers", f"{len(markets)} markets") as s:
+                            pr = requests.get(
+                                f"{BASE_URL}/api/v3/tickers",
+                                params=[('markets[]', m) for m in markets],
+                            )
+                            s.response(pr)
                         if pr.status_code == 200:
                             for t in pr.json():
                                 market_prices[t.get('market')] = float(t.get('last', 0))
                 except Exception as e:
                     logger.error(f"Error fetching MAX prices: {e}")
 
+                existing = connection_assets(db, conn.id)
+                quantities = ledger_quantities(db, conn.id)
                 for ticker, amount in active_balances.items():
                     if ticker == 'TWD':
                         current_price = 1.0
@@ -110,7 +117,9 @@ class MaxProvider(ExchangeProvider):
                             t_params = {'market': f"{ticker.lower()}twd", 'limit': 500}
                             t_headers, t_payload = _auth_headers(t_path, conn.api_key, conn.api_secret, t_params)
                             t_qp = {k: v for k, v in t_payload.items() if k != 'path'}
-                            t_resp = requests.get(f"{BASE_URL}{t_path}", headers=t_headers, params=t_qp)
+                            with tracing.span("max", "trades", ticker) as s:
+                                t_resp = requests.get(f"{BASE_URL}{t_path}", headers=t_headers, params=t_qp)
+                                s.response(t_resp)
                             if t_resp.status_code == 200:
                                 total_cost = total_vol = 0.0
                                 for t in t_resp.json():
@@ -127,10 +136,7 @@ class MaxProvider(ExchangeProvider):
                         ticker, "Crypto" if ticker != 'TWD' else "Fluid"
                     )
 
-                    db_asset = db.query(models.Asset).filter(
-                        models.Asset.connection_id == conn.id,
-                        models.Asset.ticker == ticker,
-                    ).first()
+                    db_asset = existing.get(ticker)
 
                     if db_asset:
                         if current_price > 0:
@@ -143,14 +149,12 @@ class MaxProvider(ExchangeProvider):
                         if db_asset.icon != target_icon:
                             db_asset.icon = target_icon
 
-                        current_qty = sum(t.amount for t in db_asset.transactions)
-                        diff = amount - current_qty
+                        diff = amount - quantities.get(db_asset.id, 0.0)
                         if abs(diff) > 1e-8:
                             db.add(models.Transaction(
                                 asset_id=db_asset.id, amount=diff,
                                 buy_price=0, date=datetime.now(), is_transfer=False,
                             ))
-                        db.commit()
                     else:
                         logger.info(f"  Creating new MAX asset: {ticker}")
                         category     = "Fluid"  if ticker == 'TWD' else "Crypto"
@@ -164,17 +168,19 @@ class MaxProvider(ExchangeProvider):
                             connection_id=conn.id,
                         )
                         db.add(new_asset)
-                        db.commit()
-                        db.refresh(new_asset)
+                        db.flush()
                         db.add(models.Transaction(
                             asset_id=new_asset.id, amount=amount,
                             buy_price=0, date=datetime.now(), is_transfer=False,
                         ))
-                        db.commit()
 
+                # One commit per connection: committing per coin expires every
+                # loaded row and the next coin re-selects them.
+                db.commit()
                 success_count += 1
 
             except Exception as e:
                 logger.error(f"MAX Sync Exception for {conn.name}: {e}")
+                db.rollback()
 
         return success_count > 0
@@ -6,8 +6,9 @@ import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from .base import ExchangeProvider
+from .base import ExchangeProvider, connection_assets, ledger_quantities
 from ... import models
+from ...observability import tracing
 from ...utils.icons import get_icon_for_ticker
 
 logger = logging.getLogger(__name__)
@@ -50,7 +51,9 @@ class PionexProvider(ExchangeProvider):
             try:
                 path = "/api/v1/account/balances"
                 headers, final_params = _auth_headers(conn.api_key, conn.api_secret, "GET", path)
-                resp = requests.get(f"{BASE_URL}{path}", headers=headers, params=final_params)
+                with tracing.span("pionex", "balances", conn.name) as s:
+                    resp = requests.get(f"{BASE_URL}{path}", headers=headers, params=final_params)
+                    s.response(resp)
 
                 if resp.status_code != 200:
                     logger.error(f"Pionex API Error {resp.status_code}: {resp.text}")
@@ -75,7 +78,9 @@ class PionexProvider(ExchangeProvider):
                 # Fetch market prices
                 market_prices: dict[str, float] = {}
                 try:
-                    t_resp = requests.get(f"{BASE_URL}/api/v1/market/tickers")
+                    with tracing.span("pionex", "tickers") as s:
+                        t_resp = requests.get(f"{BASE_URL}/api/v1/market/tickers")
+                        s.response(t_resp)
                     if t_resp.status_code == 200:
                         t_data = t_resp.json()
                         if t_data.get('result', False):
@@ -86,15 +91,14 @@ class PionexProvider(ExchangeProvider):
 
                 clean_conn_name = conn.name.replace(' Connection', '').strip().capitalize()
 
+                existing = connection_assets(db, conn.id)
+                quantities = ledger_quantities(db, conn.id)
                 for ticker, amount in assets_found.items():
                     current_price = 1.0 if ticker == 'USDT' else market_prices.get(f"{ticker}_USDT", 0.0)
                     target_name = f"{ticker} ({clean_conn_name})"
                     target_icon = get_icon_for_ticker(ticker, "Crypto")
 
-                    db_asset = db.query(models.Asset).filter(
-                        models.Asset.connection_id == conn.id,
-                        models.Asset.ticker == ticker,
-                    ).first()
+                    db_asset = existing.get(ticker)
 
                     if db_asset:
                         db_asset.last_updated_at = datetime.now()
@@ -105,14 +109,12 @@ class PionexProvider(ExchangeProvider):
                         if db_asset.icon != target_icon:
                             db_asset.icon = target_icon
 
-                        current_qty = sum(t.amount for t in db_asset.transactions)
-                        diff = amount - current_qty
+                        diff = amount - quantities.get(db_asset.id, 0.0)
                         if abs(diff) > 1e-8:
                             db.add(models.Transaction(
                                 asset_id=db_asset.id, amount=diff,
                                 buy_price=0, date=datetime.now(), is_transfer=False,
                             ))
-                        db.commit()
                     else:
                         new_asset = models.Asset(
                             name=target_name, ticker=ticker,
@@ -123,17 +125,19 @@ class PionexProvider(ExchangeProvider):
                             connection_id=conn.id,
                         )
                         db.add(new_asset)
-                        db.commit()
-                        db.refresh(new_asset)
+                        db.flush()
                         db.add(models.Transaction(
                             asset_id=new_asset.id, amount=amount,
                             buy_price=0, date=datetime.now(), is_transfer=False,
                         ))
-                        db.commit()
 
+                # One commit per connection: committing per coin expires every
+                # loaded row and the next coin re-selects them.
+                db.commit()
                 success_count += 1
 
             except Exception as e:
                 logger.error(f"Pionex Sync Exception for {conn.name}: {e}")
+                db.rollback()
 
         return success_count > 0
@@ -5,8 +5,9 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from web3 import Web3
 
-from .base import ExchangeProvider
+from .base import ExchangeProvider, ledger_quantities
 from ... import models
+from ...observability import tracing
 from ...utils.icons import get_icon_for_ticker
 from ..price_service import fetch_crypto_price
 
@@ -79,11 +80,17 @@ class WalletProvider(ExchangeProvider):
                 logger.error(f"  Invalid address: {conn.address}")
                 continue
 
+            quantities = ledger_quantities(db, conn.id)
             for network in ['Ethereum', 'Scroll', 'BSC', 'Arbitrum']:
                 if network not in web3_instances:
                     rpc = NETWORKS.get(network)
                     w3 = Web3(Web3.HTTPProvider(rpc)) if rpc else None
-                    if w3 and w3.is_connected():
+                    if w3:
+                        with tracing.span("web3", "connect", network) as s:
+                            if not w3.is_connected():
+                                s.fail("not connected")
+                                w3 = None
+                    if w3:
                         web3_instances[network] = w3
                     else:
                         logger.warning(f"  Failed to connect to {network}")
@@ -94,7 +101,8 @@ class WalletProvider(ExchangeProvider):
 
                 # A. Native token
                 try:
-                    balance_wei = w3.eth.get_balance(checksum_address)
+                    with tracing.span("web3", "get_balance", network):
+                        balance_wei = w3.eth.get_balance(checksum_address)
                     balance_fmt = float(balance_wei) / 1e18
                     native_ticker = "ETH" if network in ('Ethereum', 'Scroll', 'Arbitrum') else "BNB"
                     asset_name = f"{native_ticker} ({clean_conn_name})"
@@ -107,8 +115,7 @@ class WalletProvider(ExchangeProvider):
 
                     if db_asset:
                         db_asset.last_updated_at = datetime.now()
-                        current_qty = sum(t.amount for t in db_asset.transactions)
-                        diff = balance_fmt - current_qty
+                        diff = balance_fmt - quantities.get(db_asset.id, 0.0)
                         if abs(diff) > 1e-6:
                             db.add(models.Transaction(asset_id=db_asset.id, amount=diff, buy_price=0, date=datetime.now()))
                     elif balance_fmt > 0:
@@ -139,10 +146,10 @@ class WalletProvider(ExchangeProvider):
                         contract = w3.eth.contract(
                             address=Web3.to_checksum_address(asset.contract_address), abi=ERC20_ABI
                         )
-                        bal = contract.functions.balanceOf(checksum_address).call()
+                        with tracing.span("web3", "balanceOf", f"{network}:{asset.ticker}"):
+                            bal = contract.functions.balanceOf(checksum_address).call()
                         bal_fmt = float(bal) / (10 ** (asset.decimals or 18))
-                        header_qty = sum(t.amount for t in asset.transactions)
-                        diff = bal_fmt - header_qty
+                        diff = bal_fmt - quantities.get(asset.id, 0.0)
                         if abs(diff) > 1e-6:
                             db.add(models.Transaction(asset_id=asset.id, amount=diff, buy_price=0, date=datetime.now()))
                             asset.last_updated_at = datetime.now()
@@ -159,7 +166,8 @@ class WalletProvider(ExchangeProvider):
                             contract = w3.eth.contract(
                                 address=Web3.to_checksum_address(token['address']), abi=ERC20_ABI
                             )
-                            bal = contract.functions.balanceOf(checksum_address).call()
+                            with tracing.span("web3", "balanceOf", f"{network}:{token['symbol']}"):
+                                bal = contract.functions.balanceOf(checksum_address).call()
                             if bal <= 0:
                                 continue
                             decimals = token.get('decimals', 18)
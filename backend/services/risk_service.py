@@ -0,0 +1,188 @@
+"""Incremental risk metrics (CAGR, max drawdown, volatility) over NetWorthHistory.
+
+A single RiskMetricState row carries running aggregates so each snapshot
+updates the metrics in O(1) and /api/stats/risk_metrics is a one-row read
+instead of a full history scan.  Volatility uses Welford's online variance.
+
+Today's snapshot is rewritten on every price run, so the aggregates stop at
+the day before ``last_date`` and the latest value is folded in at read time.
+A snapshot dated before ``last_date`` invalidates the aggregates and triggers
+a rebuild from NetWorthHistory.
+"""
+import math
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+from .. import models
+
+STATE_ID = 1
+
+_FIELDS = (
+    "first_date", "first_value", "prev_date", "prev_value",
+    "peak", "max_drawdown", "n_returns", "mean_return", "m2_return",
+)
+
+EMPTY_METRICS = {
+    "cagr":        {"value": 0, "status": "N/A"},
+    "maxDrawdown": {"value": 0, "status": "N/A"},
+    "volatility":  {"value": 0, "status": "N/A"},
+}
+
+
+# ── Formatting (shared with analytics_service.compute_risk_metrics) ───────────
+
+def _cagr_status(v):
+    if v > 15: return "Excellent"
+    if v > 5:  return "Healthy"
+    if v >= 0: return "Slow"
+    return "Declining"
+
+
+def _vol_status(v):
+    if v > 40: return "High Risk"
+    if v > 15: return "Moderate"
+    return "Stable"
+
+
+def _dd_status(v):
+    if v > 30: return "Heavy Loss"
+    if v > 15: return "Correction"
+    return "Safe"
+
+
+def cagr(start_val: float, end_val: float, days: int) -> float:
+    years = days / 365.25
+    if years >= 1.0 and start_val > 0:
+        return (end_val / start_val) ** (1 / years) - 1
+    return (end_val - start_val) / start_val if start_val > 0 else 0
+
+
+def format_risk_metrics(cagr_frac: float, max_dd: float, annualised_vol: float) -> dict:
+    cagr_pct = cagr_frac * 100
+    mdd_pct  = max_dd * 100
+    vol_pct  = annualised_vol * 100
+    return {
+        "cagr":        {"value": cagr_pct, "status": _cagr_status(cagr_pct)},
+        "maxDrawdown": {"value": mdd_pct,  "status": _dd_status(mdd_pct)},
+        "volatility":  {"value": vol_pct,  "status": _vol_status(vol_pct)},
+    }
+
+
+# ── Online fold ───────────────────────────────────────────────────────────────
+
+def _empty() -> dict:
+    return {
+        "first_date": None, "first_value": None, "prev_date": None, "prev_value": None,
+        "peak": 0.0, "max_drawdown": 0.0, "n_returns": 0, "mean_return": 0.0, "m2_return": 0.0,
+    }
+
+
+def apply_value(agg: dict, day: str, value: float | None) -> dict:
+    """Fold one daily value into ``agg`` and return the new aggregate.
+
+    Non-positive values are skipped, matching the full-history calculation.
+    """
+    if value is None or value <= 0:
+        return agg
+    agg = dict(agg)
+    if agg["first_value"] is None:
+        agg["first_date"], agg["first_value"] = day, value
+        agg["peak"] = value
+    prev = agg["prev_value"]
+    if prev:
+        r = (value - prev) / prev
+        n = agg["n_returns"] + 1
+        delta = r - agg["mean_return"]
+        agg["mean_return"] += delta / n
+        agg["m2_return"] += delta * (r - agg["mean_return"])
+        agg["n_returns"] = n
+    if value > agg["peak"]:
+        agg["peak"] = value
+    dd = (agg["peak"] - value) / agg["peak"] if agg["peak"] > 0 else 0
+    if dd > agg["max_drawdown"]:
+        agg["max_drawdown"] = dd
+    agg["prev_date"], agg["prev_value"] = day, value
+    return agg
+
+
+def metrics_from_aggregate(agg: dict) -> dict:
+    if agg["n_returns"] < 1:
+        return EMPTY_METRICS
+    variance = agg["m2_return"] / agg["n_returns"]
+    annualised_vol = math.sqrt(max(variance, 0.0)) * math.sqrt(365)
+    days = (date.fromisoformat(agg["prev_date"]) - date.fromisoformat(agg["first_date"])).days
+    return format_risk_metrics(
+        cagr(agg["first_value"], agg["prev_value"], days),
+        agg["max_drawdown"],
+        annualised_vol,
+    )
+
+
+# ── Persisted state ───────────────────────────────────────────────────────────
+
+def _load(state: models.RiskMetricState) -> dict:
+    return {f: getattr(state, f) for f in _FIELDS}
+
+
+def _store(state: models.RiskMetricState, agg: dict) -> None:
+    for f in _FIELDS:
+        setattr(state, f, agg[f])
+    state.updated_at = datetime.now()
+
+
+def rebuild_risk_state(db: Session) -> models.RiskMetricState | None:
+    """Recompute the state from every NetWorthHistory row.  Does not commit.
+
+    Returns None (and removes any state) when there are no snapshots.
+    """
+    rows = (
+        db.query(models.NetWorthHistory.date, models.NetWorthHistory.value)
+        .order_by(models.NetWorthHistory.date)
+        .all()
+    )
+    state = db.get(models.RiskMetricState, STATE_ID)
+    if not rows:
+        if state is not None:
+            db.delete(state)
+        return None
+    agg = _empty()
+    for day, value in rows[:-1]:
+        agg = apply_value(agg, day, value)
+    if state is None:
+        state = models.RiskMetricState(id=STATE_ID)
+        db.add(state)
+    _store(state, agg)
+    state.last_date, state.last_value = rows[-1]
+    return state
+
+
+def update_risk_state(db: Session, day: str, value: float) -> None:
+    """O(1) update for a snapshot of ``value`` on ``day``.  Does not commit."""
+    state = db.get(models.RiskMetricState, STATE_ID)
+    if state is None or state.last_date is None or day < state.last_date:
+        db.flush()
+        rebuild_risk_state(db)
+        return
+    if day > state.last_date:
+        _store(state, apply_value(_load(state), state.last_date, state.last_value))
+        state.last_date = day
+    state.last_value = value
+    state.updated_at = datetime.now()
+
+
+def get_risk_metrics(db: Session) -> dict | None:
+    """Metrics from the stored state, or None with fewer than two positive snapshots.
+
+    Databases that predate the state table are backfilled on first read.
+    """
+    state = db.get(models.RiskMetricState, STATE_ID)
+    if state is None:
+        state = rebuild_risk_state(db)
+        if state is None:
+            return None
+        db.commit()
+    agg = apply_value(_load(state), state.last_date, state.last_value)
+    if agg["n_returns"] < 1:
+        return None
+    return metrics_from_aggregate(agg)
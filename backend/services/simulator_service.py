@@ -0,0 +1,98 @@
+"""Wealth simulator: future value over a grid of contribution × return × horizon.
+
+Every cell uses the closed-form future value of a lump sum plus a monthly
+annuity, so the whole grid is a single NumPy broadcast:
+
+    FV = P·g + C·(g − 1) / r      with  g = (1 + r)^(12·years), r = annual / 12
+
+(``C · 12·years`` when r = 0).  Defaults come from the
+``wealth_simulator_*`` settings.
+"""
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .. import models
+
+MAX_CELLS = 250_000
+
+# Mirrors the defaults in routers/settings.py.
+DEFAULTS = {
+    "wealth_simulator_monthly_contribution": 10000.0,
+    "wealth_simulator_annual_return": 6.0,
+    "wealth_simulator_years": 20.0,
+    "wealth_simulator_initial_amount": 0.0,
+}
+
+
+class GridTooLarge(ValueError):
+    pass
+
+
+def simulator_settings(db: Session) -> dict[str, float]:
+    rows = db.query(models.SystemSetting).filter(models.SystemSetting.key.in_(DEFAULTS)).all()
+    values = dict(DEFAULTS)
+    for row in rows:
+        try:
+            values[row.key] = float(row.value)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def future_value_grid(initial: float, contributions: np.ndarray, annual_returns_pct: np.ndarray,
+                      years: np.ndarray) -> np.ndarray:
+    """(len(contributions), len(returns), len(years)) array of end balances."""
+    r = (np.asarray(annual_returns_pct, dtype=np.float64) / 100.0 / 12.0)[:, None]
+    n = 12.0 * np.asarray(years, dtype=np.float64)[None, :]
+    growth = np.power(1.0 + r, n)                                   # (R, Y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(r == 0.0, n, (growth - 1.0) / np.where(r == 0.0, 1.0, r))
+    c = np.asarray(contributions, dtype=np.float64)[:, None, None]
+    return initial * growth[None, :, :] + c * annuity[None, :, :]
+
+
+def simulate_grid(
+    db: Session,
+    contribution_min: float | None = None,
+    contribution_max: float | None = None,
+    contribution_steps: int = 5,
+    return_min: float | None = None,
+    return_max: float | None = None,
+    return_steps: int = 9,
+    years: int | None = None,
+    initial: float | None = None,
+) -> dict:
+    """Evaluate the grid; unspecified bounds are centred on the saved settings.
+
+    Contribution defaults to ±50 % of the saved amount, return to ±4 points
+    around the saved rate.  ``values[c][r][y]`` is the balance after
+    ``years[y]`` years.
+    """
+    s = simulator_settings(db)
+    base_c = s["wealth_simulator_monthly_contribution"]
+    base_r = s["wealth_simulator_annual_return"]
+    contribution_min = base_c * 0.5 if contribution_min is None else contribution_min
+    contribution_max = base_c * 1.5 if contribution_max is None else contribution_max
+    return_min = base_r - 4.0 if return_min is None else return_min
+    return_max = base_r + 4.0 if return_max is None else return_max
+    years = int(s["wealth_simulator_years"]) if years is None else years
+    initial = s["wealth_simulator_initial_amount"] if initial is None else initial
+
+    cells = contribution_steps * return_steps * years
+    if cells > MAX_CELLS:
+        raise GridTooLarge(f"Grid has {cells} cells; the limit is {MAX_CELLS}")
+
+    contributions = np.linspace(contribution_min, contribution_max, contribution_steps)
+    returns = np.linspace(return_min, return_max, return_steps)
+    horizon = np.arange(1, years + 1)
+    values = future_value_grid(initial, contributions, returns, horizon)
+
+    return {
+        "initial":       initial,
+        "contributions": contributions.round(2).tolist(),
+        "returns":       returns.round(4).tolist(),
+        "years":         horizon.tolist(),
+        "values":        values.round(0).tolist(),
+        # Principal paid in per (contribution, year); identical across returns.
+        "invested":      (initial + np.outer(contributions, 12 * horizon)).round(0).tolist(),
+    }
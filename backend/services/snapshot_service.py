@@ -1,22 +1,42 @@
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from .. import models
-from ..repositories.asset_repo import AssetRepository
+from ..repositories import asset_repo
+from ..utils.currency import is_usd_denominated
+from .exchange_rate_service import get_usdt_twd_rate
+from . import risk_service
 
 logger = logging.getLogger(__name__)
 
+# Defaults for the intraday series; overridable via SystemSetting.
+DEFAULT_INTRADAY_INTERVAL_MINUTES = 60
+DEFAULT_INTRADAY_RETENTION_DAYS = 7
+DEFAULT_HOURLY_RETENTION_DAYS = 90
+
+
+def _setting_int(db: Session, key: str, default: int) -> int:
+    setting = db.query(models.SystemSetting).filter_by(key=key).first()
+    try:
+        return int(setting.value) if setting else default
+    except ValueError:
+        return default
+
 
 def snapshot_net_worth(db: Session) -> None:
     """Write today's net worth to NetWorthHistory.
 
     Called by the scheduler after each price update so the history endpoint
     can serve from fast snapshot reads instead of recalculating every request.
+    Also captures the intraday series and keeps the rollup buckets current.
     """
-    today = datetime.now().strftime("%Y-%m-%d")
-    assets = AssetRepository(db).list_all()
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    assets = asset_repo.AssetRepository(db).list_all()
 
     net_worth = 0.0
     breakdown: dict[str, float] = {}
@@ -42,8 +62,253 @@ def snapshot_net_worth(db: Session) -> None:
             existing.breakdown = breakdown_json
         else:
             db.add(models.NetWorthHistory(date=today, value=rounded, breakdown=breakdown_json))
+        write_asset_values(db, assets, today)
+        db.flush()
+        risk_service.update_risk_state(db, today, rounded)
+        _upsert_week(db, now.date())
+        record_intraday(db, now, rounded, breakdown_json)
+        prune_rollups(db, now)
         db.commit()
         logger.info(f"Net worth snapshot saved: {today} = {rounded:,.0f}")
     except Exception as e:
         logger.error(f"Failed to save net worth snapshot: {e}")
         db.rollback()
+
+
+def write_asset_values(db: Session, assets, day: str) -> None:
+    """Bulk-upsert one AssetValueHistory row per asset for ``day``.
+
+    ``assets`` must already be enriched (value_twd set).  Does not commit.
+    """
+    if not assets:
+        return
+    usdt_rate = get_usdt_twd_rate(db)
+    rows = []
+    for asset in assets:
+        qty = sum(t.amount for t in asset.transactions)
+        price = asset.current_price or 0.0
+        if is_usd_denominated(asset):
+            price *= usdt_rate
+        rows.append({
+            "asset_id":  asset.id,
+            "date":      day,
+            "quantity":  qty,
+            "price":     round(price, 4),
+            "value_twd": round(asset.value_twd or 0.0, 2),
+        })
+    # Chunked multi-row upserts keep each statement under SQLite's bound-parameter limit.
+    for i in range(0, len(rows), 500):
+        stmt = sqlite_insert(models.AssetValueHistory).values(rows[i:i + 500])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["asset_id", "date"],
+            set_={
+                "quantity":  stmt.excluded.quantity,
+                "price":     stmt.excluded.price,
+                "value_twd": stmt.excluded.value_twd,
+            },
+        )
+        db.execute(stmt)
+
+
+# ── Intraday series + rollups ─────────────────────────────────────────────────
+
+def hour_bucket(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d %H:00")
+
+
+def week_bucket(day) -> str:
+    """Monday of the ISO week containing ``day``, as YYYY-MM-DD."""
+    return (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+
+
+def _upsert_bucket(db: Session, resolution: str, bucket: str, value: float, low: float, high: float, breakdown) -> None:
+    row = db.query(models.NetWorthRollup).filter_by(resolution=resolution, bucket=bucket).first()
+    if row is None:
+        db.add(models.NetWorthRollup(
+            resolution=resolution, bucket=bucket,
+            value=value, low=low, high=high, breakdown=breakdown,
+        ))
+    else:
+        row.value, row.low, row.high, row.breakdown = value, low, high, breakdown
+
+
+def interval_slot(ts: datetime, minutes: int) -> datetime:
+    """Start of the ``minutes``-long slot of the day containing ``ts`` (60 → the hour)."""
+    midnight = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (ts.hour * 60 + ts.minute) // max(1, minutes) * max(1, minutes)
+    return midnight + timedelta(minutes=elapsed)
+
+
+def record_intraday(db: Session, now: datetime, value: float, breakdown_json: str) -> bool:
+    """Store one intraday capture per interval slot; update its hour bucket.
+
+    Throttled by slot rather than by time since the last capture, so a job
+    firing a few seconds early on the same cadence still captures its slot.
+    Returns True when a capture was written.  Does not commit.
+    """
+    interval = _setting_int(db, "intraday_snapshot_interval_minutes", DEFAULT_INTRADAY_INTERVAL_MINUTES)
+    taken = (
+        db.query(models.NetWorthIntraday.id)
+        .filter(models.NetWorthIntraday.captured_at >= interval_slot(now, interval))
+        .first()
+    )
+    if taken:
+        return False
+
+    db.add(models.NetWorthIntraday(captured_at=now, value=value, breakdown=breakdown_json))
+
+    bucket = hour_bucket(now)
+    row = db.query(models.NetWorthRollup).filter_by(resolution="hour", bucket=bucket).first()
+    low = min(row.low, value) if row else value
+    high = max(row.high, value) if row else value
+    _upsert_bucket(db, "hour", bucket, value, low, high, breakdown_json)
+    return True
+
+
+def _upsert_week(db: Session, day) -> None:
+    """Recompute the weekly bucket containing ``day`` from its (≤ 7) daily rows."""
+    start = day - timedelta(days=day.weekday())
+    rows = (
+        db.query(models.NetWorthHistory)
+        .filter(
+            models.NetWorthHistory.date >= start.strftime("%Y-%m-%d"),
+            models.NetWorthHistory.date < (start + timedelta(days=7)).strftime("%Y-%m-%d"),
+        )
+        .order_by(models.NetWorthHistory.date)
+        .all()
+    )
+    bucket = week_bucket(day)
+    if not rows:
+        db.query(models.NetWorthRollup).filter_by(resolution="week", bucket=bucket).delete()
+        return
+    values = [r.value for r in rows]
+    _upsert_bucket(db, "week", bucket, values[-1], min(values), max(values), rows[-1].breakdown)
+
+
+def rebuild_weekly_rollups(db: Session) -> int:
+    """Rebuild every weekly bucket from NetWorthHistory; returns the bucket count."""
+    db.query(models.NetWorthRollup).filter_by(resolution="week").delete()
+    weeks: dict[str, list] = {}
+    for row in db.query(models.NetWorthHistory).order_by(models.NetWorthHistory.date):
+        day = datetime.strptime(row.date, "%Y-%m-%d").date()
+        weeks.setdefault(week_bucket(day), []).append(row)
+    for bucket, rows in weeks.items():
+        values = [r.value for r in rows]
+        db.add(models.NetWorthRollup(
+            resolution="week", bucket=bucket,
+            value=values[-1], low=min(values), high=max(values), breakdown=rows[-1].breakdown,
+        ))
+    db.commit()
+    return len(weeks)
+
+
+def backfill_weekly_rollups(db: Session) -> int:
+    """Rebuild the weekly buckets when daily history predates the first one.
+
+    Week buckets start with the first scheduled snapshot; daily rows written
+    before then (an upgrade, a restored backup) get buckets here, once, at
+    startup.  Returns the bucket count, or 0 when nothing was missing.
+    """
+    first_week = db.query(func.min(models.NetWorthRollup.bucket)).filter_by(resolution="week").scalar()
+    first_day = db.query(func.min(models.NetWorthHistory.date)).scalar()
+    if not first_day:
+        return 0
+    if first_week is not None and first_week <= week_bucket(datetime.strptime(first_day, "%Y-%m-%d").date()):
+        return 0
+    return rebuild_weekly_rollups(db)
+
+
+def restate_history(db: Session, deltas: dict) -> None:
+    """Apply ledger quantity changes to the daily history already recorded.  Does not commit.
+
+    ``deltas`` maps (asset_id, day) to the quantity a write added (negative:
+    removed) on that day; each change holds from its day to today.  Per-asset
+    rows take the new quantity at their recorded price, and the day's
+    NetWorthHistory value and breakdown move by the same amount (at the
+    asset's current price on days without a per-asset row).  Weekly buckets
+    of the touched days are recomputed and the risk state is rebuilt.
+    Intraday captures and hour buckets record what was observed at the time
+    and are left alone; prices are not refetched.
+    """
+    changes: dict[int, dict] = {}
+    for (asset_id, day), qty in deltas.items():
+        if qty:
+            day = day.date() if isinstance(day, datetime) else day
+            per_day = changes.setdefault(asset_id, {})
+            per_day[day] = per_day.get(day, 0.0) + qty
+    today = datetime.now().date()
+    changes = {a: days for a, days in changes.items() if min(days) <= today}
+    if not changes:
+        return
+    first = min(min(days) for days in changes.values())
+    first_str = first.strftime("%Y-%m-%d")
+
+    AV, NW = models.AssetValueHistory, models.NetWorthHistory
+    asset_rows = {
+        (r.asset_id, r.date): r for r in
+        db.query(AV).filter(AV.asset_id.in_(list(changes)), AV.date >= first_str)
+    }
+    days_rows = {r.date: r for r in db.query(NW).filter(NW.date >= first_str)}
+    if not asset_rows and not days_rows:
+        return
+    assets = {a.id: a for a in db.query(models.Asset).filter(models.Asset.id.in_(list(changes)))}
+
+    usdt_rate = get_usdt_twd_rate(db)
+    touched_weeks: set[str] = set()
+    breakdowns: dict[str, dict] = {}
+    for asset_id, per_day in changes.items():
+        asset = assets.get(asset_id)
+        if asset is None:
+            continue
+        price = asset.current_price or 0.0
+        if is_usd_denominated(asset):
+            price *= usdt_rate
+        sign = -1.0 if asset.category == "Liabilities" else 1.0
+        qty = 0.0
+        day = min(per_day)
+        while day <= today:
+            day_str = day.strftime("%Y-%m-%d")
+            qty += per_day.get(day, 0.0)
+            row = asset_rows.get((asset_id, day_str))
+            if row is not None:
+                price = row.price or 0.0
+                if qty:
+                    row.quantity = (row.quantity or 0.0) + qty
+                    row.value_twd = round(row.quantity * price, 2)
+            nw = days_rows.get(day_str)
+            if qty and nw is not None and asset.include_in_net_worth:
+                change = sign * qty * price
+                nw.value = round((nw.value or 0.0) + change, 0)
+                if day_str not in breakdowns:
+                    breakdowns[day_str] = json.loads(nw.breakdown) if nw.breakdown else {}
+                by_category = breakdowns[day_str]
+                by_category[asset.category] = round(by_category.get(asset.category, 0.0) + change, 0)
+                touched_weeks.add(week_bucket(day))
+            day += timedelta(days=1)
+
+    for day_str, by_category in breakdowns.items():
+        days_rows[day_str].breakdown = json.dumps(by_category)
+    db.flush()
+    for bucket in sorted(touched_weeks):
+        _upsert_week(db, datetime.strptime(bucket, "%Y-%m-%d").date())
+    if touched_weeks:
+        db.flush()
+        risk_service.rebuild_risk_state(db)
+
+
+def prune_rollups(db: Session, now: datetime) -> None:
+    """Apply the retention policy: raw captures → hourly buckets → daily rows.
+
+    Raw intraday rows are dropped once older than the intraday retention (their
+    hour buckets remain); hour buckets are dropped after the hourly retention
+    (NetWorthHistory keeps one row per day).  Daily and weekly data is kept.
+    """
+    raw_days = _setting_int(db, "intraday_retention_days", DEFAULT_INTRADAY_RETENTION_DAYS)
+    hour_days = _setting_int(db, "hourly_retention_days", DEFAULT_HOURLY_RETENTION_DAYS)
+    db.query(models.NetWorthIntraday).filter(
+        models.NetWorthIntraday.captured_at < now - timedelta(days=raw_days)
+    ).delete(synchronize_session=False)
+    db.query(models.NetWorthRollup).filter(
+        models.NetWorthRollup.resolution == "hour",
+        models.NetWorthRollup.bucket < hour_bucket(now - timedelta(days=hour_days)),
+    ).delete(synchronize_session=False)
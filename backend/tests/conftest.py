@@ -3,8 +3,10 @@
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from unittest.mock import patch
 
+from backend import market_db
 from backend.models import Base
 
 
@@ -13,11 +15,13 @@ def db():
     """Provide an isolated **in-memory** SQLite session for each test.
 
     All tables are created fresh for every test and torn down afterwards,
-    so tests are fully independent and leave no state on disk.
+    so tests are fully independent and leave no state on disk.  StaticPool
+    shares the single connection across threads (scheduler-style code).
     """
     engine = create_engine(
         "sqlite:///:memory:",
         connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
     )
     Base.metadata.create_all(engine)
     Session = sessionmaker(bind=engine)
@@ -27,6 +31,14 @@ def db():
     Base.metadata.drop_all(engine)
 
 
+@pytest.fixture(autouse=True)
+def market_database(tmp_path):
+    """Give each test its own, empty shared market database (``market.db``)."""
+    market_db.configure(f"sqlite:///{tmp_path / 'market.db'}")
+    yield
+    market_db.dispose()
+
+
 @pytest.fixture(autouse=True)
 def mock_exchange_rate():
     """Stub out the live exchange-rate lookup so tests never hit the network.
@@ -35,5 +47,6 @@ def mock_exchange_rate():
     name in that module's namespace is the correct approach.
     """
     with patch("backend.repositories.asset_repo.get_usdt_twd_rate", return_value=32.0), \
-         patch("backend.services.analytics_service.get_usdt_twd_rate", return_value=32.0):
+         patch("backend.services.analytics_service.get_usdt_twd_rate", return_value=32.0), \
+         patch("backend.services.snapshot_service.get_usdt_twd_rate", return_value=32.0):
         yield
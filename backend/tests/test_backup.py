@@ -0,0 +1,100 @@
+"""Tests for backup_service.py (online SQLite backups)."""
+
+import gzip
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import profile_manager
+from backend.services import backup_service
+
+
+@pytest.fixture
+def profile_db(tmp_path, monkeypatch):
+    """A WAL-mode profile DB under a temporary DATA_DIR."""
+    path = tmp_path / "sql_app.db"
+    monkeypatch.setattr(profile_manager, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(profile_manager, "get_db_url", lambda profile=None: f"sqlite:///{path}")
+    monkeypatch.setattr(backup_service, "zstandard", None)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")   # keep every commit in the -wal file
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO t (payload) VALUES (?)", [("x" * 500,) for _ in range(2_000)])
+    conn.commit()
+    yield path, conn
+    conn.close()
+
+
+def _restore(archive, tmp_path):
+    out = tmp_path / "restored.db"
+    out.write_bytes(gzip.decompress(archive.read_bytes()))
+    conn = sqlite3.connect(out)
+    try:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        return conn.execute("SELECT count(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_includes_commits_still_in_wal(profile_db, tmp_path):
+    path, conn = profile_db
+    assert (tmp_path / "sql_app.db-wal").stat().st_size > 0
+    archive = backup_service.create_backup(profile="default")
+    assert archive.name.endswith(".db.gz")
+    assert _restore(archive, tmp_path) == 2_000
+
+
+def test_concurrent_writes_yield_a_consistent_copy(profile_db, tmp_path):
+    path, conn = profile_db
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            conn.execute("INSERT INTO t (payload) VALUES ('y')")
+            conn.commit()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        dest = tmp_path / "copy.db"
+        backup_service.snapshot(path, dest, pages=8, sleep=0.001, max_restarts=1)
+    finally:
+        stop.set()
+        thread.join()
+    copy = sqlite3.connect(dest)
+    assert copy.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert copy.execute("SELECT count(*) FROM t").fetchone()[0] >= 2_000
+    copy.close()
+
+
+def test_zstd_requires_optional_package(profile_db):
+    assert backup_service.default_codec() == backup_service.GZIP
+    with pytest.raises(backup_service.CodecUnavailable):
+        backup_service.create_backup(codec="zstd")
+
+
+def test_iter_file_streams_and_removes_temp_file(profile_db):
+    archive = backup_service.create_backup()
+    size = archive.stat().st_size
+    chunks = list(backup_service.iter_file(archive))
+    assert sum(map(len, chunks)) == size
+    assert not archive.exists()
+
+
+def test_rotation_keeps_newest_per_profile(profile_db):
+    folder = backup_service.backup_dir()
+    start = datetime(2026, 1, 1)
+    for i in range(5):
+        (folder / backup_service.backup_name("default", "gzip", start + timedelta(days=i))).touch()
+    other = folder / backup_service.backup_name("work", "gzip", start)
+    other.touch()
+
+    newest = backup_service.run_scheduled_backup(keep=3, profile="default")
+    kept = sorted(p.name for p in folder.glob("yantage_backup_2*"))
+    assert len(kept) == 3
+    assert kept[-1] == newest.name
+    assert other.exists()
+    assert not list((folder / "tmp").iterdir())
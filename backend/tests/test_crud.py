@@ -5,10 +5,12 @@ every test is isolated and never touches the real data files.
 """
 
 import pytest
-from datetime import datetime
+from datetime import date, datetime
 
-from backend import schemas
+from backend import models, schemas
 from backend.repositories.asset_repo import AssetRepository
+from backend.services import lot_service
+from backend.utils.pagination import InvalidCursor, encode_cursor
 
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
@@ -158,3 +160,97 @@ def test_update_price(db):
     asset = repo.create(schemas.AssetCreate(name="BTC", category="Crypto", ticker="BTC", current_price=1_000.0))
     repo.update_price(asset.id, 2_500.0)
     assert repo.get(asset.id).current_price == pytest.approx(2_500.0)
+
+
+# ── Keyset paging ────────────────────────────────────────────────────────────
+
+def test_list_all_has_no_hard_cap(db):
+    repo = AssetRepository(db)
+    for i in range(120):
+        db.add(models.Asset(name=f"A{i}", category="Fluid", current_price=1.0))
+    db.commit()
+    assert len(repo.list_all()) == 120
+
+
+def test_asset_pages_cover_every_asset_once(db):
+    repo = AssetRepository(db)
+    for i in range(25):
+        db.add(models.Asset(name=f"A{i}", category="Fluid", current_price=1.0))
+    db.commit()
+    seen, cursor = [], None
+    while True:
+        page, cursor = repo.list_page(limit=10, cursor=cursor)
+        seen += [a.id for a in page]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(set(seen)) and len(seen) == 25
+
+
+def test_transaction_pages_newest_first_with_ties(db):
+    repo = AssetRepository(db)
+    asset = repo.create(_fluid_asset())
+    same_day = datetime(2025, 3, 1)
+    for i in range(7):
+        repo.create_transaction(
+            schemas.TransactionCreate(amount=i, buy_price=1.0, date=same_day if i % 2 else datetime(2025, 1, i + 1)),
+            asset.id,
+        )
+    keys, cursor = [], None
+    while True:
+        page, cursor = repo.list_transactions(limit=3, cursor=cursor)
+        keys += [(t.date, t.id) for t in page]
+        if cursor is None:
+            break
+    assert len(keys) == 7
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_transaction_filters(db):
+    repo = AssetRepository(db)
+    a, b = repo.create(_fluid_asset("A")), repo.create(_fluid_asset("B"))
+    repo.create_transaction(schemas.TransactionCreate(amount=1, buy_price=1, date=datetime(2025, 1, 5), note="Salary Jan"), a.id)
+    repo.create_transaction(schemas.TransactionCreate(amount=2, buy_price=1, date=datetime(2025, 2, 5), is_transfer=True), a.id)
+    repo.create_transaction(schemas.TransactionCreate(amount=3, buy_price=1, date=datetime(2025, 2, 28, 18)), b.id)
+
+    def amounts(**kw):
+        return sorted(t.amount for t in repo.list_transactions(**kw)[0])
+
+    assert amounts(asset_id=a.id) == [1, 2]
+    assert amounts(start=date(2025, 2, 1), end=date(2025, 2, 28)) == [2, 3]
+    assert amounts(is_transfer=True) == [2]
+    assert amounts(q="salary") == [1]
+
+
+def test_transaction_search_treats_wildcards_literally(db):
+    repo = AssetRepository(db)
+    a = repo.create(_fluid_asset())
+    for amount, note in ((1, "50% off"), (2, "500 off"), (3, "a_b"), (4, "axb")):
+        repo.create_transaction(schemas.TransactionCreate(amount=amount, buy_price=1, note=note), a.id)
+
+    def amounts(q):
+        return sorted(t.amount for t in repo.list_transactions(q=q)[0])
+
+    assert amounts("0%") == [1]
+    assert amounts("a_b") == [3]
+
+
+def test_invalid_cursor_rejected(db):
+    with pytest.raises(InvalidCursor):
+        AssetRepository(db).list_transactions(cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(None), encode_cursor("x"), encode_cursor(1, 2)])
+def test_invalid_asset_cursor_rejected(db, cursor):
+    with pytest.raises(InvalidCursor):
+        AssetRepository(db).list_page(limit=10, cursor=cursor)
+
+
+def test_asset_page_costs_only_page_assets(db, monkeypatch):
+    repo = AssetRepository(db)
+    for i in range(5):
+        repo.create(_fluid_asset(f"A{i}"))
+    requested = []
+    real = lot_service.open_cost_by_asset
+    monkeypatch.setattr(lot_service, "open_cost_by_asset", lambda db, ids=None: requested.append(ids) or real(db, ids))
+    page, _ = repo.list_page(limit=2, cursor=encode_cursor(1))
+    assert requested == [[a.id for a in page]] == [[2, 3]]
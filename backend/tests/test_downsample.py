@@ -0,0 +1,53 @@
+"""Tests for utils/downsample.py (LTTB + columnar shaping)."""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from backend.utils.downsample import downsample_points, lttb_indices, to_columnar
+
+
+def _points(values, with_breakdown=True):
+    start = date(2024, 1, 1)
+    return [
+        {
+            "date": (start + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "value": v,
+            **({"breakdown": {"Fluid": v, **({"Stock": 1.0} if i % 2 else {})}} if with_breakdown else {}),
+        }
+        for i, v in enumerate(values)
+    ]
+
+
+def test_lttb_keeps_endpoints_and_count():
+    x = np.arange(1_000, dtype=float)
+    y = np.sin(x / 20)
+    idx = lttb_indices(x, y, 100)
+    assert len(idx) == 100
+    assert idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_preserves_spike():
+    y = np.zeros(500)
+    y[250] = 100.0
+    idx = lttb_indices(np.arange(500, dtype=float), y, 20)
+    assert 250 in idx
+
+
+def test_lttb_noop_when_under_limit():
+    assert list(lttb_indices(np.arange(5.0), np.arange(5.0), 10)) == [0, 1, 2, 3, 4]
+
+
+def test_downsample_points_keeps_rows_consistent():
+    pts = _points([float(i) for i in range(300)])
+    out = downsample_points(pts, 50)
+    assert len(out) == 50
+    assert all(p["breakdown"]["Fluid"] == p["value"] for p in out)
+
+
+def test_to_columnar_fills_missing_categories():
+    cols = to_columnar(_points([1.0, 2.0, 3.0]))
+    assert cols["dates"] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert cols["values"] == [1.0, 2.0, 3.0]
+    assert cols["breakdown"]["Stock"] == [0, 1.0, 0]
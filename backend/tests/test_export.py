@@ -0,0 +1,70 @@
+"""Tests for export_service.py (streaming ledger export)."""
+
+import csv
+import gzip
+import io
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.services import export_service
+
+
+def _seed(db, n: int):
+    db.add(models.Asset(id=1, name="Cash, main", category="Fluid", current_price=1.0))
+    db.commit()
+    start = datetime(2024, 1, 1)
+    db.connection().execute(
+        models.Transaction.__table__.insert(),
+        [{"asset_id": 1, "amount": float(i), "buy_price": 1.0, "is_transfer": i % 2 == 0,
+          "date": start + timedelta(minutes=i), "note": "x" if i % 3 else None} for i in range(n)],
+    )
+    db.commit()
+
+
+def _export(db, **kw) -> list[bytes]:
+    return list(export_service.iter_ledger(session_factory=sessionmaker(bind=db.get_bind()), **kw))
+
+
+def test_csv_streams_in_batches(db):
+    _seed(db, 2_500)
+    chunks = _export(db, fmt="csv")
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == export_service.COLUMNS
+    assert len(rows) == 2_501
+    assert rows[1][3] == "Cash, main"
+
+
+def test_ndjson_gzip_roundtrip(db):
+    _seed(db, 10)
+    data = gzip.decompress(b"".join(_export(db, fmt="ndjson", gzip=True)))
+    lines = [json.loads(line) for line in data.decode().splitlines()]
+    assert [r["amount"] for r in lines] == [float(i) for i in range(10)]
+    assert lines[0]["is_transfer"] is True and lines[0]["note"] is None
+
+
+def test_empty_ledger_csv_has_header(db):
+    assert b"".join(_export(db, fmt="csv")).decode().strip() == ",".join(export_service.COLUMNS)
+
+
+def _peak(db, n: int) -> int:
+    _seed(db, n)
+    tracemalloc.start()
+    for _ in export_service.iter_ledger(session_factory=sessionmaker(bind=db.get_bind())):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def test_peak_memory_independent_of_ledger_size(db):
+    small = _peak(db, 2_000)
+    db.query(models.Transaction).delete()
+    db.query(models.Asset).delete()
+    db.commit()
+    large = _peak(db, 20_000)
+    assert large < small * 2
@@ -0,0 +1,126 @@
+"""Tests for forecast_service.py (Monte Carlo goal forecast)."""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base
+from backend.services import analytics_service, forecast_service
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    forecast_service._cache.clear()
+
+
+def _deterministic(r: float, c: float) -> dict:
+    return {"monthly_return": r, "monthly_return_std": 0.0,
+            "monthly_contribution": c, "monthly_contribution_std": 0.0}
+
+
+def test_closed_form_matches_recurrence():
+    paths = forecast_service.simulate_paths(1_000.0, _deterministic(0.01, 50.0), n_paths=2, months=24)
+    w = 1_000.0
+    for t in range(24):
+        w = w * 1.01 + 50.0
+        assert paths[0, t] == pytest.approx(w, rel=1e-5)
+
+
+def test_arrival_months_first_crossing_and_unreached():
+    paths = np.array([[1, 5, 3, 8], [1, 2, 2, 2]], dtype=np.float32)
+    out = forecast_service.arrival_months(paths, [4.0])
+    assert out[0, 0] == 2
+    assert np.isinf(out[0, 1])
+
+
+def test_fit_recovers_return_and_contribution():
+    w = [1_000_000.0]
+    for _ in range(36):
+        w.append(w[-1] * 1.008 + 20_000)
+    model = forecast_service.fit_model(np.array(w))
+    assert model["monthly_return"] == pytest.approx(0.008, abs=1e-6)
+    assert model["monthly_contribution"] == pytest.approx(20_000, rel=1e-4)
+    assert forecast_service.fit_model(np.array(w[:3])) is None
+
+
+def test_antithetic_pairs_mirror_shocks():
+    model = {"monthly_return": 0.0, "monthly_return_std": 0.05,
+             "monthly_contribution": 0.0, "monthly_contribution_std": 0.0}
+    paths = forecast_service.simulate_paths(100.0, model, n_paths=4, months=1)
+    assert paths[0, 0] + paths[2, 0] == pytest.approx(200.0)
+    assert paths[1, 0] + paths[3, 0] == pytest.approx(200.0)
+
+
+def _month_end_history(db, months: int, growth: float = 1.005):
+    value = 1_000_000.0
+    for i in range(months):
+        year, month = 2024 + i // 12, i % 12 + 1
+        month_end = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        db.add(models.NetWorthHistory(date=month_end.isoformat(), value=value))
+        value = value * growth + 30_000
+    db.commit()
+
+
+def test_goal_forecast_returns_percentile_dates(db, mocker):
+    _month_end_history(db, 24)
+    mocker.patch.object(
+        analytics_service, "get_net_worth_history",
+        return_value=[{"date": "2025-12-31", "value": 1_800_000.0}],
+    )
+    db.add(models.Goal(name="Big", target_amount=5_000_000, goal_type="NET_WORTH"))
+    db.add(models.Goal(name="Done", target_amount=10, goal_type="NET_WORTH"))
+    db.commit()
+
+    result = analytics_service.compute_goal_forecast(db)
+    assert result["simulation"]["paths"] == forecast_service.N_PATHS
+    big, done = sorted(result["forecasts"], key=lambda f: -f["target_amount"])
+    assert big["p10_date"] is not None and big["p90_date"] is not None
+    assert 0 < big["probability"] <= 1
+    assert done["predicted_date"] == "Achieved" and done["probability"] == 1.0
+    assert "growth_rate_6mo" in result
+
+
+def test_forecast_cached_until_data_changes(db, mocker):
+    _month_end_history(db, 12)
+    goal = models.Goal(id=1, name="G", target_amount=1e8, goal_type="NET_WORTH")
+    spy = mocker.spy(forecast_service, "simulate_paths")
+    forecast_service.forecast_goals(db, 2e6, [goal])
+    forecast_service.forecast_goals(db, 2e6, [goal])
+    assert spy.call_count == 1
+    db.add(models.NetWorthHistory(date="2030-01-31", value=3e6))
+    db.commit()
+    forecast_service.forecast_goals(db, 2e6, [goal])
+    assert spy.call_count == 2
+
+
+def test_forecast_cached_per_profile(tmp_path):
+    """Profiles with the same snapshot count and dates don't share a result."""
+    results = []
+    for name, growth in (("a", 1.001), ("b", 1.02)):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        _month_end_history(db, 12, growth)
+        goal = models.Goal(id=1, name="G", target_amount=1e8, goal_type="NET_WORTH")
+        results.append(forecast_service.forecast_goals(db, 2e6, [goal], date(2026, 1, 1)))
+        db.close()
+        engine.dispose()
+    a, b = results
+    assert a["simulation"]["monthly_return"] != b["simulation"]["monthly_return"]
+    assert len(forecast_service._cache) == 2
+
+
+def test_path_count_setting(db, mocker):
+    _month_end_history(db, 12)
+    goal = models.Goal(id=1, name="G", target_amount=1e8, goal_type="NET_WORTH")
+    spy = mocker.spy(forecast_service, "simulate_paths")
+    assert forecast_service.forecast_goals(db, 2e6, [goal])["simulation"]["paths"] == 10_000
+    db.add(models.SystemSetting(key="forecast_paths", value="2000"))
+    db.commit()
+    assert forecast_service.forecast_goals(db, 2e6, [goal])["simulation"]["paths"] == 2_000
+    assert spy.call_args.kwargs["n_paths"] == 2_000
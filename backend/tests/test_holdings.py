@@ -0,0 +1,92 @@
+"""Tests for holdings_service.py (point-in-time holdings via monthly checkpoints)."""
+
+from datetime import date, datetime
+
+import pytest
+
+from backend import models, schemas
+from backend.repositories.asset_repo import AssetRepository
+from backend.services import holdings_service
+
+
+def _asset(db, name: str) -> models.Asset:
+    return AssetRepository(db).create(schemas.AssetCreate(name=name, category="Stock", ticker=name, current_price=1.0))
+
+
+def _trade(db, asset_id: int, amount: float, price: float, day: datetime) -> models.Transaction:
+    return AssetRepository(db).create_transaction(
+        schemas.TransactionCreate(amount=amount, buy_price=price, date=day), asset_id
+    )
+
+
+def _naive_quantity(db, asset_id: int, as_of: date) -> float:
+    end = datetime(as_of.year, as_of.month, as_of.day, 23, 59, 59, 999999)
+    return sum(t.amount for t in db.query(models.Transaction).filter_by(asset_id=asset_id) if t.date <= end)
+
+
+def _held(db, as_of: date) -> dict:
+    return {h["name"]: h for h in holdings_service.holdings_as_of(db, as_of)}
+
+
+def test_as_of_matches_full_replay(db):
+    a, b = _asset(db, "AAA"), _asset(db, "BBB")
+    for month in range(1, 13):
+        _trade(db, a.id, 10, 100 + month, datetime(2024, month, 5))
+        _trade(db, a.id, -3, 120, datetime(2024, month, 20))
+        if month % 3 == 0:
+            _trade(db, b.id, 1, 500, datetime(2024, month, 15))
+
+    def check():
+        for as_of in (date(2024, 1, 4), date(2024, 3, 15), date(2024, 6, 19), date(2024, 6, 20), date(2025, 1, 1)):
+            held = _held(db, as_of)
+            for asset in (a, b):
+                expected = _naive_quantity(db, asset.id, as_of)
+                got = held[asset.name]["quantity"] if asset.name in held else 0.0
+                assert got == pytest.approx(expected), (asset.name, as_of)
+
+    check()                                     # no checkpoints: full replay
+    holdings_service.ensure_checkpoints(db)
+    check()
+
+
+def test_as_of_is_read_only_and_replays_past_stale_checkpoints(db):
+    a = _asset(db, "AAA")
+    _trade(db, a.id, 5, 10, datetime(2024, 1, 10))
+    holdings_service.ensure_checkpoints(db, today=date(2024, 2, 1))
+    _trade(db, a.id, 3, 10, datetime(2024, 3, 10))
+    _trade(db, a.id, 2, 10, datetime(2024, 5, 10))
+    assert _held(db, date(2024, 6, 30))["AAA"]["quantity"] == 10
+    assert db.query(models.HoldingCheckpoint).count() == 1
+    assert not db.new and not db.dirty
+
+
+def test_checkpoints_only_for_completed_months_and_incremental(db):
+    a = _asset(db, "AAA")
+    _trade(db, a.id, 5, 10, datetime(2024, 1, 10))
+    _trade(db, a.id, 5, 20, datetime(2024, 2, 10))
+    assert holdings_service.ensure_checkpoints(db, today=date(2024, 2, 15)) == 1
+    assert holdings_service.ensure_checkpoints(db, today=date(2024, 2, 16)) == 0
+    assert holdings_service.ensure_checkpoints(db, today=date(2024, 3, 1)) == 1
+    feb = db.query(models.HoldingCheckpoint).filter_by(asset_id=a.id, month="2024-02").one()
+    assert (feb.quantity, feb.cost, feb.tx_count) == (10, 150, 2)
+
+
+def test_back_dated_transaction_invalidates_later_checkpoints(db):
+    a = _asset(db, "AAA")
+    _trade(db, a.id, 5, 10, datetime(2024, 1, 10))
+    _trade(db, a.id, 5, 10, datetime(2024, 3, 10))
+    holdings_service.ensure_checkpoints(db)
+    assert _held(db, date(2024, 4, 1))["AAA"]["quantity"] == 10
+    _trade(db, a.id, 7, 10, datetime(2024, 2, 1))
+    assert db.query(models.HoldingCheckpoint).filter(models.HoldingCheckpoint.month >= "2024-02").count() == 0
+    assert _held(db, date(2024, 4, 1))["AAA"]["quantity"] == 17
+    assert _held(db, date(2024, 1, 31))["AAA"]["quantity"] == 5
+
+
+def test_value_comes_from_snapshot_when_available(db):
+    a = _asset(db, "AAA")
+    _trade(db, a.id, 2, 10, datetime(2024, 1, 10))
+    db.add(models.AssetValueHistory(asset_id=a.id, date="2024-01-15", quantity=2, price=12.0, value_twd=24.0))
+    db.commit()
+    assert _held(db, date(2024, 1, 15))["AAA"]["value_twd"] == 24.0
+    assert _held(db, date(2024, 1, 16))["AAA"]["value_twd"] is None
@@ -0,0 +1,134 @@
+"""Tests for import_service.py (bulk transaction import)."""
+
+import asyncio
+import io
+import json
+from datetime import date, datetime, timedelta
+
+import httpx
+from sqlalchemy.orm import sessionmaker
+
+from backend import database, models
+from backend.devtools import fakes
+from backend.services import export_service, holdings_service, import_service, lot_service
+
+
+def _assets(db):
+    db.add_all([
+        models.Asset(id=1, name="Cash", category="Fluid", current_price=1.0),
+        models.Asset(id=2, name="Apple", ticker="AAPL", category="Investment", current_price=200.0),
+        models.Asset(id=3, name="Dup", category="Fluid"),
+        models.Asset(id=4, name="dup", category="Fluid"),
+    ])
+    db.commit()
+
+
+def _csv(text: str) -> io.BytesIO:
+    return io.BytesIO(text.encode())
+
+
+def test_csv_import_resolves_assets_and_reports_bad_rows(db):
+    _assets(db)
+    result = import_service.import_transactions(db, _csv(
+        "asset,amount,buy_price,date,is_transfer,note\n"
+        "Cash,100,1,2024-01-05,false,salary\n"
+        "aapl,2,150.5,2024-02-01T10:30:00,,\n"
+        "apple,-1,180,2024-03-01,0,\n"
+        "Nope,1,1,2024-01-01,,\n"
+        "Cash,abc,1,2024-01-01,,\n"
+        "Cash,1,1,,,\n"
+        "dup,1,1,2024-01-01,,\n"
+    ))
+    assert result["imported"] == 3
+    assert result["failed"] == 4
+    assert [e["row"] for e in result["errors"]] == [4, 5, 6, 7]
+    assert "several assets" in result["errors"][3]["error"]
+    assert result["earliest"] == datetime(2024, 1, 5)
+
+    rows = db.query(models.Transaction).order_by(models.Transaction.date).all()
+    assert [(t.asset_id, t.amount, t.note) for t in rows] == [(1, 100.0, "salary"), (2, 2.0, None), (2, -1.0, None)]
+
+
+def test_ndjson_import_and_dry_run(db):
+    _assets(db)
+    body = "\n".join([
+        json.dumps({"ticker": "AAPL", "amount": 3, "buy_price": 100, "date": "2024-01-01"}),
+        "{not json",
+        json.dumps({"asset_id": 1, "amount": 5, "date": "2024-01-02", "is_transfer": True}),
+        "",
+    ])
+    dry = import_service.import_transactions(db, _csv(body), fmt="ndjson", dry_run=True)
+    assert (dry["imported"], dry["failed"]) == (2, 1)
+    assert db.query(models.Transaction).count() == 0
+
+    result = import_service.import_transactions(db, _csv(body), fmt="ndjson")
+    assert result["imported"] == 2
+    assert db.query(models.Transaction).filter_by(asset_id=1).one().is_transfer is True
+
+
+def test_export_round_trips_through_import(db):
+    _assets(db)
+    db.add_all([
+        models.Transaction(asset_id=2, amount=1.5, buy_price=10.0, date=datetime(2024, 5, 1), note="a, b"),
+        models.Transaction(asset_id=1, amount=-3.0, buy_price=1.0, date=datetime(2024, 5, 2), is_transfer=True),
+    ])
+    db.commit()
+    exported = b"".join(export_service.iter_ledger(session_factory=sessionmaker(bind=db.get_bind())))
+    result = import_service.import_transactions(db, io.BytesIO(exported))
+    assert result["imported"] == 2
+    assert db.query(models.Transaction).count() == 4
+
+
+def test_chunked_commits_and_single_invalidation(db, monkeypatch):
+    monkeypatch.setattr(import_service, "BATCH_SIZE", 7)
+    monkeypatch.setattr(import_service, "COMMIT_ROWS", 20)
+    _assets(db)
+    db.add(models.Transaction(asset_id=2, amount=10, buy_price=100, date=datetime(2024, 6, 1)))
+    db.commit()
+    holdings_service.ensure_checkpoints(db, date(2024, 9, 1))
+    lot_service.sync_lots(db)
+    assert db.query(models.HoldingCheckpoint).filter_by(asset_id=2).count() == 1
+
+    lines = ["ticker,amount,buy_price,date"] + [f"AAPL,1,50,2024-03-{d:02d}" for d in range(1, 29)]
+    result = import_service.import_transactions(db, _csv("\n".join(lines)))
+    assert result["imported"] == 28
+    # Back-dated into March: the June checkpoint is dropped, lots rebuild in date order.
+    assert db.query(models.HoldingCheckpoint).filter_by(asset_id=2).count() == 0
+    assert lot_service.open_cost_by_asset(db, [2])[2] == 28 * 50 + 10 * 100
+    held = {h["asset_id"]: h["quantity"] for h in holdings_service.holdings_as_of(db, date(2024, 4, 1))}
+    assert held[2] == 28
+
+
+def test_back_dated_import_refreshes_history(db):
+    from backend.main import app
+
+    today = datetime.now().date()
+    db.add(models.Asset(id=1, name="Cash", category="Fluid", current_price=1.0, include_in_net_worth=True))
+    db.add(models.Transaction(asset_id=1, amount=100, buy_price=1, date=datetime(2024, 1, 1)))
+    for i in range(31):
+        db.add(models.NetWorthHistory(date=(today - timedelta(days=i)).strftime("%Y-%m-%d"), value=100,
+                                      breakdown=json.dumps({"Fluid": 100})))
+    db.commit()
+    app.dependency_overrides[database.get_db] = lambda: db
+
+    def history():
+        async def go():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return (await client.get("/api/stats/history?range=30d")).json()
+        return asyncio.run(go())
+
+    try:
+        with fakes.offline():
+            assert history()[-1]["value"] == 100
+            since = today - timedelta(days=10)
+            import_service.import_transactions(db, _csv(f"asset_id,amount,buy_price,date\n1,5000,1,{since}\n"))
+            points = {p["date"]: p["value"] for p in history()}
+    finally:
+        app.dependency_overrides.clear()
+
+    assert points[today.strftime("%Y-%m-%d")] == 5100
+    assert points[since.strftime("%Y-%m-%d")] == 5100
+    assert points[(since - timedelta(days=1)).strftime("%Y-%m-%d")] == 100
+    assert db.query(models.NetWorthHistory).count() == 31     # restated, not dropped
+    assert db.get(models.RiskMetricState, 1).last_value == 5100
@@ -0,0 +1,84 @@
+"""Tests for observability/jobs.py (scheduler job telemetry).
+
+``database.SessionLocal`` is pointed at the in-memory test engine so the
+persisted ``job_runs`` rows land in the per-test database.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend import database, models
+from backend.observability import jobs
+
+
+@pytest.fixture(autouse=True)
+def _job_session(db, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    jobs._runs.clear()
+    yield
+
+
+def test_run_tracked_records_success(db):
+    assert jobs.run_tracked("unit_ok", lambda: 42) == 42
+    run = db.query(models.JobRun).filter_by(job_name="unit_ok").one()
+    assert run.status == "success"
+    assert run.duration_ms >= 0
+
+
+def test_run_tracked_records_failure_and_reraises(db):
+    def boom():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        jobs.run_tracked("unit_fail", boom)
+    run = db.query(models.JobRun).filter_by(job_name="unit_fail").one()
+    assert run.status == "failure"
+    assert "upstream down" in run.error
+
+
+def test_tracked_job_decorator_swallows_errors(db):
+    @jobs.tracked_job("unit_decorated")
+    def job():
+        raise RuntimeError("nope")
+
+    assert job() is None
+    assert db.query(models.JobRun).filter_by(job_name="unit_decorated", status="failure").count() == 1
+
+
+def test_overlapping_run_is_skipped(db):
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(timeout=5)
+
+    t = threading.Thread(target=jobs.run_tracked, args=("unit_slow", slow))
+    t.start()
+    started.wait(timeout=5)
+    try:
+        assert jobs.is_running("unit_slow")
+        with pytest.raises(jobs.JobAlreadyRunning):
+            jobs.run_tracked("unit_slow", lambda: None, raise_on_overlap=True)
+    finally:
+        release.set()
+        t.join()
+
+    assert not jobs.is_running("unit_slow")
+    statuses = sorted(r.status for r in db.query(models.JobRun).filter_by(job_name="unit_slow"))
+    assert statuses == ["skipped", "success"]
+
+
+def test_job_stats_percentiles_and_counts(db):
+    for _ in range(3):
+        jobs.run_tracked("unit_stats", lambda: None)
+    with pytest.raises(KeyError):
+        jobs.run_tracked("unit_stats", lambda: {}["missing"])
+
+    stats = {s["job"]: s for s in jobs.job_stats(db)}["unit_stats"]
+    assert stats["success_count"] == 3
+    assert stats["failure_count"] == 1
+    assert stats["last_status"] == "failure"
+    assert stats["last_success_at"] is not None
+    assert stats["p95_ms"] >= stats["p50_ms"] >= 0
@@ -0,0 +1,28 @@
+"""Tests for the report side of devtools/loadtest.py."""
+
+from backend.devtools import loadtest
+
+
+def test_summarize_per_route_and_total():
+    result = {
+        "duration": 2.0,
+        "concurrency": 4,
+        "samples": {
+            "GET /a": [(i / 1000, True) for i in range(1, 101)],
+            "POST /b": [(0.010, True), (0.020, False)],
+        },
+    }
+    summary = loadtest.summarize(result, busy_errors=3)
+
+    a = summary["routes"]["GET /a"]
+    assert a["requests"] == 100 and a["rps"] == 50.0
+    assert a["p50_ms"] < a["p95_ms"] < a["p99_ms"] <= 100.0
+    assert summary["routes"]["POST /b"]["error_pct"] == 50.0
+    assert summary["total"]["requests"] == 102
+    assert summary["sqlite_busy_errors"] == 3
+    assert "SQLite busy/locked errors: 3" in loadtest.format_report(summary)
+
+
+def test_mix_routes_are_unique():
+    names = [r.name for r in loadtest.MIX]
+    assert len(names) == len(set(names))
@@ -0,0 +1,125 @@
+"""Tests for lot_service.py (FIFO / average-cost lots and realized P&L)."""
+
+from datetime import datetime
+
+import pytest
+
+from backend import models, schemas
+from backend.repositories.asset_repo import AssetRepository
+from backend.services import analytics_service, lot_service
+
+
+def _stock(db, price: float = 150.0) -> models.Asset:
+    return AssetRepository(db).create(
+        schemas.AssetCreate(name="TSMC", category="Stock", ticker="2330.TW", current_price=price)
+    )
+
+
+def _trade(db, asset_id: int, amount: float, price: float, day: datetime, **kw) -> models.Transaction:
+    return AssetRepository(db).create_transaction(
+        schemas.TransactionCreate(amount=amount, buy_price=price, date=day, **kw), asset_id
+    )
+
+
+def _raw(db, asset_id: int, amount: float, price: float, day: datetime) -> None:
+    """A transaction written outside the repository (e.g. by a provider), left unsynced."""
+    db.add(models.Transaction(asset_id=asset_id, amount=amount, buy_price=price, date=day))
+    db.commit()
+
+
+def _realized(db, asset_id: int) -> float:
+    rows = lot_service.realized_by_asset(db, asset_id)
+    return rows[0]["realized"] if rows else 0.0
+
+
+def test_fifo_sell_realizes_against_oldest_lot(db):
+    a = _stock(db)
+    _trade(db, a.id, 10, 100, datetime(2024, 1, 1))
+    _trade(db, a.id, 10, 120, datetime(2024, 2, 1))
+    _trade(db, a.id, -15, 130, datetime(2024, 3, 1))
+    assert _realized(db, a.id) == pytest.approx(10 * 30 + 5 * 10)
+    assert lot_service.open_cost_by_asset(db)[a.id] == pytest.approx(5 * 120)
+
+
+def test_average_cost_mode(db):
+    db.add(models.SystemSetting(key="cost_basis_method", value="average"))
+    db.commit()
+    a = _stock(db)
+    _trade(db, a.id, 10, 100, datetime(2024, 1, 1))
+    _trade(db, a.id, 10, 120, datetime(2024, 2, 1))
+    _trade(db, a.id, -15, 130, datetime(2024, 3, 1))
+    assert _realized(db, a.id) == pytest.approx(15 * 20)
+    assert lot_service.open_cost_by_asset(db)[a.id] == pytest.approx(5 * 110)
+
+
+def test_sell_reduces_invested_capital_in_roi(db):
+    a = _stock(db, price=150.0)
+    _trade(db, a.id, 10, 100, datetime(2024, 1, 1))
+    _trade(db, a.id, -5, 140, datetime(2024, 2, 1))
+    asset = AssetRepository(db).get(a.id)
+    assert asset.unrealized_pl == pytest.approx(5 * 150 - 5 * 100)
+    assert asset.roi == pytest.approx(50.0)
+
+
+def test_transfer_out_realizes_nothing(db):
+    a = _stock(db)
+    _trade(db, a.id, 10, 100, datetime(2024, 1, 1))
+    _trade(db, a.id, -4, 1.0, datetime(2024, 2, 1), is_transfer=True)
+    assert _realized(db, a.id) == 0.0
+    assert lot_service.open_cost_by_asset(db)[a.id] == pytest.approx(6 * 100)
+
+
+def test_only_new_transactions_are_processed(db):
+    a = _stock(db)
+    _raw(db, a.id, 10, 100, datetime(2024, 1, 1))
+    _raw(db, a.id, 10, 110, datetime(2024, 2, 1))
+    assert lot_service.sync_lots(db) == 2
+    assert lot_service.sync_lots(db) == 0
+    _raw(db, a.id, -5, 130, datetime(2024, 3, 1))
+    assert lot_service.sync_lots(db) == 1
+
+
+def test_back_dated_transaction_rebuilds_asset(db):
+    a = _stock(db)
+    _trade(db, a.id, 10, 100, datetime(2024, 2, 1))
+    _trade(db, a.id, -10, 130, datetime(2024, 3, 1))
+    assert _realized(db, a.id) == pytest.approx(300)
+    _raw(db, a.id, 10, 50, datetime(2024, 1, 1))   # older, cheaper lot now sold first
+    assert lot_service.sync_lots(db) == 3
+    assert _realized(db, a.id) == pytest.approx(800)
+
+
+def test_reads_do_not_sync(db):
+    a = _stock(db)
+    _trade(db, a.id, 10, 100, datetime(2024, 1, 1))
+    _raw(db, a.id, 10, 120, datetime(2024, 2, 1))
+    repo = AssetRepository(db)
+    assert repo.get(a.id).unrealized_pl == pytest.approx(20 * 150 - 10 * 100)
+    assert lot_service.open_cost_by_asset(db)[a.id] == pytest.approx(1000)
+    assert not db.new and not db.dirty
+    assert lot_service.sync_lots(db) == 1
+
+    _trade(db, a.id, -5, 130, datetime(2024, 3, 1))    # repository writes sync
+    assert _realized(db, a.id) == pytest.approx(5 * 30)
+
+
+def test_edit_and_delete_invalidate(db):
+    a = _stock(db)
+    buy = _trade(db, a.id, 10, 100, datetime(2024, 1, 1))
+    sell = _trade(db, a.id, -10, 130, datetime(2024, 2, 1))
+    assert _realized(db, a.id) == pytest.approx(300)
+    repo = AssetRepository(db)
+    repo.update_transaction(buy.id, schemas.TransactionUpdate(buy_price=90))
+    assert _realized(db, a.id) == pytest.approx(400)
+    repo.delete_transaction(sell.id)
+    assert _realized(db, a.id) == 0.0
+    assert lot_service.open_cost_by_asset(db)[a.id] == pytest.approx(900)
+
+
+def test_yearly_realized_pnl(db):
+    a = _stock(db)
+    _trade(db, a.id, 20, 100, datetime(2023, 1, 1))
+    _trade(db, a.id, -5, 120, datetime(2023, 6, 1))
+    _trade(db, a.id, -5, 90, datetime(2024, 6, 1))
+    yearly = analytics_service.compute_realized_pnl_yearly(db)
+    assert [(y["year"], y["realized_twd"], y["trades"]) for y in yearly] == [(2023, 100, 1), (2024, -50, 1)]
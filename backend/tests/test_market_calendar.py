@@ -0,0 +1,105 @@
+"""Tests for market_calendar.py and market-aware update_prices.
+
+Upstream quote functions are patched so no network access is needed.
+"""
+
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from backend import models
+from backend.services import market_calendar as mc
+from backend.services import price_service
+
+TPE = ZoneInfo("Asia/Taipei")
+NYC = ZoneInfo("America/New_York")
+
+
+# ── Calendar ──────────────────────────────────────────────────────────────────
+
+def test_tw_open_during_session():
+    assert mc.is_open(mc.TW, datetime(2026, 10, 20, 10, 0, tzinfo=TPE))  # Tuesday
+
+
+def test_tw_closed_after_session_and_weekend():
+    assert not mc.is_open(mc.TW, datetime(2026, 10, 20, 14, 0, tzinfo=TPE))
+    assert not mc.is_open(mc.TW, datetime(2026, 10, 24, 10, 0, tzinfo=TPE))  # Saturday
+
+
+def test_us_holidays():
+    us = mc.holidays(mc.US, 2026)
+    assert date(2026, 11, 26) in us   # Thanksgiving
+    assert date(2026, 4, 3) in us     # Good Friday
+    assert date(2026, 7, 3) in us     # July 4th (Saturday) observed Friday
+    assert not mc.is_open(mc.US, datetime(2026, 11, 26, 11, 0, tzinfo=NYC))
+
+
+def test_last_close_skips_weekend():
+    monday_morning = datetime(2026, 10, 19, 8, 0, tzinfo=NYC)
+    assert mc.last_close(mc.US, monday_morning) == datetime(2026, 10, 16, 16, 0, tzinfo=NYC)
+
+
+def test_needs_refresh_once_after_close():
+    now = datetime(2026, 10, 20, 20, 0, tzinfo=TPE)
+    during_session = datetime(2026, 10, 20, 12, 0, tzinfo=TPE)
+    after_close = datetime(2026, 10, 20, 14, 0, tzinfo=TPE)
+    assert mc.needs_refresh(mc.TW, during_session, now)
+    assert not mc.needs_refresh(mc.TW, after_close, now)
+    assert mc.needs_refresh(mc.CRYPTO, after_close, now)
+
+
+# ── update_prices ─────────────────────────────────────────────────────────────
+
+def _asset(db, name, ticker, category, updated_at):
+    a = models.Asset(name=name, ticker=ticker, category=category, current_price=1.0, last_updated_at=updated_at)
+    db.add(a)
+    db.commit()
+    return a
+
+
+@pytest.fixture
+def quotes(mocker):
+    stock = mocker.patch("backend.services.price_service.fetch_stock_price", return_value=100.0)
+    crypto = mocker.patch(
+        "backend.services.price_service.fetch_crypto_prices",
+        side_effect=lambda tickers: {t: 5.0 for t in tickers},
+    )
+    return stock, crypto
+
+
+def test_closed_market_costs_nothing(db, quotes):
+    stock, _ = quotes
+    saturday = datetime(2026, 10, 24, 12, 0, tzinfo=TPE)
+    _asset(db, "TSMC", "2330", "Stock", saturday.replace(tzinfo=None) - timedelta(hours=1))
+    assert price_service.update_prices(db, now=saturday) == 0
+    stock.assert_not_called()
+
+
+def test_crypto_batched_into_one_call(db, quotes):
+    _, crypto = quotes
+    old = datetime(2026, 1, 1)
+    _asset(db, "BTC", "BTC", "Crypto", old)
+    _asset(db, "ETH", "ETH", "Crypto", old)
+    assert price_service.update_prices(db, markets={mc.CRYPTO}) == 1
+    crypto.assert_called_once()
+    assert {a.current_price for a in db.query(models.Asset)} == {5.0}
+
+
+def test_budget_takes_stalest_first(db, quotes):
+    stock, _ = quotes
+    _asset(db, "Fresh", "MSFT", "Stock", datetime(2026, 1, 3))
+    _asset(db, "Stale", "AAPL", "Stock", datetime(2026, 1, 1))
+    _asset(db, "Middle", "NVDA", "Stock", datetime(2026, 1, 2))
+    open_us = datetime(2026, 10, 20, 11, 0, tzinfo=NYC)
+    assert price_service.update_prices(db, budget=2, now=open_us) == 2
+    assert sorted(c.args[0] for c in stock.call_args_list) == ["AAPL", "NVDA"]
+
+
+def test_shared_ticker_fetched_once(db, quotes):
+    stock, _ = quotes
+    _asset(db, "Broker A", "VTI", "Stock", datetime(2026, 1, 1))
+    _asset(db, "Broker B", "VTI", "Stock", datetime(2026, 1, 1))
+    open_us = datetime(2026, 10, 20, 11, 0, tzinfo=NYC)
+    assert price_service.update_prices(db, now=open_us) == 1
+    stock.assert_called_once_with("VTI")
@@ -0,0 +1,129 @@
+"""Tests for the shared market database (market_db / market_data_service)."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from backend import market_db, models
+from backend.devtools import fakes
+from backend.services import analytics_service, exchange_rate_service, market_data_service, price_service
+
+STALE = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def offline():
+    with fakes.offline():
+        yield
+
+
+def _asset(db, ticker, category="Stock"):
+    asset = models.Asset(name=ticker, ticker=ticker, category=category, source="manual", last_updated_at=STALE)
+    db.add(asset)
+    db.commit()
+    return asset
+
+
+def test_quotes_are_fetched_once_for_every_holder(db, offline):
+    _asset(db, "AAPL")
+    _asset(db, "BTC-USD", "Crypto")
+    assert price_service.update_prices(db) == 2
+
+    # A second holder of the same tickers, e.g. in a newly added profile.
+    late = [_asset(db, "AAPL"), _asset(db, "BTC-USD", "Crypto")]
+    assert price_service.update_prices(db) == 0
+    assert price_service.fetch_stock_price.call_count == 1
+    assert price_service.fetch_crypto_prices.call_count == 1
+    assert [a.current_price for a in late] == [fakes.price("AAPL"), fakes.price("BTC-USD")]
+
+
+def test_expired_quote_is_fetched_again(db, offline):
+    _asset(db, "BTC-USD", "Crypto")
+    price_service.update_prices(db)
+    with market_db.session() as m:
+        m.query(market_db.Quote).update({"fetched_at": datetime.now() - 2 * market_data_service.QUOTE_TTL})
+        m.commit()
+    assert price_service.update_prices(db) == 1
+
+
+def test_history_served_from_market_db(offline):
+    start = date.today() - timedelta(days=30)
+    first = analytics_service.fetch_yahoo_history(["AAPL", "MSFT"], start)
+    again = analytics_service.fetch_yahoo_history(["AAPL", "MSFT"], start)
+    assert again == first and set(first) == {"AAPL", "MSFT"}
+    assert analytics_service.yf.download.call_count == 1
+
+    # A shorter window is covered; a new symbol downloads only itself.
+    analytics_service.fetch_yahoo_history(["AAPL"], start + timedelta(days=10))
+    analytics_service.fetch_yahoo_history(["AAPL", "TSLA"], start)
+    assert analytics_service.yf.download.call_count == 2
+    assert analytics_service.yf.download.call_args.args[0] == ["TSLA"]
+
+
+def test_stale_history_refetches_only_the_tail(offline):
+    start = date.today() - timedelta(days=60)
+    analytics_service.fetch_yahoo_history(["AAPL"], start)
+    fetched_at = datetime.now() - 2 * market_data_service.HISTORY_TTL
+    with market_db.session() as m:
+        m.query(market_db.HistoryRange).update({"fetched_at": fetched_at})
+        m.commit()
+
+    history = analytics_service.fetch_yahoo_history(["AAPL"], start)
+    since = analytics_service.yf.download.call_args.kwargs["start"]
+    assert since == (fetched_at.date() - market_data_service.HISTORY_OVERLAP).strftime("%Y-%m-%d")
+    assert min(history["AAPL"]) == (start - timedelta(days=7)).strftime("%Y-%m-%d")
+
+
+def test_fx_rate_shared_through_market_db(offline):
+    assert exchange_rate_service.get_usdt_twd_rate() == fakes.USD_TWD
+    assert market_data_service.latest_fx(market_data_service.USDT_TWD)[0] == fakes.USD_TWD
+
+    # A fresh process (empty in-memory cache) reuses the stored rate.
+    exchange_rate_service._rate_cache.update(rate=1.0, timestamp=0)
+    assert exchange_rate_service.get_usdt_twd_rate() == fakes.USD_TWD
+    assert exchange_rate_service.fetch_rate_from_max.call_count == 1
+
+
+def test_failed_symbol_is_not_marked_cached(offline):
+    start = date.today() - timedelta(days=60)
+    fetch_start = (start - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    def b_fails(symbols, **kwargs):
+        frame = fakes.download(symbols, **kwargs)
+        frame[("Close", "B")] = float("nan")
+        return frame
+
+    analytics_service.yf.download.side_effect = b_fails
+    assert set(analytics_service.fetch_yahoo_history(["A", "B"], start)) == {"A"}
+    with market_db.session() as m:
+        assert [r.symbol for r in m.query(market_db.HistoryRange)] == ["A"]
+
+    analytics_service.yf.download.side_effect = fakes.download
+    history = analytics_service.fetch_yahoo_history(["A", "B"], start)
+    assert analytics_service.yf.download.call_args.args[0] == ["B"]
+    assert analytics_service.yf.download.call_args.kwargs["start"] == fetch_start
+    assert len(set(history["B"].values())) > 1
+
+
+def test_failing_ticker_backs_off(db, offline):
+    _asset(db, "DELISTED")
+    price_service.fetch_stock_price.side_effect = lambda ticker: 0.0
+    assert price_service.update_prices(db) == 1
+    assert price_service.update_prices(db) == 0     # waiting out its retry
+
+    with market_db.session() as m:
+        m.query(market_db.QuoteFailure).update({"retry_at": datetime.now() - timedelta(seconds=1)})
+        m.commit()
+    assert price_service.update_prices(db) == 1
+    with market_db.session() as m:
+        failure = m.query(market_db.QuoteFailure).one()
+    assert failure.failures == 2
+    assert failure.retry_at - datetime.now() > market_data_service.QUOTE_RETRY
+
+    price_service.fetch_stock_price.side_effect = fakes.price
+    with market_db.session() as m:
+        m.query(market_db.QuoteFailure).update({"retry_at": datetime.now() - timedelta(seconds=1)})
+        m.commit()
+    assert price_service.update_prices(db) == 1
+    with market_db.session() as m:
+        assert m.query(market_db.QuoteFailure).count() == 0
@@ -0,0 +1,93 @@
+"""Tests for observability/memory.py (tracemalloc diffs, identity maps, caches)."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from backend import main, models
+from backend.observability import memory, profiling
+
+_held = []
+
+
+@pytest.fixture(autouse=True)
+def _tracing():
+    yield
+    memory.stop()
+    _held.clear()
+
+
+def _grow():
+    for _ in range(2000):
+        _held.append(bytes(512))
+
+
+def test_diff_finds_growing_line():
+    memory.start()
+    memory.take_snapshot("before")
+    _grow()
+    memory.take_snapshot("after")
+
+    result = memory.diff("before", "after")
+    top = result["top"][0]
+    assert top["file"] == __file__ and top["size_diff_bytes"] >= 2000 * 512
+    assert top["count_diff"] >= 2000
+    assert result["total_size_diff_bytes"] >= 2000 * 512
+
+    by_file = memory.diff("before", group_by="filename")
+    assert by_file["target"] == "now" and by_file["top"][0]["line"] is None
+
+
+def test_snapshots_need_tracing_and_are_capped():
+    with pytest.raises(memory.TracingNotStarted):
+        memory.take_snapshot("nope")
+    memory.start()
+    for i in range(memory.MAX_SNAPSHOTS + 2):
+        memory.take_snapshot(f"s{i}")
+    names = [s["name"] for s in memory.list_snapshots()]
+    assert len(names) == memory.MAX_SNAPSHOTS and names[0] == "s2"
+    assert memory.delete_snapshot("s2") and not memory.delete_snapshot("s2")
+    with pytest.raises(KeyError):
+        memory.diff("s0")
+    memory.stop()
+    assert memory.list_snapshots() == []
+
+
+def test_identity_maps_count_loaded_objects(db):
+    db.add_all(models.Asset(name=f"A{i}", ticker=f"T{i}", category="Stock", source="manual") for i in range(7))
+    db.commit()
+    loaded = db.query(models.Asset).all()   # the identity map holds objects weakly
+
+    mine = next(s for s in memory.identity_maps(top=100)["largest"] if s["hash_key"] == db.hash_key)
+    assert mine["identity_map"] == len(loaded) == 7 and mine["new"] == 0
+
+
+def test_cache_sizes_report_registered_caches():
+    memory.register_cache("test.cache", lambda: len(_held))
+    memory.register_cache("test.broken", lambda: 1 / 0)
+    _grow()
+    sizes = memory.cache_sizes()
+    assert sizes["test.cache"] == 2000 and sizes["test.broken"] is None
+    assert "forecast_service.result" in sizes and "market_calendar.holidays" in sizes
+    memory._caches.pop("test.cache")
+    memory._caches.pop("test.broken")
+
+
+def test_endpoints_require_token(monkeypatch):
+    monkeypatch.setenv(profiling.TOKEN_ENV, "s3cret")
+
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            auth = {"X-Profile-Token": "s3cret"}
+            assert (await client.get("/api/system/memory")).status_code == 403
+            assert (await client.post("/api/system/memory/snapshots/a", headers=auth)).status_code == 409
+            assert (await client.post("/api/system/memory/tracemalloc/start", headers=auth)).status_code == 200
+            assert (await client.post("/api/system/memory/snapshots/a", headers=auth)).status_code == 200
+            diff = await client.get("/api/system/memory/diff?base=a&limit=3", headers=auth)
+            assert diff.status_code == 200 and len(diff.json()["top"]) <= 3
+            assert (await client.get("/api/system/memory/diff?base=zz", headers=auth)).status_code == 404
+            overview = (await client.get("/api/system/memory", headers=auth)).json()
+            assert overview["tracemalloc"]["tracing"] and "caches" in overview
+    asyncio.run(go())
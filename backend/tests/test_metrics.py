@@ -0,0 +1,90 @@
+"""Tests for observability/metrics.py (request and DB metrics)."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+
+from backend import models
+from backend.observability import metrics
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _app(db):
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):      # sync: runs in the threadpool
+        db.execute(text("SELECT 1"))
+        db.query(models.Asset).all()
+        return {"id": item_id}
+
+    return app
+
+
+def _get(app, *paths):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get(p) for p in paths]
+    return asyncio.run(go())
+
+
+def _sample(name: str) -> float:
+    for line in metrics.render().splitlines():
+        series, _, value = line.rpartition(" ")
+        if series == name:
+            return float(value)
+    raise AssertionError(f"{name} not in output")
+
+
+def test_requests_labelled_by_route_template(db):
+    _get(_app(db), "/items/1", "/items/2", "/missing")
+
+    assert _sample('http_requests_total{method="GET",route="/items/{item_id}",status="200"}') == 2
+    assert _sample('http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert _sample('http_request_duration_seconds_count{method="GET",route="/items/{item_id}"}') == 2
+    assert _sample('http_response_size_bytes_sum{method="GET",route="/items/{item_id}"}') == 2 * len('{"id":1}')
+    assert _sample("http_requests_in_flight") == 0
+
+
+def test_sql_in_sync_endpoint_counted_per_request(db):
+    _get(_app(db), "/items/1")
+
+    assert _sample('http_request_db_statements_sum{method="GET",route="/items/{item_id}"}') == 2
+    assert _sample('http_request_db_statements_bucket{method="GET",route="/items/{item_id}",le="2"}') == 1
+    assert _sample('db_statements_total{source="http"}') == 2
+
+
+def test_track_job_attributes_sql(db):
+    other = 'db_statements_total{source="other"}'
+    before = _sample(other)     # schema setup by the db fixture
+    with metrics.track_job("price_update"):
+        db.execute(text("SELECT 1"))
+    db.execute(text("SELECT 1"))
+
+    assert _sample('job_db_statements_total{job="price_update"}') == 1
+    assert _sample('db_statements_total{source="job"}') == 1
+    assert _sample(other) == before + 1
+
+
+def test_failed_statement_does_not_leak_timer(db):
+    conn = db.connection()
+    with pytest.raises(Exception):
+        conn.execute(text("SELECT * FROM no_such_table"))
+    db.rollback()
+    assert not db.connection().info.get("metrics_t0")
+
+
+def test_label_values_escaped():
+    metrics.requests_total.inc(("GET", 'a"b\\c', "200"))
+    assert 'route="a\\"b\\\\c"' in metrics.render()
@@ -0,0 +1,99 @@
+"""Tests for observability/profiling.py (on-demand sampling profiler)."""
+
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from backend import profile_manager
+from backend.observability import profiling
+
+
+@pytest.fixture(autouse=True)
+def _profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_manager, "DATA_DIR", tmp_path)
+    monkeypatch.setenv(profiling.TOKEN_ENV, "s3cret")
+    profiling._armed_jobs.clear()
+
+
+def _busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow():
+        _busy_loop(0.1)
+        return {"ok": True}
+
+    return profiling.ProfilingMiddleware(app)
+
+
+def _get(app, path, headers=None):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+    return asyncio.run(go())
+
+
+def test_sampler_sees_busy_thread_and_skips_idle():
+    idle = threading.Event()
+    waiter = threading.Thread(target=idle.wait, name="idle-waiter")
+    waiter.start()
+    sampler = profiling.Sampler(interval=0.001).start()
+    _busy_loop(0.1)
+    sampler.stop()
+    idle.set()
+    waiter.join()
+
+    threads = {thread for thread, _ in sampler.samples}
+    assert "MainThread" in threads and "idle-waiter" not in threads
+    assert "_busy_loop" in sampler.collapsed()
+    doc = sampler.speedscope("unit")
+    main = next(p for p in doc["profiles"] if p["name"] == "MainThread")
+    assert len(main["samples"]) == len(main["weights"])
+    assert all(i < len(doc["shared"]["frames"]) for stack in main["samples"] for i in stack)
+
+
+def test_request_with_token_is_profiled():
+    resp = _get(_app(), "/slow", {"X-Profile-Token": "s3cret", "X-Profile-Format": "collapsed"})
+    name = resp.headers["x-profile-file"]
+    assert name.endswith(".collapsed.txt")
+    assert [p["name"] for p in profiling.list_profiles()] == [name]
+    assert "_busy_loop" in profiling.profile_path(name).read_text()
+
+    resp = _get(_app(), "/slow?profile_token=s3cret")
+    doc = json.loads(profiling.profile_path(resp.headers["x-profile-file"]).read_text())
+    assert doc["name"] == "GET /slow"
+
+
+def test_request_without_valid_token_is_not_profiled():
+    assert "x-profile-file" not in _get(_app(), "/slow").headers
+    assert "x-profile-file" not in _get(_app(), "/slow", {"X-Profile-Token": "wrong"}).headers
+    assert profiling.list_profiles() == []
+
+
+def test_armed_job_profiled_once():
+    profiling.arm_job("price_update")
+    with profiling.job_profiler("price_update") as path:
+        _busy_loop(0.02)
+    assert path.exists()
+    with profiling.job_profiler("price_update") as nothing:
+        pass
+    assert nothing is None
+    assert len(profiling.list_profiles()) == 1
+
+
+def test_profile_path_rejects_other_files(tmp_path):
+    (tmp_path / "config.json").write_text("{}")
+    assert profiling.profile_path("../config.json") is None
+    assert profiling.profile_path("config.json") is None
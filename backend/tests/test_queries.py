@@ -0,0 +1,117 @@
+"""Query budgets per endpoint (observability/queries.py).
+
+Each budgeted request runs against a small seeded ledger through the real
+app (``get_db`` overridden to the test session, upstreams faked).  A request
+fails if it exceeds its statement budget or repeats any statement shape
+``N_PLUS_ONE_THRESHOLD`` times — the signature of an N+1.  Requests are
+measured warm (after one untimed call), so one-off lot and holdings
+checkpoint builds don't count against the budget.
+
+When a budget fails because a change legitimately needs another query,
+raise the number in BUDGETS in the same commit.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from backend import database, models
+from backend.devtools import fakes
+from backend.observability import queries
+from backend.services.providers import PROVIDERS
+from backend.utils.pagination import encode_cursor
+
+ASSETS = 8
+TXS_PER_ASSET = 6
+
+# (method, path, body, max statements)
+BUDGETS = [
+    ("GET",  "/api/assets/", None, 2),
+    ("GET",  "/api/assets/1", None, 2),
+    # Writes include the lot sync (reads no longer run it) and the history restatement.
+    ("POST", "/api/assets/1/transactions/", {"amount": 1.0, "buy_price": 10.0}, 15),
+    ("POST", "/api/transactions/transfer", {"from_asset_id": 1, "to_asset_id": 2, "amount": 5.0}, 30),
+    ("GET",  "/api/transactions/?limit=20", None, 1),
+    ("GET",  "/api/dashboard/", None, 2),
+    ("GET",  "/api/settings/", None, 1),
+]
+
+
+@pytest.fixture
+def seeded(db):
+    start = datetime(2026, 1, 5)
+    for i in range(ASSETS):
+        asset = models.Asset(name=f"Asset {i}", ticker=f"T{i}", category="Stock", sub_category="US",
+                             current_price=100.0 + i, include_in_net_worth=True, source="manual")
+        db.add(asset)
+        db.flush()
+        for j in range(TXS_PER_ASSET):
+            db.add(models.Transaction(asset_id=asset.id, amount=1.0 + j, buy_price=90.0 + j,
+                                      date=start + timedelta(days=7 * j + i)))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def call(seeded):
+    from backend.main import app
+
+    app.dependency_overrides[database.get_db] = lambda: seeded
+
+    def _call(method, path, body=None):
+        async def go():
+            transport = httpx.ASGITransport(app=queries.QueryDebugMiddleware(app))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, path, json=body)
+        return asyncio.run(go())
+
+    with fakes.offline():
+        yield _call
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("method,path,body,budget", BUDGETS, ids=[f"{m} {p}" for m, p, _, _ in BUDGETS])
+def test_endpoint_query_budget(call, method, path, body, budget):
+    call(method, path, body)           # warm: first-time checkpoints
+    with queries.capture() as log:
+        resp = call(method, path, body)
+    assert resp.status_code < 400, resp.text
+    assert int(resp.headers[queries.HEADER.decode()]) == log.count
+    assert not log.repeated(), f"repeated statements: {log.repeated()}"
+    assert log.count <= budget, "\n".join(log.statements)
+
+
+def test_malformed_asset_cursor_is_400(call):
+    resp = call("GET", f"/api/assets/?limit=2&cursor={encode_cursor(None)}")
+    assert resp.status_code == 400
+
+
+def test_provider_sync_queries_independent_of_coin_count(db, monkeypatch):
+    """Reconciliation costs the same number of statements for 2 coins or 8."""
+    db.add(models.CryptoConnection(name="Main", provider="binance", api_key="k", api_secret="s", is_active=True))
+    db.commit()
+
+    def statements(coins):
+        monkeypatch.setattr(fakes, "EXCHANGE_TICKERS", [f"C{i}" for i in range(coins)])
+        with fakes.offline():
+            PROVIDERS["binance"].sync(db)      # creates the assets
+            with queries.capture() as log:
+                assert PROVIDERS["binance"].sync(db) is True
+        return log
+
+    small, large = statements(2), statements(8)
+    assert not large.repeated()
+    assert small.count == large.count
+
+
+def test_shape_folds_parameters():
+    assert queries.shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?) LIMIT 10") == \
+        queries.shape("SELECT * FROM t WHERE id IN (?) LIMIT 1")
+
+
+def test_repeated_flags_n_plus_one():
+    log = queries.QueryLog()
+    log.statements = ["SELECT * FROM transactions WHERE asset_id = ?"] * 6 + ["SELECT 1"]
+    assert log.repeated() == {"SELECT * FROM transactions WHERE asset_id = ?": 6}
@@ -0,0 +1,121 @@
+"""Query-plan regression suite.
+
+Runs the hot repository/service queries against a synthetic ledger, captures
+every SQL statement they emit and checks ``EXPLAIN QUERY PLAN``: none may
+fall back to a bare full-table ``SCAN`` of a large table.  Covering-index
+scans are allowed, since a few reads (risk state rebuild) are full-history
+by design.
+"""
+
+import random
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from backend import models
+from backend.repositories.asset_repo import AssetRepository
+from backend.services import analytics_service, holdings_service, lot_service, risk_service
+from backend.utils.pagination import encode_cursor
+
+N_ASSETS = 200
+N_TRANSACTIONS = 10_000
+N_DAYS = 1_500
+
+LARGE_TABLES = {
+    "transactions", "net_worth_history", "asset_value_history",
+    "lots", "realized_gains", "holding_checkpoints",
+}
+BARE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+@pytest.fixture
+def ledger(db):
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    conn = db.connection()
+    conn.execute(
+        models.Asset.__table__.insert(),
+        [{"id": i, "name": f"A{i}", "ticker": f"T{i}", "category": "Stock", "current_price": 10.0,
+          "include_in_net_worth": True} for i in range(1, N_ASSETS + 1)],
+    )
+    conn.execute(
+        models.Transaction.__table__.insert(),
+        [{"asset_id": rng.randint(1, N_ASSETS), "amount": rng.choice([5.0, 3.0, -1.0]),
+          "buy_price": rng.uniform(5, 15), "is_transfer": False,
+          "date": start + timedelta(minutes=rng.randint(0, N_DAYS * 24 * 60))}
+         for _ in range(N_TRANSACTIONS)],
+    )
+    days = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(N_DAYS)]
+    conn.execute(
+        models.NetWorthHistory.__table__.insert(),
+        [{"date": d, "value": 1e6 + i * 100} for i, d in enumerate(days)],
+    )
+    conn.execute(
+        models.AssetValueHistory.__table__.insert(),
+        [{"asset_id": a, "date": d, "quantity": 1.0, "price": 10.0, "value_twd": 10.0}
+         for a in range(1, 11) for d in days],
+    )
+    db.commit()
+    conn = db.connection()
+    conn.execute(text("ANALYZE"))
+    db.commit()
+    return db
+
+
+def _capture(db, fn):
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+    return statements
+
+
+def _bare_scans(db, statements):
+    raw = db.connection().connection.driver_connection
+    found = []
+    for sql, params in statements:
+        for row in raw.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall():
+            m = BARE_SCAN.match(row[-1])
+            if m and m.group(1) in LARGE_TABLES:
+                found.append((row[-1], sql))
+    return found
+
+
+HOT_QUERIES = {
+    "asset_list_all":     lambda db: AssetRepository(db).list_all(),
+    "asset_get":          lambda db: AssetRepository(db).get(7),
+    "lot_sync":           lambda db: lot_service.sync_lots(db),
+    "lot_open_cost":      lambda db: lot_service.open_cost_by_asset(db, [7]),
+    "realized_by_asset":  lambda db: lot_service.realized_by_asset(db, 7),
+    "holdings_as_of":     lambda db: holdings_service.holdings_as_of(db, date(2022, 6, 15)),
+    "asset_history":      lambda db: analytics_service.get_asset_history(db, 3, date(2023, 1, 1)),
+    "history_range":      lambda db: db.query(models.NetWorthHistory)
+                                       .filter(models.NetWorthHistory.date >= "2023-01-01").all(),
+    "risk_rebuild":       lambda db: risk_service.rebuild_risk_state(db),
+    "ledger_deep_page":   lambda db: AssetRepository(db).list_transactions(
+                                         limit=50, cursor=encode_cursor(datetime(2021, 6, 1), 5_000)),
+    "ledger_asset_page":  lambda db: AssetRepository(db).list_transactions(
+                                         limit=50, asset_id=7, cursor=encode_cursor(datetime(2022, 1, 1), 5_000)),
+    "ledger_date_range":  lambda db: AssetRepository(db).list_transactions(
+                                         limit=50, start=date(2021, 1, 1), end=date(2021, 3, 31)),
+    "asset_page":         lambda db: AssetRepository(db).list_page(limit=20, cursor=encode_cursor(100)),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_indexes(ledger, name):
+    # Warm up: lazily built state (lots, checkpoints) is created on the first call.
+    HOT_QUERIES[name](ledger)
+    statements = _capture(ledger, lambda: HOT_QUERIES[name](ledger))
+    assert statements, f"{name} issued no SELECT"
+    assert _bare_scans(ledger, statements) == []
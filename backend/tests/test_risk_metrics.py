@@ -0,0 +1,75 @@
+"""Tests for risk_service.py (incremental risk-metric state)."""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from backend import models
+from backend.services import analytics_service, risk_service
+
+
+def _series(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    value, start = 1_000_000.0, date(2023, 1, 1)
+    rows = []
+    for i in range(n):
+        value *= 1 + rng.gauss(0.0005, 0.02)
+        rows.append({"date": (start + timedelta(days=i)).isoformat(), "value": round(value, 0)})
+    return rows
+
+
+def _assert_same(a: dict, b: dict):
+    for key in ("cagr", "maxDrawdown", "volatility"):
+        assert a[key]["value"] == pytest.approx(b[key]["value"], rel=1e-9, abs=1e-9)
+        assert a[key]["status"] == b[key]["status"]
+
+
+def test_incremental_updates_match_full_calculation(db):
+    history = _series(500)
+    history[100]["value"] = 0  # non-positive days are skipped by both paths
+    for h in history:
+        db.add(models.NetWorthHistory(date=h["date"], value=h["value"]))
+        db.flush()
+        risk_service.update_risk_state(db, h["date"], h["value"])
+    db.commit()
+    _assert_same(risk_service.get_risk_metrics(db), analytics_service.compute_risk_metrics(history))
+
+
+def test_same_day_rewrite_does_not_double_count(db):
+    history = _series(30)
+    for h in history:
+        db.add(models.NetWorthHistory(date=h["date"], value=h["value"]))
+        db.flush()
+        risk_service.update_risk_state(db, h["date"], h["value"])
+    last = db.query(models.NetWorthHistory).filter_by(date=history[-1]["date"]).one()
+    for value in (1.0e6, 1.2e6, history[-1]["value"] * 0.9):
+        last.value = value
+        risk_service.update_risk_state(db, last.date, value)
+    history[-1]["value"] = last.value
+    state = db.get(models.RiskMetricState, risk_service.STATE_ID)
+    assert state.n_returns == len(history) - 2
+    _assert_same(risk_service.get_risk_metrics(db), analytics_service.compute_risk_metrics(history))
+
+
+def test_back_dated_snapshot_triggers_rebuild(db):
+    history = _series(60)
+    for h in history[::2]:
+        db.add(models.NetWorthHistory(date=h["date"], value=h["value"]))
+        db.flush()
+        risk_service.update_risk_state(db, h["date"], h["value"])
+    for h in history[1::2]:
+        db.add(models.NetWorthHistory(date=h["date"], value=h["value"]))
+        db.flush()
+        risk_service.update_risk_state(db, h["date"], h["value"])
+    _assert_same(risk_service.get_risk_metrics(db), analytics_service.compute_risk_metrics(history))
+
+
+def test_missing_state_is_backfilled_and_single_point_is_none(db):
+    assert risk_service.get_risk_metrics(db) is None
+    history = _series(10)
+    for h in history:
+        db.add(models.NetWorthHistory(date=h["date"], value=h["value"]))
+    db.commit()
+    _assert_same(risk_service.get_risk_metrics(db), analytics_service.compute_risk_metrics(history))
+    assert db.query(models.RiskMetricState).count() == 1
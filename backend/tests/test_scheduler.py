@@ -0,0 +1,113 @@
+"""Tests for the multi-profile price/snapshot jobs in scheduler.py."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend import database, migrations, models, profile_manager, scheduler
+from backend.devtools import fakes
+from backend.services import price_service
+
+PROFILES = {
+    "default": [("AAPL", "Stock"), ("BTC-USD", "Crypto")],
+    "alice":   [("AAPL", "Stock"), ("BTC-USD", "Crypto"), ("2330.TW", "Stock")],
+    "bob":     [("AAPL", "Stock"), ("TSLA", "Stock")],
+}
+# Before the last close of every market, so each stock is due whatever the clock says.
+STALE = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_manager, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(profile_manager, "CONFIG_FILE", tmp_path / "config.json")
+    monkeypatch.setattr(profile_manager, "_config_cache",
+                        {"current_profile": "default", "profiles": list(PROFILES)})
+    monkeypatch.setattr(database, "_profile_sessions", {})
+    url = profile_manager.get_db_url("default")
+    migrations.run_migrations(url)
+    engine = database.get_engine(url)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+
+    for name, holdings in PROFILES.items():
+        db = database.profile_session(name)
+        for ticker, category in holdings:
+            db.add(models.Asset(name=ticker, ticker=ticker, category=category, source="manual",
+                                include_in_net_worth=True, last_updated_at=STALE))
+        db.flush()
+        for asset in db.query(models.Asset):
+            db.add(models.Transaction(asset_id=asset.id, amount=2.0, buy_price=1.0))
+        db.commit()
+        db.close()
+
+    with fakes.offline():
+        yield
+    for name in PROFILES:
+        database.dispose_profile(name)
+    engine.dispose()
+
+
+def _prices(name):
+    db = database.profile_session(name)
+    try:
+        return {a.ticker: a.current_price for a in db.query(models.Asset)}
+    finally:
+        db.close()
+
+
+def _snapshots(name):
+    db = database.profile_session(name)
+    try:
+        return db.query(models.NetWorthHistory).count()
+    finally:
+        db.close()
+
+
+def _run_jobs():
+    scheduler.run_crypto_price_updates()
+    scheduler.run_stock_price_updates()
+    scheduler.run_price_updates()
+
+
+def test_all_profiles_fetch_each_ticker_once(profiles, monkeypatch):
+    monkeypatch.setenv(scheduler.ALL_PROFILES_ENV, "1")
+    _run_jobs()
+
+    stock_calls = sorted(c.args[0] for c in price_service.fetch_stock_price.call_args_list)
+    assert stock_calls == ["2330.TW", "AAPL", "TSLA"]
+    assert price_service.fetch_crypto_prices.call_count == 1
+    assert price_service.fetch_crypto_prices.call_args.args[0] == ["BTC-USD"]
+
+    for name, holdings in PROFILES.items():
+        prices = _prices(name)
+        assert prices == {t: fakes.price(t) for t, _ in holdings}
+        assert _snapshots(name) == 1
+
+
+def test_default_mode_only_touches_active_profile(profiles, monkeypatch):
+    monkeypatch.delenv(scheduler.ALL_PROFILES_ENV, raising=False)
+    _run_jobs()
+
+    assert _prices("default")["AAPL"] == fakes.price("AAPL")
+    assert _snapshots("default") == 1
+    assert set(_prices("bob").values()) == {0.0} and _snapshots("bob") == 0
+
+
+def test_budget_is_shared_round_robin(profiles):
+    sessions = {name: database.profile_session(name) for name in PROFILES}
+    try:
+        calls = price_service.update_prices_across(sessions, markets={"US", "TW"}, budget=2)
+    finally:
+        for db in sessions.values():
+            db.close()
+    assert calls == 2
+    fetched = {c.args[0] for c in price_service.fetch_stock_price.call_args_list}
+    assert len(fetched) == 2 and "AAPL" in fetched
+
+
+def test_snapshot_job_makes_no_upstream_calls(profiles):
+    scheduler.run_price_updates()
+    assert price_service.fetch_stock_price.call_count == 0
+    assert price_service.fetch_crypto_prices.call_count == 0
+    assert _snapshots("default") == 1
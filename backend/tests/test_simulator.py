@@ -0,0 +1,42 @@
+"""Tests for simulator_service.py (closed-form wealth simulator grid)."""
+
+import numpy as np
+import pytest
+
+from backend import models
+from backend.services import simulator_service
+
+
+def _loop_fv(initial: float, monthly: float, annual_pct: float, years: int) -> float:
+    balance, r = initial, annual_pct / 100 / 12
+    for _ in range(years * 12):
+        balance = balance * (1 + r) + monthly
+    return balance
+
+
+def test_grid_matches_month_by_month_compounding():
+    values = simulator_service.future_value_grid(
+        50_000, np.array([0.0, 10_000.0]), np.array([-3.0, 0.0, 6.0]), np.array([1, 20])
+    )
+    assert values.shape == (2, 3, 2)
+    for ci, c in enumerate([0.0, 10_000.0]):
+        for ri, r in enumerate([-3.0, 0.0, 6.0]):
+            for yi, y in enumerate([1, 20]):
+                assert values[ci, ri, yi] == pytest.approx(_loop_fv(50_000, c, r, y), rel=1e-9)
+
+
+def test_defaults_follow_settings(db):
+    db.add(models.SystemSetting(key="wealth_simulator_monthly_contribution", value="20000"))
+    db.add(models.SystemSetting(key="wealth_simulator_years", value="10"))
+    db.commit()
+    grid = simulator_service.simulate_grid(db)
+    assert grid["contributions"] == [10_000.0, 15_000.0, 20_000.0, 25_000.0, 30_000.0]
+    assert grid["returns"][len(grid["returns"]) // 2] == 6.0
+    assert grid["years"] == list(range(1, 11))
+    assert len(grid["values"]) == 5 and len(grid["values"][0]) == 9 and len(grid["values"][0][0]) == 10
+    assert grid["invested"][2][-1] == 20_000 * 120
+
+
+def test_oversized_grid_rejected(db):
+    with pytest.raises(simulator_service.GridTooLarge):
+        simulator_service.simulate_grid(db, contribution_steps=101, return_steps=101, years=100)
@@ -0,0 +1,231 @@
+"""Tests for snapshot_service.py (daily snapshot, intraday series, rollups)."""
+
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+
+import httpx
+import pytest
+
+from backend import models, schemas
+from backend.repositories.asset_repo import AssetRepository
+from backend.services import analytics_service, snapshot_service
+
+
+def _cash(db, amount: float) -> models.Asset:
+    repo = AssetRepository(db)
+    asset = repo.create(schemas.AssetCreate(name="Cash", category="Fluid", current_price=1.0))
+    repo.create_transaction(
+        schemas.TransactionCreate(amount=amount, buy_price=1.0, date=datetime(2025, 1, 1)), asset.id
+    )
+    return asset
+
+
+def test_snapshot_writes_daily_row_and_intraday_capture(db):
+    _cash(db, 1_000)
+    snapshot_service.snapshot_net_worth(db)
+    today = date.today().strftime("%Y-%m-%d")
+    assert db.query(models.NetWorthHistory).filter_by(date=today).one().value == pytest.approx(1_000)
+    assert db.query(models.NetWorthIntraday).count() == 1
+    assert db.query(models.NetWorthRollup).filter_by(resolution="hour").count() == 1
+    assert db.query(models.NetWorthRollup).filter_by(resolution="week").count() == 1
+
+
+def test_intraday_capture_throttled_by_interval(db):
+    now = datetime(2026, 10, 19, 10, 0)
+    assert snapshot_service.record_intraday(db, now, 1.0, "{}")
+    assert not snapshot_service.record_intraday(db, now + timedelta(minutes=30), 2.0, "{}")
+    assert snapshot_service.record_intraday(db, now + timedelta(minutes=60), 3.0, "{}")
+
+
+def test_intraday_capture_survives_early_job(db):
+    first = datetime(2026, 10, 19, 10, 0, 1)
+    assert snapshot_service.record_intraday(db, first, 1.0, "{}")
+    assert snapshot_service.record_intraday(db, first + timedelta(minutes=59, seconds=59), 2.0, "{}")
+    assert db.query(models.NetWorthRollup).filter_by(resolution="hour").count() == 2
+
+
+def test_hour_bucket_tracks_low_high_close(db):
+    db.add(models.SystemSetting(key="intraday_snapshot_interval_minutes", value="5"))
+    base = datetime(2026, 10, 19, 10, 0)
+    for minutes, value in [(0, 100.0), (10, 80.0), (20, 120.0), (30, 110.0)]:
+        snapshot_service.record_intraday(db, base + timedelta(minutes=minutes), value, "{}")
+    db.commit()
+    row = db.query(models.NetWorthRollup).filter_by(resolution="hour", bucket="2026-10-19 10:00").one()
+    assert (row.low, row.high, row.value) == (80.0, 120.0, 110.0)
+
+
+def test_prune_applies_retention(db):
+    now = datetime(2026, 10, 19, 10, 0)
+    snapshot_service.record_intraday(db, now - timedelta(days=30), 1.0, "{}")
+    snapshot_service.record_intraday(db, now - timedelta(days=200), 1.0, "{}")
+    db.flush()
+    snapshot_service.prune_rollups(db, now)
+    db.commit()
+    assert db.query(models.NetWorthIntraday).count() == 0
+    assert db.query(models.NetWorthRollup).filter_by(resolution="hour").count() == 1
+
+
+def test_history_auto_uses_hourly_for_short_ranges(db):
+    db.add(models.SystemSetting(key="intraday_snapshot_interval_minutes", value="0"))
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start = datetime.combine(date.today() - timedelta(days=7), datetime.min.time())
+    hours = int((now - start).total_seconds() // 3600)
+    for h in range(hours, 0, -1):
+        snapshot_service.record_intraday(db, now - timedelta(hours=h), 1_000.0 + h, json.dumps({"Fluid": 1_000.0}))
+    db.commit()
+    result = analytics_service.get_net_worth_history(db, range_str="7d", resolution="auto")
+    assert len(result) == hours
+    assert result[0]["date"].endswith(":00")
+
+
+def test_history_auto_falls_back_to_daily_until_hours_cover_range(db):
+    db.add(models.SystemSetting(key="intraday_snapshot_interval_minutes", value="0"))
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    for h in range(5, 0, -1):
+        snapshot_service.record_intraday(db, now - timedelta(hours=h), 1_000.0 + h, json.dumps({"Fluid": 1_000.0}))
+    for i in range(8):
+        d = (date.today() - timedelta(days=i)).strftime("%Y-%m-%d")
+        db.add(models.NetWorthHistory(date=d, value=1_000.0, breakdown="{}"))
+    db.commit()
+    result = analytics_service.get_net_worth_history(db, range_str="7d", resolution="auto")
+    assert len(result) == 8
+    assert not result[0]["date"].endswith(":00")
+
+
+def test_history_week_resolution_backfills_from_daily(db):
+    today = date.today()
+    for i in range(60):
+        d = (today - timedelta(days=59 - i)).strftime("%Y-%m-%d")
+        db.add(models.NetWorthHistory(date=d, value=1_000.0 + i, breakdown="{}"))
+    db.commit()
+    assert snapshot_service.backfill_weekly_rollups(db) >= 9
+    assert snapshot_service.backfill_weekly_rollups(db) == 0   # already covered
+    result = analytics_service.get_net_worth_history(db, range_str="30d", resolution="week")
+    assert 4 <= len(result) <= 6
+    assert result[-1]["value"] == pytest.approx(1_059.0)
+
+
+def test_history_week_backfills_when_rollups_start_late(db):
+    today = date.today()
+    for i in range(400):
+        d = (today - timedelta(days=399 - i)).strftime("%Y-%m-%d")
+        db.add(models.NetWorthHistory(date=d, value=1_000.0 + i, breakdown="{}"))
+    db.commit()
+    # The first scheduled snapshot after deploy creates only the current week.
+    snapshot_service._upsert_week(db, today)
+    db.commit()
+    assert snapshot_service.backfill_weekly_rollups(db) >= 57
+    result = analytics_service.get_net_worth_history(db, range_str="1y", resolution="week")
+    assert 50 <= len(result) <= 54
+
+
+def test_history_week_read_falls_back_to_daily_without_writing(db):
+    today = date.today()
+    for i in range(60):
+        d = (today - timedelta(days=59 - i)).strftime("%Y-%m-%d")
+        db.add(models.NetWorthHistory(date=d, value=1_000.0 + i, breakdown="{}"))
+    db.commit()
+    snapshot_service._upsert_week(db, today)
+    db.commit()
+    result = analytics_service.get_net_worth_history(db, range_str="30d", resolution="week")
+    assert len(result) == 31                                    # daily series
+    assert db.query(models.NetWorthRollup).filter_by(resolution="week").count() == 1
+
+
+def test_history_rejects_unknown_resolution(db):
+    from backend import database
+    from backend.main import app
+
+    app.dependency_overrides[database.get_db] = lambda: db
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/stats/history?range=30d&resolution=month")
+
+    try:
+        response = asyncio.run(go())
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+
+
+# ── Per-asset value history ───────────────────────────────────────────────────
+
+def test_snapshot_writes_asset_value_rows(db):
+    asset = _cash(db, 2_500)
+    snapshot_service.snapshot_net_worth(db)
+    snapshot_service.snapshot_net_worth(db)  # same day → upsert, not duplicate
+    rows = db.query(models.AssetValueHistory).filter_by(asset_id=asset.id).all()
+    assert len(rows) == 1
+    assert rows[0].quantity == pytest.approx(2_500)
+    assert rows[0].value_twd == pytest.approx(2_500)
+
+
+def test_asset_history_served_from_table_when_covered(db, mocker):
+    asset = _cash(db, 10)
+    today = date.today()
+    for i in range(31):
+        d = (today - timedelta(days=30 - i)).strftime("%Y-%m-%d")
+        db.add(models.AssetValueHistory(asset_id=asset.id, date=d, quantity=10, price=1.0, value_twd=10.0 + i))
+    db.commit()
+    rebuild = mocker.patch("backend.services.analytics_service.build_asset_history")
+    result = analytics_service.get_asset_history(db, asset.id, analytics_service.parse_range("30d"))
+    rebuild.assert_not_called()
+    assert len(result) == 31
+    assert result[-1]["value"] == pytest.approx(40.0)
+
+
+def test_asset_history_missing_asset_returns_none(db):
+    assert analytics_service.get_asset_history(db, 999, analytics_service.parse_range("30d")) is None
+
+
+def test_reset_drops_history_of_reused_asset_ids(db):
+    from backend.routers import system
+
+    old_id = _cash(db, 1_000).id
+    start = date.today() - timedelta(days=29)
+    for i in range(30):
+        day = (start + timedelta(days=i)).strftime("%Y-%m-%d")
+        db.add(models.AssetValueHistory(asset_id=old_id, date=day, quantity=1, price=999_999, value_twd=999_999))
+    snapshot_service.snapshot_net_worth(db)
+
+    system.reset_database(db)
+    db.expunge_all()   # a new request gets a fresh session
+    for model in (models.AssetValueHistory, models.NetWorthIntraday, models.NetWorthRollup, models.RiskMetricState):
+        assert db.query(model).count() == 0
+    new = _cash(db, 5)
+    assert new.id == old_id
+    history = analytics_service.get_asset_history(db, new.id, start)
+    assert history and all(p["value"] != 999_999 for p in history)
+
+
+def test_back_dated_transaction_restates_recorded_history(db):
+    asset = _cash(db, 1_000)
+    start = date.today() - timedelta(days=9)
+    for i in range(10):
+        day = (start + timedelta(days=i)).strftime("%Y-%m-%d")
+        db.add(models.NetWorthHistory(date=day, value=1_000, breakdown=json.dumps({"Fluid": 1_000})))
+        db.add(models.AssetValueHistory(asset_id=asset.id, date=day, quantity=1_000, price=1.0, value_twd=1_000))
+    db.add(models.NetWorthIntraday(captured_at=datetime.now(), value=1_000, breakdown="{}"))
+    db.commit()
+
+    repo = AssetRepository(db)
+    since = datetime.combine(start + timedelta(days=5), datetime.min.time())
+    tx = repo.create_transaction(schemas.TransactionCreate(amount=500, buy_price=1.0, date=since), asset.id)
+
+    def values():
+        return [r.value for r in db.query(models.NetWorthHistory).order_by(models.NetWorthHistory.date)]
+
+    assert values() == [1_000] * 5 + [1_500] * 5
+    last = db.query(models.NetWorthHistory).order_by(models.NetWorthHistory.date.desc()).first()
+    assert json.loads(last.breakdown) == {"Fluid": 1_500}
+    assert db.query(models.AssetValueHistory).filter_by(date=last.date).one().value_twd == 1_500
+    assert db.query(models.NetWorthIntraday).count() == 1          # observed captures are kept
+    assert db.get(models.RiskMetricState, 1).last_value == 1_500
+
+    repo.update_transaction(tx.id, schemas.TransactionUpdate(date=since - timedelta(days=2)))
+    assert values() == [1_000] * 3 + [1_500] * 7
+    repo.delete_transaction(tx.id)
+    assert values() == [1_000] * 10
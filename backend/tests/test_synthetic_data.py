@@ -0,0 +1,63 @@
+"""Tests for devtools/synthetic_data.py."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import func
+
+from backend import models
+from backend.devtools import synthetic_data
+from backend.services import lot_service
+
+SCALE = synthetic_data.Scale(assets=12, years=0.5, wallets=1, wallet_tokens=2, syncs_per_day=3,
+                             exchange_assets=2, goals=3)
+END = date(2026, 6, 30)
+
+
+def _fingerprint(db):
+    T = models.Transaction
+    return db.query(func.count(T.id), func.sum(T.amount), func.max(T.date)).one()
+
+
+def test_generate_is_deterministic(db):
+    counts = synthetic_data.generate(db.get_bind(), SCALE, seed=7, end=END)
+    first = _fingerprint(db)
+    assert counts["assets"] == 12 + 2 + 2 * len(synthetic_data.EXCHANGES)
+    assert counts["net_worth_history"] == 182
+    assert first[2].date() == END
+
+    synthetic_data.generate(db.get_bind(), SCALE, seed=7, end=END, clear=True)
+    assert _fingerprint(db) == first
+    synthetic_data.generate(db.get_bind(), SCALE, seed=8, end=END, clear=True)
+    assert _fingerprint(db) != first
+
+
+def test_refuses_to_write_into_populated_db(db):
+    synthetic_data.generate(db.get_bind(), SCALE, end=END)
+    with pytest.raises(ValueError):
+        synthetic_data.generate(db.get_bind(), SCALE, end=END)
+
+
+def test_snapshots_match_the_ledger(db):
+    synthetic_data.generate(db.get_bind(), SCALE, seed=3, end=END)
+    T, V = models.Transaction, models.AssetValueHistory
+    ledger = dict(db.query(T.asset_id, func.sum(T.amount)).group_by(T.asset_id))
+    last = dict(db.query(V.asset_id, V.quantity).filter(V.date == END.isoformat()))
+    assert last.keys() == {a for a, q in ledger.items() if q}
+    for asset_id, qty in last.items():
+        assert qty == pytest.approx(ledger[asset_id])
+
+    wallet_prices = (
+        db.query(func.max(T.buy_price)).join(models.Asset)
+        .filter(models.Asset.source == "web3_wallet").scalar()
+    )
+    assert wallet_prices == 0.0
+    # Trading assets never go short.
+    lowest = (
+        db.query(func.min(V.quantity)).join(models.Asset)
+        .filter(models.Asset.category.in_(["Stock", "Crypto"])).scalar()
+    )
+    assert lowest >= -1e-9
+    assert lot_service.sync_lots(db) == db.query(T).count()
+    assert db.query(models.RiskMetricState).count() == 1
+    assert db.query(models.NetWorthRollup).filter_by(resolution="week").count() >= 26
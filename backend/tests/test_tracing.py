@@ -0,0 +1,67 @@
+"""Tests for observability/tracing.py (outbound call spans)."""
+
+import logging
+
+import pytest
+
+from backend import models
+from backend.devtools import fakes
+from backend.observability import metrics, tracing
+from backend.services.providers import PROVIDERS
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    tracing.reset()
+    metrics.reset()
+    yield
+    tracing.reset()
+
+
+class _Resp:
+    def __init__(self, status_code, content=b"{}"):
+        self.status_code, self.content = status_code, content
+
+
+def _stats(dependency, operation):
+    return next(s for s in tracing.dependency_stats()
+                if (s["dependency"], s["operation"]) == (dependency, operation))
+
+
+def test_span_records_outcomes_and_size():
+    with tracing.span("max", "tickers") as s:
+        s.response(_Resp(200, b"x" * 40))
+    with tracing.span("max", "tickers") as s:
+        s.response(_Resp(502))
+    with pytest.raises(TimeoutError):
+        with tracing.span("max", "tickers"):
+            raise TimeoutError("read timed out")
+
+    stats = _stats("max", "tickers")
+    assert stats["recent_calls"] == 3
+    assert stats["error_rate"] == pytest.approx(2 / 3, abs=1e-3)
+    assert "read timed out" in stats["last_error"]
+
+    text = metrics.render()
+    assert 'outbound_calls_total{dependency="max",operation="tickers",outcome="error"} 2' in text
+    assert 'outbound_calls_total{dependency="max",operation="tickers",outcome="ok"} 1' in text
+    assert 'outbound_response_bytes_total{dependency="max",operation="tickers"} 42' in text
+    assert 'outbound_call_duration_seconds_count{dependency="max",operation="tickers"} 3' in text
+
+
+def test_slow_calls_logged_with_target(monkeypatch, caplog):
+    monkeypatch.setenv("SLOW_CALL_MS", "0")
+    with caplog.at_level(logging.WARNING, logger=tracing.__name__):
+        with tracing.span("yfinance", "history", "2330.TW"):
+            pass
+    assert "Slow outbound call yfinance.history [2330.TW]" in caplog.text
+
+
+def test_provider_sync_is_traced(db):
+    db.add(models.CryptoConnection(name="Main", provider="pionex", api_key="k", api_secret="s", is_active=True))
+    db.commit()
+    with fakes.offline():
+        assert PROVIDERS["pionex"].sync(db) is True
+
+    assert _stats("pionex", "balances")["recent_calls"] == 1
+    assert _stats("pionex", "tickers")["error_rate"] == 0.0
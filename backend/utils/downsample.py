@@ -0,0 +1,74 @@
+"""Server-side downsampling and columnar shaping for time series responses."""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of the ``n_out`` points to keep.
+
+    Always keeps the first and last point.  Each inner bucket picks the point
+    forming the largest triangle with the previously kept point and the mean
+    of the next bucket; the per-bucket search is a single NumPy expression.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges for the n - 2 inner points, split into n_out - 2 buckets.
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def _x_axis(dates: list[str]) -> np.ndarray:
+    """Minutes since epoch for YYYY-MM-DD / YYYY-MM-DD HH:MM date strings."""
+    return np.array(dates, dtype="datetime64[m]").astype(np.int64).astype(np.float64)
+
+
+def downsample_points(points: list[dict], max_points: int | None, value_key: str = "value") -> list[dict]:
+    """Reduce a list of {"date", value_key, ...} rows to at most ``max_points``.
+
+    Whole rows are selected, so companion fields (breakdown, quantity, price)
+    stay consistent with the kept values.
+    """
+    if not max_points or len(points) <= max_points:
+        return points
+    x = _x_axis([p["date"] for p in points])
+    y = np.fromiter((p[value_key] or 0.0 for p in points), dtype=np.float64, count=len(points))
+    return [points[i] for i in lttb_indices(x, y, max_points)]
+
+
+_PLURALS = {"date": "dates", "value": "values", "quantity": "quantities", "price": "prices"}
+
+
+def to_columnar(points: list[dict]) -> dict:
+    """Row list → column arrays; ``breakdown`` dicts become {category: [..]}.
+
+    Categories missing from a row are filled with 0 so every column has the
+    same length as ``dates``.
+    """
+    if not points:
+        return {"dates": [], "values": []}
+    scalar_keys = [k for k in points[0] if k != "breakdown"]
+    result = {_PLURALS.get(k, k): [p.get(k) for p in points] for k in scalar_keys}
+    if "breakdown" in points[0]:
+        categories = sorted({c for p in points for c in (p.get("breakdown") or {})})
+        result["breakdown"] = {
+            c: [(p.get("breakdown") or {}).get(c, 0) for p in points] for c in categories
+        }
+    return result
@@ -7,3 +7,16 @@ def safe_float(val) -> float:
     if isinstance(val, (int, float)) and (math.isnan(val) or math.isinf(val)):
         return 0.0
     return val
+
+
+def percentile(values, pct: float) -> float:
+    """Linear-interpolated percentile (0–100) of a sequence; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    if lo == hi:
+        return float(ordered[int(k)])
+    return float(ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo))
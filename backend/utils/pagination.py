@@ -0,0 +1,30 @@
+"""Opaque keyset cursors.
+
+A cursor is the sort key of the last row on a page, serialised as URL-safe
+base64 JSON.  The next page filters on ``sort_key < cursor`` (or ``>``), so
+every page is an index seek no matter how deep it is, unlike OFFSET.
+"""
+import base64
+import json
+from datetime import datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*key) -> str:
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in key]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Inverse of encode_cursor; ISO timestamps come back as strings."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if not isinstance(values, list):
+        raise InvalidCursor("cursor must encode a list")
+    return values
@@ -127,6 +127,12 @@ export interface GoalForecast {
     avg_monthly_growth: number;
     months_to_reach: number;
     predicted_date: string;
+    /** Monte Carlo arrival dates (e.g. "Mar 2031"); null beyond the 30-year horizon or with < 6 months of history */
+    p10_date: string | null;
+    p50_date: string | null;
+    p90_date: string | null;
+    /** Share of simulated paths reaching the target within the horizon */
+    probability: number | null;
 }
 
 export interface MetricData {
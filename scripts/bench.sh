@@ -0,0 +1,32 @@
+#!/bin/bash
+# Backend benchmarks (needs: pip install pytest-benchmark).
+#
+#   scripts/bench.sh save [scales]      run and store a baseline
+#   scripts/bench.sh compare [scales]   run and compare against the latest baseline;
+#                                       fails if any median regressed by more than BENCH_THRESHOLD
+#
+# scales: comma-separated s,m,l (default s).  Baselines are machine-specific
+# JSON files under backend/benchmarks/.baselines/.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+cd "$PROJECT_ROOT"
+
+MODE="${1:-compare}"
+SCALES="${2:-s}"
+THRESHOLD="${BENCH_THRESHOLD:-15%}"
+STORAGE="file://backend/benchmarks/.baselines"
+ARGS=(backend/benchmarks -q --bench-scales="$SCALES" --benchmark-storage="$STORAGE" --benchmark-sort=name)
+
+case "$MODE" in
+  save)
+    python -m pytest "${ARGS[@]}" --benchmark-save="scales-${SCALES//,/-}"
+    ;;
+  compare)
+    python -m pytest "${ARGS[@]}" --benchmark-compare --benchmark-compare-fail="median:${THRESHOLD}" \
+      --benchmark-columns=min,median,max,rounds
+    ;;
+  *)
+    echo "Usage: $0 [save|compare] [scales]" >&2
+    exit 2
+    ;;
+esac